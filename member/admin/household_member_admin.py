@@ -9,10 +9,13 @@ from survey.site_surveys import site_surveys
 from ..admin_site import member_admin
 from ..forms import HouseholdMemberForm
 from ..models import HouseholdMember
+from ..search_index import normalize
 from .modeladmin_mixins import ModelAdminMixin, FieldsetsModelAdminMixin
 
 
 status_fields = (
+    'member_status',
+    'member_status_final',
     'visit_attempts',
     'eligible_member',
     'eligible_subject',
@@ -38,7 +41,7 @@ class HouseholdMemberAdmin(ModelAdminMixin, FieldsetsModelAdminMixin,
                            admin.ModelAdmin):
     form = HouseholdMemberForm
 
-    list_select_related = ('household_structure', )
+    list_select_related = ('household_structure__household__plot', )
     list_per_page = 15
 
     conditional_fieldsets = {
@@ -88,8 +91,10 @@ class HouseholdMemberAdmin(ModelAdminMixin, FieldsetsModelAdminMixin,
 
     list_display = (
         'first_name', 'initials',
-        'household_structure',
+        'household_identifier',
+        'survey_schedule',
         'relation',
+        'member_status',
         'visit_attempts',
         'inability_to_participate',
         'eligible_member',
@@ -115,6 +120,8 @@ class HouseholdMemberAdmin(ModelAdminMixin, FieldsetsModelAdminMixin,
 
     list_filter = (
         'household_structure__survey_schedule',
+        'member_status',
+        'member_status_final',
         'present_today',
         'non_citizen',
         'study_resident',
@@ -133,6 +140,17 @@ class HouseholdMemberAdmin(ModelAdminMixin, FieldsetsModelAdminMixin,
         'visit_attempts',
         'household_structure__household__plot__map_area')
 
+    def get_search_results(self, request, queryset, search_term):
+        """Returns the members found by `search_fields` together with
+        those found by identifier, map area or initials in the search
+        token index.
+        """
+        results, use_distinct = super().get_search_results(
+            request, queryset, search_term)
+        if any(normalize(word) for word in search_term.split()):
+            results = results | queryset.search(search_term)
+        return results, use_distinct
+
     def get_readonly_fields(self, request, obj=None):
         return (super().get_readonly_fields(request, obj=obj)
                 + survey_schedule_fields
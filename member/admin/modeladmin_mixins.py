@@ -16,6 +16,7 @@ from survey import S
 from survey.admin import survey_schedule_fields
 
 from ..models import HouseholdMember
+from .paginator import EstimatedCountPaginator
 from survey.site_surveys import site_surveys
 
 
@@ -64,6 +65,21 @@ class ModelAdminMixin(ModelAdminInstitutionMixin, ModelAdminFormInstructionsMixi
     list_per_page = 10
     date_hierarchy = 'modified'
     empty_value_display = '-'
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_list_select_related(self, request):
+        """Returns the relations used by the changelist, by default
+        those to the household member, household and plot.
+        """
+        if self.list_select_related:
+            return self.list_select_related
+        field_names = [field.name for field in self.model._meta.fields]
+        if 'household_member' in field_names:
+            return ('household_member__household_structure__household__plot', )
+        elif 'household_structure' in field_names:
+            return ('household_structure__household__plot', )
+        return self.list_select_related
 
     def get_readonly_fields(self, request, obj=None):
         return (super().get_readonly_fields(request, obj=obj)
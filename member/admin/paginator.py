@@ -0,0 +1,45 @@
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+
+class EstimatedCountPaginator(Paginator):
+
+    """A paginator that, for an unfiltered queryset of a large table,
+    uses the database's row estimate instead of `SELECT COUNT(*)`.
+
+    Tables estimated to have fewer rows than `estimate_threshold` and
+    filtered querysets are counted exactly.
+    """
+
+    estimate_threshold = 100000
+
+    @cached_property
+    def count(self):
+        estimate = self.get_estimate()
+        if estimate is not None and estimate >= self.estimate_threshold:
+            return estimate
+        return super().count
+
+    def get_estimate(self):
+        """Returns the estimated row count of the table or None.
+        """
+        try:
+            query = self.object_list.query
+        except AttributeError:
+            return None
+        if query.where:
+            return None
+        connection = connections[self.object_list.db]
+        db_table = self.object_list.model._meta.db_table
+        if connection.vendor == 'postgresql':
+            sql = 'SELECT reltuples FROM pg_class WHERE relname = %s'
+        elif connection.vendor == 'mysql':
+            sql = ('SELECT table_rows FROM information_schema.tables '
+                   'WHERE table_schema = DATABASE() AND table_name = %s')
+        else:
+            return None
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [db_table])
+            row = cursor.fetchone()
+        return int(row[0]) if row and row[0] is not None else None
@@ -2,16 +2,18 @@ from django.forms import ValidationError
 
 from edc_constants.constants import YES, NO, NOT_APPLICABLE
 
+from .eligibility_rules import age_rules
+
 
 class AgeHelper:
 
     def __init__(self, age_in_years=None, guardian=None, **kwargs):
         self.age_in_years = age_in_years
         self.guardian = guardian
-        self.is_child = self.age_in_years < 16
-        self.is_minor = 16 <= self.age_in_years < 18
-        self.is_adult = 18 <= self.age_in_years
-        self.is_age_eligible = 16 <= self.age_in_years <= 64
+        self.is_child = age_rules.applies('child', self)
+        self.is_minor = age_rules.applies('minor', self)
+        self.is_adult = age_rules.applies('adult', self)
+        self.is_age_eligible = age_rules.applies('age_eligible', self)
 
     def validate_or_raise(self):
         if self.is_child:
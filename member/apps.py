@@ -5,20 +5,36 @@ from django.conf import settings
 class AppConfig(DjangoApponfig):
     name = 'member'
     admin_site_name = 'member_admin'
+    # if True, the member flags and visit_attempts set by the signals
+    # are saved once per member when the transaction commits.
+    defer_member_updates = False
+    # if True, model saves, common_clean and signal receivers are
+    # timed and their queries counted, see member.instrumentation.
+    instrument = False
 
     def ready(self):
+        from member.eligibility_rules import site_eligibility_rules
+        site_eligibility_rules.compile()
+        from member.instrumentation import site_instrumentation
+        if self.instrument:
+            site_instrumentation.enable()
         from member.signals import (
             absent_member_on_post_delete,
             absent_member_on_post_save,
             deceased_member_on_post_delete,
             deceased_member_on_post_save,
+            enrollment_checklist_on_post_delete,
             enrollment_checklist_on_post_save,
             enrollment_loss_on_post_delete,
             enrollment_loss_on_post_save,
             household_head_eligibility_on_post_save,
             household_member_on_post_save,
+            htc_member_on_post_delete,
+            htc_member_on_post_save,
             moved_member_on_post_delete,
             moved_member_on_post_save,
+            plot_on_post_delete,
+            plot_on_post_save,
             refused_member_on_post_delete,
             refused_member_on_post_save,
             undecided_member_on_post_delete,
@@ -0,0 +1,61 @@
+"""Compares the row and the columnar enrollment loss reason
+evaluators, for example:
+
+    python -m member.benchmarks.loss_reasons --rows 1000000
+"""
+import argparse
+import random
+import time
+
+from edc_constants.constants import NO, NOT_APPLICABLE, YES
+
+from ..constants import BLOCK_PARTICIPATION, CONTINUE_PARTICIPATION
+from ..loss_reasons import evaluate_arrays, evaluate_rows, loss_reason_fields
+
+choices = {
+    'has_identity': [YES, NO],
+    'household_residency': [YES, NO],
+    'part_time_resident': [YES, NO],
+    'citizen': [YES, NO],
+    'legal_marriage': [YES, NO, NOT_APPLICABLE],
+    'marriage_certificate': [YES, NO, NOT_APPLICABLE],
+    'literacy': [YES, NO],
+    'guardian': [YES, NO, NOT_APPLICABLE],
+    'confirm_participation': [
+        BLOCK_PARTICIPATION, CONTINUE_PARTICIPATION, NOT_APPLICABLE]}
+
+
+def make_rows(size, seed=None):
+    rnd = random.Random(seed)
+    return [
+        dict(age_in_years=rnd.randint(16, 64), cloned=rnd.random() < 0.1,
+             **{field: rnd.choice(choices[field]) for field in loss_reason_fields})
+        for _ in range(size)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--seed', type=int, default=1)
+    options = parser.parse_args()
+    rows = make_rows(options.rows, seed=options.seed)
+    columns = {
+        column: [row[column] for row in rows] for column in rows[0]}
+
+    start = time.perf_counter()
+    results = evaluate_rows(rows)
+    row_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    is_eligible, loss_reason, _ = evaluate_arrays(columns)
+    array_seconds = time.perf_counter() - start
+
+    assert [value for value, _ in results] == is_eligible.tolist()
+    assert [value for _, value in results] == loss_reason.tolist()
+    print(f'{options.rows} rows: evaluate_rows {row_seconds:.2f}s, '
+          f'evaluate_arrays {array_seconds:.2f}s, '
+          f'speedup {row_seconds / array_seconds:.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+import socket
+
+from django.apps import apps as django_apps
+from django.db import transaction, DEFAULT_DB_ALIAS
+
+from edc_base.utils import get_utcnow
+from edc_sync.constants import INSERT, UPDATE
+from edc_sync.site_sync_models import site_sync_models
+
+CREATED = '+'
+CHANGED = '~'
+
+
+def bulk_create_history(instances, history_type=None, batch_size=None, using=None):
+    """Bulk creates one historical record per instance and returns
+    the historical records.
+
+    For rows written with bulk_create/bulk_update/update, which do
+    not trigger the history post_save handler.
+    """
+    if not instances or not hasattr(instances[0].__class__, 'history'):
+        return []
+    model = instances[0].__class__
+    history_model = model.history.model
+    history_date = get_utcnow()
+    field_names = [field.attname for field in model._meta.fields]
+    historical_records = []
+    for instance in instances:
+        attrs = {name: getattr(instance, name) for name in field_names}
+        historical_records.append(history_model(
+            history_date=history_date,
+            history_type=history_type or CHANGED,
+            history_user=None,
+            **attrs))
+    return history_model.objects.using(using or DEFAULT_DB_ALIAS).bulk_create(
+        historical_records, batch_size=batch_size)
+
+
+def get_outgoing_transaction(instance, created=None, using=None):
+    """Returns an unsaved OutgoingTransaction for instance or None
+    if the model is not synced or serialization is not allowed.
+
+    Builds what `to_outgoing_transaction` of the edc_sync wrapped
+    instance saves, so the transactions can be bulk created.
+    """
+    if instance._meta.label_lower not in site_sync_models.registry:
+        return None
+    sync_model = site_sync_models.get_wrapped_instance(instance)
+    if not sync_model.is_serialized:
+        return None
+    OutgoingTransaction = django_apps.get_model('edc_sync', 'outgoingtransaction')
+    created = True if created is None else created
+    timestamp_datetime = (
+        instance.created if created else instance.modified) or get_utcnow()
+    return OutgoingTransaction(
+        tx_name=instance._meta.label_lower,
+        tx_pk=getattr(instance, sync_model.primary_key_field.name),
+        tx=sync_model.encrypted_json(),
+        timestamp=timestamp_datetime.strftime('%Y%m%d%H%M%S%f'),
+        producer=f'{socket.gethostname()}-{using}',
+        action=INSERT if created else UPDATE,
+        using=using)
+
+
+def bulk_create_outgoing_transactions(instances, created=None, using=None,
+                                      batch_size=None):
+    """Bulk creates the edc_sync outgoing transactions for instances
+    written without save().
+    """
+    using = using or DEFAULT_DB_ALIAS
+    outgoing_transactions = [
+        obj for obj in (
+            get_outgoing_transaction(instance, created=created, using=using)
+            for instance in instances) if obj]
+    if outgoing_transactions:
+        outgoing_transactions[0].__class__.objects.using(using).bulk_create(
+            outgoing_transactions, batch_size=batch_size or 500)
+    return outgoing_transactions
+
+
+def emit_audit_records(instances, created=None, using=None, batch_size=None):
+    """Creates historical records and outgoing transactions for the
+    instances and their historical records in one transaction.
+    """
+    instances = list(instances)
+    using = using or DEFAULT_DB_ALIAS
+    with transaction.atomic(using=using):
+        historical_records = bulk_create_history(
+            instances, history_type=CREATED if created else CHANGED,
+            batch_size=batch_size, using=using)
+        bulk_create_outgoing_transactions(
+            instances, created=created, using=using, batch_size=batch_size)
+        bulk_create_outgoing_transactions(
+            historical_records, created=True, using=using, batch_size=batch_size)
@@ -0,0 +1,112 @@
+from itertools import groupby
+
+from django.apps import apps as django_apps
+from django.db import transaction
+
+from .constants import HEAD_OF_HOUSEHOLD
+
+
+def get_members_to_clone(household_structures, previous_survey_schedule):
+    """Returns a queryset of the household members of the previous
+    survey schedule of the households of `household_structures`
+    not yet cloned into any of `household_structures`.
+
+    Members are matched on internal_identifier so an interrupted
+    clone resumes where it stopped.
+    """
+    model = django_apps.get_model('member', 'householdmember')
+    return model.objects.filter(
+        household_structure__survey_schedule=previous_survey_schedule,
+        household_structure__household__in=household_structures.values('household')
+    ).exclude(
+        internal_identifier__in=model.objects.filter(
+            household_structure__in=household_structures).values(
+                'internal_identifier'))
+
+
+def clone_groups(household_members, targets, report_datetime=None,
+                 user_created=None):
+    """Yields a tuple of (household_structure, new members) per
+    target household structure, cloning the members, ordered by
+    household, with `clone()`.
+
+    A head of household is cloned last, as a new head of household
+    may only be the last member enumerated, see `validate_enumeration`.
+    """
+    for _, group in groupby(
+            household_members, key=lambda obj: obj.household_structure.household_id):
+        group = sorted(group, key=lambda obj: obj.relation == HEAD_OF_HOUSEHOLD)
+        household_structure = targets[group[0].household_structure.household_id]
+        yield household_structure, [
+            household_member.clone(
+                household_structure=household_structure,
+                report_datetime=(
+                    report_datetime
+                    or household_structure.survey_schedule_object.start),
+                user_created=user_created)
+            for household_member in group]
+
+
+def bulk_clone_members(household_structures=None, previous_survey_schedule=None,
+                       report_datetime=None, user_created=None, chunk_size=None,
+                       reporter=None):
+    """Clones the household members of the previous survey schedule
+    into `household_structures`, a queryset of the household
+    structures of the new survey schedule.
+
+    Members are read in one pass and cloned with `clone()`, keeping
+    the internal and subject identifiers, then inserted with
+    `HouseholdMember.objects.bulk_insert`, one transaction per chunk.
+    The report_datetime defaults to the start of each structure's
+    survey schedule.
+
+    Each target household structure is validated once with
+    `validate_enumeration`, e.g. for today's household log entry.
+    Structures not ready for enumeration are skipped and may be
+    cloned by a later run.
+
+    If `reporter`, each chunk adds its members to the
+    ProgressReporter and each skipped structure is reported.
+
+    Returns a tuple of (number of household members cloned, list of
+    skipped household structures).
+    """
+    model = django_apps.get_model('member', 'householdmember')
+    chunk_size = chunk_size or 500
+    targets = {
+        obj.household_id: obj
+        for obj in household_structures.select_related('household')}
+    household_members = get_members_to_clone(
+        household_structures, previous_survey_schedule).select_related(
+            'household_structure').order_by('household_structure__household', 'pk')
+    cloned = 0
+    skipped = []
+    new_members = []
+
+    def insert(new_members):
+        with transaction.atomic():
+            model.objects.bulk_insert(new_members, batch_size=chunk_size)
+        if reporter:
+            reporter.add(len(new_members))
+        return len(new_members)
+
+    for household_structure, group in clone_groups(
+            household_members.iterator(), targets,
+            report_datetime=report_datetime, user_created=user_created):
+        try:
+            model.objects.validate_enumeration(household_structure, group)
+        except tuple(group[0].common_clean_exceptions) as e:
+            skipped.append(household_structure)
+            if reporter:
+                reporter.add(0, skipped=1)
+                reporter.row(
+                    f'Skipped {household_structure}. {e}',
+                    style=reporter.style.WARNING)
+            continue
+        new_members.extend(group)
+        if len(new_members) >= chunk_size:
+            cloned += insert(new_members)
+            new_members = []
+    if new_members:
+        cloned += insert(new_members)
+    return cloned, skipped
@@ -1,22 +1,68 @@
-from edc_constants.constants import YES, NO, ALIVE, CONSENTED, NOT_APPLICABLE
+from edc_constants.constants import CONSENTED
 from edc_registration.models import RegisteredSubject
 
-from .constants import ABLE_TO_PARTICIPATE
+from .eligibility_rules import member_rules
+from .instrumentation import instrumented
+
+
+def get_registration_statuses(subject_identifiers):
+    """Returns a dictionary of {subject_identifier: registration_status}
+    in one query.
+    """
+    return dict(RegisteredSubject.objects.filter(
+        subject_identifier__in=set(subject_identifiers)).values_list(
+            'subject_identifier', 'registration_status'))
 
 
 class EligibileMemberHelper:
 
     def __init__(self, cloned=None, study_resident=None, survival_status=None,
                  subject_identifier=None, inability_to_participate=None,
-                 age_in_years=None, **kwargs):
+                 age_in_years=None, registration_statuses=None, **kwargs):
         self.subject_identifier = subject_identifier
         self.cloned = cloned
         self.study_resident = study_resident
         self.survival_status = survival_status
         self.inability_to_participate = inability_to_participate
         self.age_in_years = age_in_years
+        self.registration_statuses = registration_statuses
+
+    @classmethod
+    def eligible_members(cls, household_members, registration_statuses=None):
+        """Returns a list of `is_eligible_member` values, one per
+        household member.
+
+        If not provided, registration_statuses, a dictionary of
+        {subject_identifier: registration_status}, is fetched in one
+        query for members where it is needed.
+        """
+        household_members = list(household_members)
+        if registration_statuses is None:
+            registration_statuses = get_registration_statuses(
+                [obj.subject_identifier for obj in household_members
+                 if obj.age_in_years is not None and obj.age_in_years > 64])
+        return [
+            cls(registration_statuses=registration_statuses,
+                **obj.__dict__).is_eligible_member
+            for obj in household_members]
 
     @property
+    def previously_consented(self):
+        """Returns True if the member's RegisteredSubject is consented.
+        """
+        if self.registration_statuses is not None:
+            registration_status = self.registration_statuses.get(
+                self.subject_identifier)
+        else:
+            try:
+                registration_status = RegisteredSubject.objects.get(
+                    subject_identifier=self.subject_identifier).registration_status
+            except RegisteredSubject.DoesNotExist:
+                registration_status = None
+        return registration_status == CONSENTED
+
+    @property
+    @instrumented
     def is_eligible_member(self):
         """Returns True if member is eligible to complete the enrollment
         checklist.
@@ -24,26 +70,8 @@ class EligibileMemberHelper:
         Note: once a member is enrolled to the study their residency
         is no longer a factor to determine eligibility for subsequent
         enrollments.
+
+        See `member_rules`. Registration status is only looked up if
+        the member is otherwise eligible but older than 64.
         """
-        if self.survival_status != ALIVE:
-            return False
-        is_study_resident = (
-            (not self.cloned and self.study_resident == YES)
-            or (self.cloned and self.study_resident in [YES, NO, NOT_APPLICABLE])
-        )
-
-        previously_consented = False
-        try:
-            registered_subject = RegisteredSubject.objects.get(
-                subject_identifier=self.subject_identifier)
-        except RegisteredSubject.DoesNotExist:
-            pass
-        else:
-            if registered_subject.registration_status == CONSENTED:
-                previously_consented = True
-
-        return (
-            self.age_in_years >= 16
-            and (self.age_in_years <= 64 or previously_consented)
-            and is_study_resident
-            and self.inability_to_participate in [ABLE_TO_PARTICIPATE, NOT_APPLICABLE])
+        return member_rules.none_apply(self)
@@ -0,0 +1,102 @@
+from django.apps import apps as django_apps
+from django.db.models import Exists, OuterRef
+
+from edc_constants.constants import ALIVE, CONSENTED, NO, NOT_APPLICABLE, YES
+
+from .constants import ABLE_TO_PARTICIPATE, BLOCK_PARTICIPATION
+from .site_eligibility_rules import Rule, RuleSet, site_eligibility_rules
+
+MIN_AGE = 16
+ADULT_AGE = 18
+MAX_AGE = 64
+
+minor = [('age_in_years', 'gte', MIN_AGE), ('age_in_years', 'lt', ADULT_AGE)]
+
+
+def previously_consented():
+    RegisteredSubject = django_apps.get_model('edc_registration', 'registeredsubject')
+    return Exists(RegisteredSubject.objects.filter(
+        subject_identifier=OuterRef('subject_identifier'),
+        registration_status=CONSENTED))
+
+
+# AgeHelper
+age_rules = RuleSet(
+    'age',
+    rules=[
+        Rule('child', [('age_in_years', 'lt', MIN_AGE)]),
+        Rule('minor', minor),
+        Rule('adult', [('age_in_years', 'gte', ADULT_AGE)]),
+        Rule('age_eligible', [
+            ('age_in_years', 'gte', MIN_AGE), ('age_in_years', 'lte', MAX_AGE)])])
+
+# EligibileMemberHelper, household member is not eligible to
+# complete the enrollment checklist. Once enrolled, residency is
+# no longer a factor (cloned). previously_consented is last so
+# the registration status is only looked up if needed.
+member_rules = RuleSet(
+    'member',
+    rules=[
+        Rule('not_alive', [('survival_status', 'ne', ALIVE)]),
+        Rule('under_age', [('age_in_years', 'lt', MIN_AGE)]),
+        Rule('not_study_resident', any_of=[
+            [('cloned', 'ne', True), ('study_resident', 'ne', YES)],
+            [('cloned', 'exact', True),
+             ('study_resident', 'not_in', [YES, NO, NOT_APPLICABLE])]]),
+        Rule('unable_to_participate', [
+            ('inability_to_participate', 'not_in',
+             [ABLE_TO_PARTICIPATE, NOT_APPLICABLE])]),
+        Rule('over_age', [
+            ('age_in_years', 'gt', MAX_AGE),
+            ('previously_consented', 'exact', False)])],
+    annotations={'previously_consented': previously_consented})
+
+# EnrollmentChecklist loss reasons. age_in_years and cloned are
+# from the household member.
+enrollment_rules = RuleSet(
+    'enrollment',
+    rules=[
+        Rule('no_identity', [('has_identity', 'exact', NO)],
+             reason='No valid identity.'),
+        Rule('household_residency', [
+            ('household_residency', 'exact', NO), ('cloned', 'ne', True)],
+            reason='Failed household residency requirement'),
+        Rule('part_time_resident', [
+            ('part_time_resident', 'exact', NO), ('cloned', 'ne', True)],
+            reason='Does not spend 3 or more nights per month in the community.'),
+        Rule('not_citizen', [
+            ('citizen', 'exact', NO), ('legal_marriage', 'exact', NO)],
+            reason='Not a citizen and not married to a citizen.',
+            flags=['non_citizen']),
+        Rule('no_marriage_certificate', [
+            ('citizen', 'exact', NO), ('legal_marriage', 'exact', YES),
+            ('marriage_certificate', 'exact', NO)],
+            reason=('Not a citizen, married to a citizen but does not '
+                    'have a marriage certificate.'),
+            flags=['non_citizen']),
+        Rule('illiterate', [('literacy', 'exact', NO)],
+             reason='Illiterate with no literate witness.'),
+        Rule('minor_without_guardian', minor + [('guardian', 'ne', YES)],
+             reason='Minor without guardian available.'),
+        Rule('already_enrolled', [
+            ('confirm_participation', 'exact', BLOCK_PARTICIPATION)],
+            reason='Already enrolled.')],
+    field_names={
+        'age_in_years': 'household_member__age_in_years',
+        'cloned': 'household_member__cloned'})
+
+# EnrollmentChecklistAnonymous
+anonymous_enrollment_rules = RuleSet(
+    'anonymous_enrollment',
+    rules=[
+        Rule('under_age', [('age_in_years', 'lt', MIN_AGE)],
+             reason='Subject is a child.'),
+        Rule('minor_without_guardian', minor + [('guardian', 'ne', YES)],
+             reason='Minor without guardian available.'),
+        Rule('part_time_resident', [('part_time_resident', 'exact', NO)],
+             reason='Does not spend 3 or more nights per month in the community.'),
+        Rule('illiterate', [('literacy', 'exact', NO)],
+             reason='Illiterate with no literate witness.')])
+
+for rule_set in [age_rules, member_rules, enrollment_rules, anonymous_enrollment_rules]:
+    site_eligibility_rules.register(rule_set)
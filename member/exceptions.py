@@ -25,3 +25,7 @@ class DuplicateReportError(Exception):
 
 class CloneError(Exception):
     pass
+
+
+class EligibilityRuleError(Exception):
+    pass
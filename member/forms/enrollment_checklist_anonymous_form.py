@@ -8,11 +8,11 @@ from edc_constants.constants import YES, ALIVE, MALE, NO
 
 from household.models.household_structure import HouseholdStructure
 from member.models import HouseholdMember
-from plot.utils import get_anonymous_plot
 
 from ..models import EnrollmentChecklistAnonymous
 from ..constants import ABLE_TO_PARTICIPATE
 from ..age_helper import AgeHelper
+from ..utils import get_anonymous_plot_pk
 
 fake = Faker()
 
@@ -54,9 +54,8 @@ class EnrollmentChecklistAnonymousForm(forms.ModelForm):
     def get_anonymous_member(self):
         current_survey_schedule = django_apps.get_app_config(
             'survey').current_survey_schedule
-        plot = get_anonymous_plot()
         household_structure = HouseholdStructure.objects.get(
-            household__plot=plot,
+            household__plot=get_anonymous_plot_pk(),
             survey_schedule=current_survey_schedule)
         if self.cleaned_data.get('gender') == MALE:
             first_name = fake.first_name_male().upper()
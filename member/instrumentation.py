@@ -0,0 +1,148 @@
+import threading
+import time
+
+from bisect import bisect_left
+from functools import wraps
+
+from django.db import connection
+
+# upper bounds, in milliseconds, of the duration histogram buckets
+duration_buckets = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000]
+
+# upper bounds of the query count histogram buckets
+query_buckets = [0, 1, 2, 5, 10, 20, 50, 100, 200]
+
+
+class Histogram:
+
+    """Counts values per bucket, the last bucket is unbounded.
+    """
+
+    def __init__(self, buckets=None):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0
+        self.max = 0
+
+    def add(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def to_dict(self):
+        labels = [f'<={bucket}' for bucket in self.buckets] + [f'>{self.buckets[-1]}']
+        return dict(
+            total=round(self.total, 3), max=round(self.max, 3),
+            buckets={label: count for label, count in zip(labels, self.counts) if count})
+
+
+class Timing:
+
+    """The calls, duration and query count histograms of one
+    instrumented function.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.duration = Histogram(duration_buckets)
+        self.queries = Histogram(query_buckets)
+
+    def to_dict(self):
+        return dict(
+            calls=self.calls, errors=self.errors,
+            mean_ms=round(self.duration.total / self.calls, 3) if self.calls else 0,
+            mean_queries=round(self.queries.total / self.calls, 3) if self.calls else 0,
+            duration_ms=self.duration.to_dict(),
+            queries=self.queries.to_dict())
+
+
+class QueryCounter:
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class SiteInstrumentation:
+
+    """Per-process timings of the instrumented model saves,
+    common_clean and signal receivers.
+
+    Disabled by default, see `instrument` on the member AppConfig.
+    When disabled an instrumented call costs one attribute lookup.
+    Durations and query counts include those of nested instrumented
+    calls.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.timings = {}
+        self.lock = threading.Lock()
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def reset(self):
+        with self.lock:
+            self.timings = {}
+
+    def record(self, name, seconds, queries, error=False):
+        with self.lock:
+            try:
+                timing = self.timings[name]
+            except KeyError:
+                timing = self.timings[name] = Timing()
+            timing.calls += 1
+            timing.errors += int(error)
+            timing.duration.add(seconds * 1000)
+            timing.queries.add(queries)
+
+    def summary(self):
+        """Returns a dictionary of timings by name, slowest total first.
+        """
+        with self.lock:
+            timings = sorted(
+                self.timings.items(), key=lambda item: -item[1].duration.total)
+            return {name: timing.to_dict() for name, timing in timings}
+
+
+site_instrumentation = SiteInstrumentation()
+
+
+def instrumented(function=None, name=None):
+    """Decorates a function, e.g. a save, common_clean or signal
+    receiver, to record its duration and query count in
+    `site_instrumentation` if enabled.
+
+    The name defaults to the function's module and qualified name.
+    """
+    def decorator(function):
+        label = name or f'{function.__module__}.{function.__qualname__}'
+
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            if not site_instrumentation.enabled:
+                return function(*args, **kwargs)
+            counter = QueryCounter()
+            error = True
+            start = time.perf_counter()
+            try:
+                with connection.execute_wrapper(counter):
+                    result = function(*args, **kwargs)
+                error = False
+                return result
+            finally:
+                site_instrumentation.record(
+                    label, time.perf_counter() - start, counter.count, error=error)
+        return wrapper
+
+    if function is None:
+        return decorator
+    return decorator(function)
@@ -0,0 +1,73 @@
+from types import SimpleNamespace
+
+from .eligibility_rules import enrollment_rules
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# enrollment checklist values used to determine eligibility, see
+# `enrollment_rules`.
+loss_reason_fields = [
+    'has_identity', 'household_residency', 'part_time_resident', 'citizen',
+    'legal_marriage', 'marriage_certificate', 'literacy', 'guardian',
+    'confirm_participation']
+
+
+def get_loss_reasons(age_in_years=None, cloned=None, **values):
+    """Returns a tuple of (list of loss reasons, non_citizen) for the
+    enrollment checklist values of one member.
+
+    `age_in_years` and `cloned` are from the household member.
+    """
+    obj = SimpleNamespace(
+        age_in_years=age_in_years, cloned=bool(cloned),
+        **{field: values.get(field) for field in loss_reason_fields})
+    rules = enrollment_rules.applied(obj)
+    return ([rule.reason for rule in rules],
+            any('non_citizen' in rule.flags for rule in rules))
+
+
+def evaluate_rows(rows):
+    """Returns a list of (is_eligible, loss_reason) for a list of
+    dictionaries of enrollment checklist values, `age_in_years`
+    and, optionally, `cloned`.
+
+    loss_reason is pipe-joined as on the EnrollmentChecklist or None.
+    """
+    results = []
+    for row in rows:
+        reasons, _ = get_loss_reasons(**row)
+        results.append(
+            (False, '|'.join(reasons)) if reasons else (True, None))
+    return results
+
+
+def evaluate_arrays(columns):
+    """Returns a tuple of NumPy arrays (is_eligible, loss_reason,
+    non_citizen) for a dictionary of equal length arrays.
+
+    Each row's reasons are encoded as a bitmask so each distinct
+    combination is joined into a loss_reason string only once.
+    """
+    if np is None:
+        raise ImportError('evaluate_arrays requires numpy.')
+    columns = {
+        column: np.asarray(values) for column, values in columns.items()}
+    size = len(columns['age_in_years'])
+    columns.setdefault('cloned', np.zeros(size, dtype=bool))
+    codes = np.zeros(size, dtype=np.int64)
+    non_citizen = np.zeros(size, dtype=bool)
+    rules = list(enrollment_rules)
+    for bit, rule in enumerate(rules):
+        mask = rule.mask(columns)
+        codes |= mask.astype(np.int64) << bit
+        if 'non_citizen' in rule.flags:
+            non_citizen |= mask
+    unique_codes, inverse = np.unique(codes, return_inverse=True)
+    joined = np.array([
+        '|'.join(rule.reason for bit, rule in enumerate(rules)
+                 if code & (1 << bit)) or None
+        for code in unique_codes], dtype=object)
+    return codes == 0, joined[inverse], non_citizen
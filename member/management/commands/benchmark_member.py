@@ -0,0 +1,68 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from ...tests.hot_paths import (
+    benchmarks, compare_results, default_tolerance, run_benchmarks)
+
+
+class Command(BaseCommand):
+
+    help = ('Benchmark the query count and wall time of the member hot paths '
+            'on synthetic households in a test database.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', type=int, nargs='+', default=[10, 100, 1000],
+            help='household sizes, in members')
+        parser.add_argument(
+            '--repeat', type=int, default=3,
+            help='runs per benchmark, the fastest is kept')
+        parser.add_argument(
+            '--benchmark', type=str, nargs='+', default=None,
+            help=f'benchmarks to run. One or more of {list(benchmarks)}')
+        parser.add_argument(
+            '--output', type=str, default=None,
+            help='path of a JSON file to write the results to, e.g. the baseline')
+        parser.add_argument(
+            '--compare', type=str, default=None,
+            help='path of a JSON baseline to compare the results to')
+        parser.add_argument(
+            '--tolerance', type=float, default=default_tolerance,
+            help='fraction a benchmark may be slower than its baseline')
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options['compare']:
+            with open(options['compare']) as f:
+                baseline = json.load(f)
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, serialize=False)
+        try:
+            results = run_benchmarks(
+                sizes=options['sizes'], repeat=options['repeat'],
+                names=options['benchmark'])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+        for key, result in results.items():
+            if 'skipped' in result:
+                self.stdout.write(f'{key}: skipped, {result["skipped"]}')
+            else:
+                self.stdout.write(
+                    f'{key}: {result["queries"]} queries, {result["seconds"]:.4f}s')
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(results, f, indent=2, sort_keys=True)
+        if baseline is not None:
+            regressions = compare_results(
+                results, baseline, tolerance=options['tolerance'])
+            if regressions:
+                raise CommandError(
+                    'Regressions against {}:\n{}'.format(
+                        options['compare'], '\n'.join(regressions)))
+            self.stdout.write(self.style.SUCCESS(
+                f'No regressions against {options["compare"]}.'))
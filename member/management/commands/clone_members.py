@@ -0,0 +1,63 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from household.models import HouseholdStructure
+
+from ..progress import ProgressReporter, add_progress_arguments
+from ...bulk_clone import bulk_clone_members, get_members_to_clone
+
+
+class Command(BaseCommand):
+
+    help = ('Clone the household members of a map area from the previous '
+            'survey schedule into the household structures of the next. '
+            'Safe to re-run after an interruption.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'previous_survey_schedule', type=str,
+            help='survey_schedule field value to clone from')
+        parser.add_argument(
+            'survey_schedule', type=str,
+            help='survey_schedule field value to clone into')
+        parser.add_argument(
+            '--map_area', type=str, default=None, help='map_area')
+        parser.add_argument(
+            '--user_created', type=str, default=None, help='username')
+        parser.add_argument(
+            '--chunk_size', type=int, default=500,
+            help='number of household members per transaction')
+        parser.add_argument(
+            '--dry_run', action='store_true', default=False,
+            help='count the members to clone, do not clone')
+        add_progress_arguments(parser)
+
+    def handle(self, *args, **options):
+        household_structures = HouseholdStructure.objects.filter(
+            survey_schedule=options['survey_schedule'])
+        if options['map_area']:
+            household_structures = household_structures.filter(
+                household__plot__map_area=options['map_area'])
+        if not household_structures.exists():
+            raise CommandError(
+                f'No household structures found for survey schedule '
+                f'{options["survey_schedule"]}.')
+        if options['dry_run']:
+            count = get_members_to_clone(
+                household_structures, options['previous_survey_schedule']).count()
+            self.stdout.write(self.style.WARNING(
+                f'{count} members to clone. Dry run. Nothing saved.'))
+            return
+        reporter = ProgressReporter.from_options(self, options, label='members')
+        cloned, skipped = bulk_clone_members(
+            household_structures=household_structures,
+            previous_survey_schedule=options['previous_survey_schedule'],
+            user_created=options['user_created'],
+            chunk_size=options['chunk_size'],
+            reporter=reporter)
+        if skipped:
+            reporter.finish(
+                f'Cloned {cloned} members. Skipped {len(skipped)} household '
+                f'structures not ready for enumeration, re-run to clone them.',
+                style=self.style.WARNING)
+        else:
+            reporter.finish(f'Cloned {cloned} members.', style=self.style.SUCCESS)
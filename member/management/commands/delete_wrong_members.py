@@ -1,84 +1,154 @@
 from datetime import datetime
-from django.core.management.base import BaseCommand
+from django.db import transaction
 
 from edc_map.models import InnerContainer
 from edc_sync.models import OutgoingTransaction
+from ..partitioned import PartitionedCommand
+from ..progress import ProgressReporter
+from ...member_updates import suspend_member_updates
 from ...models import (
-    HouseholdMember, HouseholdHeadEligibility, EnrollmentChecklist,
+    HouseholdMember, HouseholdHeadEligibility, EnrollmentChecklist, EnrollmentLoss,
     AbsentMember, DeceasedMember, HtcMember, MovedMember, RefusedMember, UndecidedMember)
+from ...utils import chunked
 from bcpp_subject.models import Appointment, SubjectVisit, SubjectConsent
 from household.exceptions import HouseholdLogRequired
 from django.core.exceptions import ValidationError
 from django.conf import settings
 
+# deleted in this order, per batch of members
+dependent_models = [
+    HouseholdHeadEligibility, AbsentMember, DeceasedMember, MovedMember,
+    HtcMember, RefusedMember, UndecidedMember, EnrollmentChecklist,
+    EnrollmentLoss]
 
-def delete_household_members(
-        map_area=None, survey_schedule=None, consent_version=None):
-    plot_identifiers = None
+# members with a remaining report for these are not deleted
+blocking_models = [AbsentMember]
+
+
+def get_members_to_delete(household_members=None, consent_version=None, batch_size=None):
+    """Returns a tuple of (consented count, list of pks of members
+    not consented by household_member or subject_identifier).
+    """
+    members = dict(household_members.values_list('pk', 'subject_identifier'))
+    consented_members = set()
+    consented_identifiers = set()
+    for pks in chunked(list(members), batch_size):
+        consented_members.update(SubjectConsent.objects.filter(
+            version=consent_version, household_member__in=pks).values_list(
+                'household_member', flat=True))
+    for subject_identifiers in chunked(set(members.values()), batch_size):
+        consented_identifiers.update(SubjectConsent.objects.filter(
+            version=consent_version,
+            subject_identifier__in=subject_identifiers).values_list(
+                'subject_identifier', flat=True))
+    members_to_delete = [
+        pk for pk, subject_identifier in members.items()
+        if pk not in consented_members
+        and subject_identifier not in consented_identifiers]
+    return len(members) - len(members_to_delete), members_to_delete
+
+
+def delete_reports(pks=None):
+    """Deletes the dependent reports of the given members and returns
+    a dictionary of deleted counts by model label.
+
+    The member updates of the report signals are skipped as the
+    members are deleted next.
+    """
+    deleted = {}
+    with suspend_member_updates():
+        for model in dependent_models:
+            for label, count in model.objects.filter(
+                    household_member__in=pks).delete()[1].items():
+                deleted[label] = deleted.get(label, 0) + count
+    return deleted
+
+
+def delete_batch(pks=None, dry_run=None, reporter=None):
+    """Deletes the dependent reports then the members of one batch in
+    a single transaction.
+
+    If deleting the reports of the batch fails, deletes the reports
+    one member at a time. A member whose reports cannot all be
+    deleted is kept with all of its reports.
+
+    Returns a dictionary of deleted (or, if dry_run, matching) counts
+    by model label.
+    """
+    counts = {}
+
+    def add(values):
+        for label, count in values.items():
+            counts[label] = counts.get(label, 0) + count
+
+    if dry_run:
+        for model in dependent_models + [Appointment, SubjectVisit]:
+            add({model._meta.label: model.objects.filter(
+                household_member__in=pks).count()})
+        add({HouseholdMember._meta.label: len(pks)})
+        return counts
+    failed = set()
+    with transaction.atomic():
+        try:
+            with transaction.atomic():
+                add(delete_reports(pks=pks))
+        except (HouseholdLogRequired, TypeError):
+            for pk in pks:
+                try:
+                    with transaction.atomic():
+                        add(delete_reports(pks=[pk]))
+                except (HouseholdLogRequired, TypeError) as e:
+                    failed.add(pk)
+                    if reporter:
+                        reporter.row(
+                            f'Failed to delete the reports of household member '
+                            f'{pk}. Got {e}')
+        for model in blocking_models:
+            failed.update(model.objects.filter(
+                household_member__in=pks).values_list('household_member', flat=True))
+        pks = [pk for pk in pks if pk not in failed]
+        for model in [Appointment, SubjectVisit]:
+            add(model.objects.filter(household_member__in=pks).delete()[1])
+        add(HouseholdMember.objects.filter(pk__in=pks).delete()[1])
+    return counts
+
+
+def get_plot_identifiers(map_area=None):
+    """Returns the plot identifiers sectioned for this machine.
+    """
     try:
         inner_container = InnerContainer.objects.get(
             device_id=settings.DEVICE_ID, map_area=map_area)
     except InnerContainer.DoesNotExist:
         raise ValidationError("There are no plots sectioned for this machine.")
-    else:
-        plot_identifiers = inner_container.identifier_labels
+    return inner_container.identifier_labels
 
+
+def delete_household_members(
+        map_area=None, survey_schedule=None, consent_version=None,
+        dry_run=None, batch_size=None, plot_identifiers=None, verbosity=None):
+    """Deletes the cloned members not consented of the plots, by
+    default all plots sectioned for this machine, and returns a
+    dictionary of deleted counts by model label and the consented
+    count.
+    """
+    batch_size = batch_size or 500
+    if plot_identifiers is None:
+        plot_identifiers = get_plot_identifiers(map_area=map_area)
     household_members = HouseholdMember.objects.filter(
         household_structure__household__plot__map_area=map_area,
         household_structure__household__plot__plot_identifier__in=plot_identifiers,
         survey_schedule=survey_schedule, cloned=True)
-    count = 0
-    not_household_members = []
-    consented = 0
-    for household_member in household_members:
-        try:
-            SubjectConsent.objects.get(
-                version=consent_version, household_member=household_member)
-            consented += 1
-        except SubjectConsent.DoesNotExist:
-            try:
-                SubjectConsent.objects.get(
-                    version=consent_version, subject_identifier=household_member.subject_identifier)
-                consented += 1
-            except SubjectConsent.DoesNotExist:
-                not_household_members.append(household_member)
-    print(f'consented: {consented}')
-    members_to_delete = len(not_household_members)
-    for household_member in not_household_members:
-        HouseholdHeadEligibility.objects.filter(
-            household_member=household_member).delete()
-        try:
-            AbsentMember.objects.filter(
-                household_member=household_member).delete()
-        except HouseholdLogRequired:
-            print(
-                f'Failed because of HouseholdLogRequired for {household_member}, {household_member.subject_identifier}')
-        DeceasedMember.objects.filter(
-            household_member=household_member).delete()
-        MovedMember.objects.filter(
-            household_member=household_member).delete()
-        HtcMember.objects.filter(
-            household_member=household_member).delete()
-        RefusedMember.objects.filter(
-            household_member=household_member).delete()
-        UndecidedMember.objects.filter(
-            household_member=household_member).delete()
-        try:
-            EnrollmentChecklist.objects.filter(
-                household_member=household_member).delete()
-        except TypeError:
-            print(
-                f'Failed to delete enrollment checklist for {household_member}, {household_member.subject_identifier}')
-        else:
-            if not AbsentMember.objects.filter(
-                    household_member=household_member):
-                Appointment.objects.filter(
-                    household_member=household_member).delete()
-                SubjectVisit.objects.filter(
-                    household_member=household_member).delete()
-                household_member.delete()
-        count += 1
-        print(f'Succefully deleted {household_member}. {count} out of {members_to_delete}')
+    consented, members_to_delete = get_members_to_delete(
+        household_members=household_members, consent_version=consent_version,
+        batch_size=batch_size)
+    reporter = ProgressReporter(verbosity=verbosity)
+    counts = dict(consented=consented)
+    for pks in chunked(members_to_delete, batch_size):
+        for label, count in delete_batch(
+                pks=pks, dry_run=dry_run, reporter=reporter).items():
+            counts[label] = counts.get(label, 0) + count
+    return counts
 
 
 def ignore_delete_transactions():
@@ -87,24 +157,52 @@ def ignore_delete_transactions():
             is_ignored=True, is_consumed_server=True)
 
 
-class Command(BaseCommand):
+class Command(PartitionedCommand):
 
     help = 'Delete year 3 system cloned members'
 
     def add_arguments(self, parser):
+        super().add_arguments(parser)
         parser.add_argument('map_area', type=str, help='map_area')
         parser.add_argument(
             'survey_schedule', type=str, help='survey_schedule')
         parser.add_argument(
             'consent_version', type=str, help='consent_version')
+        parser.add_argument(
+            '--dry_run', action='store_true', default=False,
+            help='report counts per model without deleting')
+        parser.add_argument(
+            '--batch_size', type=int, default=500,
+            help='number of members deleted per transaction')
 
     def handle(self, *args, **options):
         map_area = options['map_area']
         survey_schedule = options['survey_schedule']
         consent_version = options['consent_version']
+        dry_run = options['dry_run']
 
-        delete_household_members(
+        kwargs = dict(
             map_area=map_area, survey_schedule=survey_schedule,
-            consent_version=consent_version)
-        ignore_delete_transactions()
-        self.stdout.write(self.style.SUCCESS('Succefully deleted members.'))
+            consent_version=consent_version, dry_run=dry_run,
+            batch_size=options['batch_size'], verbosity=options['verbosity'])
+        reporter = ProgressReporter.from_options(self, options, label='plots')
+        counts = self.run_partitions(
+            delete_household_members,
+            get_plot_identifiers(map_area=map_area),
+            lambda plot_identifiers: dict(
+                kwargs, plot_identifiers=plot_identifiers),
+            options, signature=dict(
+                command='delete_wrong_members', map_area=map_area,
+                survey_schedule=survey_schedule,
+                consent_version=consent_version),
+            checkpoint=not dry_run, reporter=reporter)
+        consented = counts.pop('consented', 0)
+        if dry_run:
+            reporter.finish(
+                f'Dry run. Nothing deleted. {consented} consented members '
+                'kept. Would delete:', style=self.style.WARNING, totals=counts)
+        else:
+            ignore_delete_transactions()
+            reporter.finish(
+                f'Succefully deleted members. {consented} consented members '
+                'kept. Deleted:', style=self.style.SUCCESS, totals=counts)
@@ -0,0 +1,42 @@
+import json
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+
+from ...instrumentation import site_instrumentation
+
+
+class Command(BaseCommand):
+
+    help = ('Run a management command with member instrumentation enabled '
+            'and write the timings of saves, common_clean and signal '
+            'receivers, for example: instrument_member update_member_status '
+            '-- --map_area test_community')
+
+    def add_arguments(self, parser):
+        parser.add_argument('command_name', type=str, help='command to run')
+        parser.add_argument(
+            'command_args', nargs='*', help='arguments of the command')
+        parser.add_argument(
+            '--output', type=str, default=None,
+            help='path of a JSON file to write the timings to')
+
+    def handle(self, *args, **options):
+        enabled = site_instrumentation.enabled
+        site_instrumentation.reset()
+        site_instrumentation.enable()
+        try:
+            call_command(options['command_name'], *options['command_args'])
+        finally:
+            if not enabled:
+                site_instrumentation.disable()
+        summary = site_instrumentation.summary()
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(summary, f, indent=2)
+        for name, timing in summary.items():
+            self.stdout.write(
+                f'{name}: {timing["calls"]} calls, '
+                f'{timing["duration_ms"]["total"]:.1f}ms total, '
+                f'{timing["mean_ms"]:.2f}ms mean, '
+                f'{timing["mean_queries"]:.1f} queries mean')
@@ -1,111 +1,276 @@
-from edc_base.utils import get_utcnow
+import csv
+import json
+import os
+import tempfile
+
 from django.apps import apps as django_apps
-from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+from django.db import transaction
+from django.db.models import F, Q
 
+from edc_base.utils import get_utcnow
 from edc_constants.constants import YES
 from household.constants import ELIGIBLE_REPRESENTATIVE_PRESENT
-from household.models import HouseholdLogEntry, HouseholdStructure
+from household.models import HouseholdLogEntry
+from member.bulk_audit import emit_audit_records
 from member.models import HouseholdMember, RepresentativeEligibility
-from django.core.exceptions import ValidationError
+from member.participation_status import update_member_statuses
+from member.utils import chunked
+
+from ..partitioned import PartitionedCommand
+from ..progress import ProgressReporter
+
+survey_schedules = {
+    'T1': 'bcpp-survey.bcpp-year-2',
+    'T2': 'bcpp-survey.bcpp-year-3'}
+
+# models that may be bulk created and the member flags their
+# post_save signal would have set.
+member_updates = {
+    'member.movedmember': dict(moved=True),
+    'member.deceasedmember': {}}
+
+
+def read_rows(file_path=None):
+    """Yields a tuple of (survey_schedule, data) per CSV row.
+
+    The first three columns are ignored.
+    """
+    survey_schedule = None
+    with open(file_path, newline='') as csvfile:
+        reader = csv.reader(csvfile)
+        fields = [field.strip() for field in next(reader)][3:]
+        for row in reader:
+            data = dict(zip(fields, [value.strip() for value in row[3:]]))
+            survey_schedule = survey_schedules.get(
+                data.get('time_point'), survey_schedule)
+            yield survey_schedule, data
+
+
+class Importer:
+
+    """Imports rows into model_cls one chunk at a time.
+
+    Per-row messages are written by `reporter` at verbosity 2.
+    """
+
+    def __init__(self, model_cls=None, reporter=None):
+        self.model_cls = model_cls
+        self.member_updates = member_updates[model_cls._meta.label_lower]
+        self.reporter = reporter or ProgressReporter()
+        self.created = 0
+        self.existing = 0
+        self.missing = 0
+
+    def get_household_members(self, rows):
+        """Returns a dictionary of {(subject_identifier, survey_schedule):
+        household_member} for the rows of the chunk in one query.
+        """
+        schedules = {survey_schedule for survey_schedule, _ in rows}
+        q = Q()
+        for survey_schedule in schedules:
+            q |= Q(survey_schedule__icontains=survey_schedule)
+        household_members = {}
+        for household_member in HouseholdMember.objects.filter(
+                q, subject_identifier__in=[
+                    data.get('subject_identifier') for _, data in rows]).select_related(
+                        'household_structure__householdlog'):
+            for survey_schedule in schedules:
+                if survey_schedule.lower() in household_member.survey_schedule.lower():
+                    household_members.setdefault(
+                        (household_member.subject_identifier, survey_schedule),
+                        household_member)
+        return household_members
+
+    def import_chunk(self, rows):
+        """Creates missing model instances, log entries and
+        representative eligibilities for the chunk in one transaction.
 
+        As bulk_create and update skip save(), the historical records
+        and outgoing transactions of the created rows and the updated
+        household members are created in bulk.
+        """
+        report_datetime = get_utcnow()
+        household_members = self.get_household_members(rows)
+        existing = set(self.model_cls.objects.filter(
+            household_member__in=[obj.pk for obj in household_members.values()]).values_list(
+                'household_member', flat=True))
+        household_structures = {
+            obj.household_structure_id: obj.household_structure
+            for obj in household_members.values()}
+        log_entries = set(HouseholdLogEntry.objects.filter(
+            report_datetime__date=report_datetime.date(),
+            household_log__household_structure__in=list(household_structures),
+            household_status=ELIGIBLE_REPRESENTATIVE_PRESENT).values_list(
+                'household_log__household_structure', flat=True))
+        representative_eligibilities = set(RepresentativeEligibility.objects.filter(
+            household_structure__in=list(household_structures)).values_list(
+                'household_structure', flat=True))
+        objs = []
+        for survey_schedule, data in rows:
+            subject_identifier = data.get('subject_identifier')
+            try:
+                household_member = household_members[
+                    (subject_identifier, survey_schedule)]
+            except KeyError:
+                self.missing += 1
+                self.reporter.row(
+                    'Household Member for the subject identifier '
+                    f'{subject_identifier} may be missing. Check if the member '
+                    'is imported')
+                continue
+            if household_member.pk in existing:
+                self.existing += 1
+                self.reporter.row(
+                    f'Already exists {household_member}.',
+                    style=self.reporter.style.WARNING)
+                continue
+            existing.add(household_member.pk)
+            for key in ['subject_identifier', 'time_point', 'created', 'revision']:
+                data.pop(key, None)
+            objs.append(self.model_cls(
+                report_datetime=report_datetime,
+                household_member=household_member,
+                survey_schedule=household_member.survey_schedule,
+                **data))
+        new_log_entries = [
+            HouseholdLogEntry(
+                report_datetime=report_datetime,
+                household_log=household_structure.householdlog,
+                household_status=ELIGIBLE_REPRESENTATIVE_PRESENT)
+            for pk, household_structure in household_structures.items()
+            if pk not in log_entries]
+        new_representative_eligibilities = [
+            RepresentativeEligibility(
+                household_structure=household_structure,
+                survey_schedule=household_structure.survey_schedule,
+                report_datetime=report_datetime,
+                aged_over_18=YES,
+                household_residency=YES,
+                verbal_script=YES)
+            for pk, household_structure in household_structures.items()
+            if pk not in representative_eligibilities]
+        with transaction.atomic():
+            HouseholdLogEntry.objects.bulk_create(new_log_entries)
+            RepresentativeEligibility.objects.bulk_create(
+                new_representative_eligibilities)
+            self.model_cls.objects.bulk_create(objs)
+            for instances in [new_log_entries, new_representative_eligibilities, objs]:
+                emit_audit_records(instances, created=True)
+            household_member_ids = [obj.household_member_id for obj in objs]
+            household_members = HouseholdMember.objects.filter(
+                pk__in=household_member_ids)
+            household_members.update(
+                visit_attempts=F('visit_attempts') + 1, **self.member_updates)
+            update_member_statuses(household_members=household_members)
+            emit_audit_records(household_members, created=False)
+        self.created += len(objs)
+        return len(objs)
+
+
+def get_plot_identifiers(rows):
+    """Returns a dictionary of {subject_identifier: plot_identifier}
+    for the rows of a chunk in one query.
+    """
+    return dict(HouseholdMember.objects.filter(
+        subject_identifier__in={data.get('subject_identifier') for _, data in rows}
+    ).values_list(
+        'subject_identifier',
+        'household_structure__household__plot__plot_identifier'))
+
+
+def spool_rows(rows=None, spool_dir=None, chunk_size=None):
+    """Streams rows into one JSON lines file per plot in spool_dir,
+    resolving the plots of each chunk in one query, and returns a
+    dictionary of {plot_identifier: path}.
+
+    Rows without a member are spooled under an empty plot identifier
+    and counted as missing by the importer.
+    """
+    paths = {}
+    for chunk in chunked(rows, chunk_size or 1000):
+        plot_identifiers = get_plot_identifiers(chunk)
+        rows_by_plot = {}
+        for survey_schedule, data in chunk:
+            rows_by_plot.setdefault(
+                plot_identifiers.get(data.get('subject_identifier'), ''),
+                []).append([survey_schedule, data])
+        for plot_identifier, plot_rows in rows_by_plot.items():
+            if plot_identifier not in paths:
+                paths[plot_identifier] = os.path.join(
+                    spool_dir, f'{len(paths)}.jsonl')
+            with open(paths[plot_identifier], 'a') as f:
+                f.writelines(json.dumps(row) + '\n' for row in plot_rows)
+    return paths
 
-def data_dict(file_path=None):
-    data_list = []
-    with open(file_path) as csvfile:
-        lines = csvfile.readlines()
-        fields = lines[0]
-        fields = fields.strip()
-        fields = fields.split(',')
-        fields = fields[3:]
-        lines.pop(0)
-        for line in lines:
-            line = line.strip()
-            line = line.split(',')
-            line = line[3:]
-            data = dict(zip(fields, line))
-            data_list.append(data)
-    return data_list
 
+def read_spooled_rows(paths=None):
+    """Yields a tuple of (survey_schedule, data) per spooled row.
+    """
+    for path in paths:
+        with open(path) as f:
+            for line in f:
+                survey_schedule, data = json.loads(line)
+                yield survey_schedule, data
 
-class Command(BaseCommand):
+
+def import_rows(model_label_lower=None, paths=None, chunk_size=None, verbosity=None):
+    """Imports the spooled rows of one partition and returns a
+    dictionary of counts.
+    """
+    importer = Importer(
+        model_cls=django_apps.get_model(model_label_lower),
+        reporter=ProgressReporter(verbosity=verbosity))
+    rows = 0
+    for chunk in chunked(read_spooled_rows(paths), chunk_size or 1000):
+        importer.import_chunk(chunk)
+        rows += len(chunk)
+    return dict(
+        rows=rows, created=importer.created,
+        existing=importer.existing, missing=importer.missing)
+
+
+class Command(PartitionedCommand):
 
     help = 'Create moved members or deceased member from a csv.'
 
     def add_arguments(self, parser):
+        super().add_arguments(parser)
         parser.add_argument('file_path', type=str, help='file_path')
         parser.add_argument(
             'model_label_lower', type=str, help='model_label_lower')
+        parser.add_argument(
+            '--chunk_size', type=int, default=1000,
+            help='number of CSV rows per query chunk')
 
     def handle(self, *args, **options):
         file_path = options['file_path']
         model_label_lower = options['model_label_lower']
-        data_list = data_dict(file_path=file_path)
-        app_label, model_name = model_label_lower.split('.')
-        model_cls = django_apps.get_model(app_label, model_name)
-        created_members = 0
-        survey_schedule = None
-        total_to_create = len(data_list)
-        self.stdout.write(
-            self.style.WARNING(f'Total to create {total_to_create} for model {model_cls}.'))
-        for data in data_list:
-            if data.get('time_point') == 'T2':
-                survey_schedule = 'bcpp-survey.bcpp-year-3'
-            elif data.get('time_point') == 'T1':
-                survey_schedule = 'bcpp-survey.bcpp-year-2'
-            subject_identifier = data.get('subject_identifier')
-            try:
-                household_member = HouseholdMember.objects.get(
-                    subject_identifier=subject_identifier,
-                    survey_schedule__icontains=survey_schedule)
-            except HouseholdMember.DoesNotExist:
-                print(
-                    'Household Member for the subject identifier '
-                    f'{subject_identifier} may be missing. Check if the member is imported')
-            else:
-                try:
-                    model_cls.objects.get(household_member=household_member)
-                except model_cls.DoesNotExist:
-                    data.update(
-                        report_datetime=get_utcnow(),
-                        household_member=household_member)
-                    del data['subject_identifier']
-                    del data['time_point']
-                    del data['created']
-                    del data['revision']
-                    try:
-                        household_structure = HouseholdStructure.objects.get(
-                            id=household_member.household_structure.id)
-                    except HouseholdStructure.DoesNotExist:
-                        raise ValidationError(
-                            f'Missing household structure for member {household_member}')
-                    else:
-                        try:
-                            HouseholdLogEntry.objects.get(
-                                report_datetime__date=get_utcnow().date(),
-                                household_log=household_structure.householdlog,
-                                household_status=ELIGIBLE_REPRESENTATIVE_PRESENT)
-                        except:
-                            HouseholdLogEntry.objects.create(
-                                report_datetime=get_utcnow(),
-                                household_log=household_structure.householdlog,
-                                household_status=ELIGIBLE_REPRESENTATIVE_PRESENT)
-                    try:
-                        RepresentativeEligibility.objects.get(
-                            household_structure=household_structure)
-                    except RepresentativeEligibility.DoesNotExist:
-                        RepresentativeEligibility.objects.create(
-                            household_structure=household_structure,
-                            report_datetime=get_utcnow(),
-                            aged_over_18=YES,
-                            household_residency=YES,
-                            verbal_script=YES)
-                    obj = model_cls.objects.create(**data)
-                    obj.save_base(raw=True)
-                    obj = model_cls.objects.get(id=obj.id)
-                    self.stdout.write(
-                        self.style.SUCCESS(f'Successfully created {obj} member data.'))
-                    created_members += 1
-                else:
-                    self.stdout.write(self.style.WARNING(f'Already exists {household_member}.'))
+        if model_label_lower not in member_updates:
+            raise CommandError(
+                f'Invalid model. Expected one of {list(member_updates)}. '
+                f'Got {model_label_lower}.')
+        model_cls = django_apps.get_model(*model_label_lower.split('.'))
         self.stdout.write(
-            self.style.SUCCESS(f'Successfully created {created_members} member data.'))
+            self.style.WARNING(f'Importing {file_path} into model {model_cls}.'))
+        with tempfile.TemporaryDirectory() as spool_dir:
+            paths = spool_rows(
+                rows=read_rows(file_path=file_path), spool_dir=spool_dir,
+                chunk_size=options['chunk_size'])
+            reporter = ProgressReporter.from_options(self, options, label='plots')
+            counts = self.run_partitions(
+                import_rows, paths,
+                lambda keys: dict(
+                    model_label_lower=model_label_lower,
+                    paths=[paths[key] for key in keys],
+                    chunk_size=options['chunk_size'],
+                    verbosity=options['verbosity']),
+                options, signature=dict(
+                    command='load_member_data', file_path=file_path,
+                    model_label_lower=model_label_lower),
+                reporter=reporter)
+        reporter.finish(
+            f'Successfully created {counts.get("created", 0)} member data. '
+            f'{counts.get("existing", 0)} already existed, '
+            f'{counts.get("missing", 0)} members missing.',
+            style=self.style.SUCCESS)
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+
+from ..progress import ProgressReporter, add_progress_arguments
+from ...models import HouseholdMember
+from ...search_index import update_search_tokens
+
+
+class Command(BaseCommand):
+
+    help = 'Rebuild the search token index of household members.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--survey_schedule', type=str, default=None,
+            help='survey_schedule field value')
+        parser.add_argument(
+            '--map_area', type=str, default=None, help='map_area')
+        parser.add_argument(
+            '--chunk_size', type=int, default=1000,
+            help='number of household members per chunk')
+        add_progress_arguments(parser)
+
+    def handle(self, *args, **options):
+        household_members = HouseholdMember.objects.all()
+        if options['survey_schedule']:
+            household_members = household_members.filter(
+                survey_schedule=options['survey_schedule'])
+        if options['map_area']:
+            household_members = household_members.filter(
+                household_structure__household__plot__map_area=options['map_area'])
+        reporter = ProgressReporter.from_options(self, options, label='members')
+        added, removed = update_search_tokens(
+            household_members.order_by('pk').values_list('pk', flat=True).iterator(),
+            chunk_size=options['chunk_size'], reporter=reporter)
+        reporter.finish(
+            f'Added {added} and removed {removed} search tokens.',
+            style=self.style.SUCCESS)
@@ -0,0 +1,105 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from edc_base.utils import get_utcnow
+
+from ..progress import ProgressReporter, add_progress_arguments
+from ...bulk_audit import emit_audit_records
+from ...eligibile_member_helper import EligibileMemberHelper, get_registration_statuses
+from ...models import HouseholdMember, EnrollmentChecklist
+from ...participation_status import update_member_statuses
+from ...utils import chunked
+
+
+def update_eligible_members(household_members=None, dry_run=None, chunk_size=None,
+                            reporter=None):
+    """Recomputes eligible_member in memory and saves only the
+    members whose value changed, one transaction per chunk.
+
+    Registration statuses are fetched once. Replicates the
+    household member post_save side effects (enrollment checklist
+    delete, member status) and creates the historical records and
+    outgoing transactions that save() would have created.
+
+    If `reporter`, each chunk adds its members and changes to the
+    ProgressReporter.
+
+    Returns a dictionary of counts.
+    """
+    chunk_size = chunk_size or 1000
+    summary = dict(checked=0, now_eligible=0, now_ineligible=0)
+    registration_statuses = get_registration_statuses(
+        household_members.filter(age_in_years__gt=64).values_list(
+            'subject_identifier', flat=True))
+    for chunk in chunked(household_members.order_by('pk').iterator(), chunk_size):
+        eligible_members = EligibileMemberHelper.eligible_members(
+            chunk, registration_statuses=registration_statuses)
+        changed = []
+        for household_member, eligible_member in zip(chunk, eligible_members):
+            if household_member.eligible_member != eligible_member:
+                household_member.eligible_member = eligible_member
+                household_member.modified = get_utcnow()
+                changed.append(household_member)
+                if eligible_member:
+                    summary['now_eligible'] += 1
+                else:
+                    summary['now_ineligible'] += 1
+        summary['checked'] += len(chunk)
+        if changed and not dry_run:
+            with transaction.atomic():
+                HouseholdMember.objects.bulk_update(
+                    changed, ['eligible_member', 'modified'])
+                EnrollmentChecklist.objects.filter(
+                    household_member__in=[
+                        obj.pk for obj in changed if not obj.eligible_member]).delete()
+                update_member_statuses(
+                    household_members=HouseholdMember.objects.filter(
+                        pk__in=[obj.pk for obj in changed]))
+                emit_audit_records(changed, created=False)
+        if reporter:
+            reporter.add(len(chunk), changed=len(changed))
+    return summary
+
+
+class Command(BaseCommand):
+
+    help = ('Recompute eligible_member for the household members of a '
+            'survey schedule and/or map area.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--survey_schedule', type=str, default=None,
+            help='survey_schedule field value')
+        parser.add_argument(
+            '--map_area', type=str, default=None, help='map_area')
+        parser.add_argument(
+            '--dry_run', action='store_true', default=False,
+            help='report changes without saving')
+        parser.add_argument(
+            '--chunk_size', type=int, default=1000,
+            help='number of members per transaction')
+        add_progress_arguments(parser)
+
+    def handle(self, *args, **options):
+        household_members = HouseholdMember.objects.all()
+        if options['survey_schedule']:
+            household_members = household_members.filter(
+                survey_schedule=options['survey_schedule'])
+        if options['map_area']:
+            household_members = household_members.filter(
+                household_structure__household__plot__map_area=options['map_area'])
+        reporter = ProgressReporter.from_options(
+            self, options, label='members')
+        summary = update_eligible_members(
+            household_members=household_members,
+            dry_run=options['dry_run'],
+            chunk_size=options['chunk_size'],
+            reporter=reporter)
+        message = (
+            f'Checked {summary["checked"]} members. '
+            f'{summary["now_eligible"]} became eligible, '
+            f'{summary["now_ineligible"]} became ineligible.')
+        if options['dry_run']:
+            reporter.finish(f'{message} Dry run. Nothing saved.', style=self.style.WARNING)
+        else:
+            reporter.finish(message, style=self.style.SUCCESS)
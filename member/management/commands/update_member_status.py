@@ -0,0 +1,63 @@
+from django.core.management.base import BaseCommand
+
+from ..progress import ProgressReporter, add_progress_arguments
+from ...models import HouseholdMember
+from ...member_updates import update_report_counts
+from ...participation_status import update_member_statuses
+
+
+class Command(BaseCommand):
+
+    help = ('Backfill and verify the persisted member_status of '
+            'household members.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--survey_schedule', type=str, default=None,
+            help='survey_schedule field value')
+        parser.add_argument(
+            '--map_area', type=str, default=None, help='map_area')
+        parser.add_argument(
+            '--verify', action='store_true', default=False,
+            help='report mismatches only, do not update')
+        parser.add_argument(
+            '--recount', action='store_true', default=False,
+            help=('recount absent and undecided reports before updating '
+                  'the member status'))
+        parser.add_argument(
+            '--chunk_size', type=int, default=500,
+            help='number of household structures per chunk')
+        add_progress_arguments(parser)
+
+    def handle(self, *args, **options):
+        household_members = HouseholdMember.objects.all()
+        if options['survey_schedule']:
+            household_members = household_members.filter(
+                survey_schedule=options['survey_schedule'])
+        if options['map_area']:
+            household_members = household_members.filter(
+                household_structure__household__plot__map_area=options['map_area'])
+        if options['recount'] and not options['verify']:
+            reporter = ProgressReporter.from_options(
+                self, options, label='members recounted')
+            recounted = update_report_counts(
+                household_members=household_members,
+                chunk_size=options['chunk_size'],
+                reporter=reporter)
+            reporter.finish(
+                f'Updated absent and undecided counts of {recounted} members.')
+        reporter = ProgressReporter.from_options(self, options, label='members')
+        checked, mismatched = update_member_statuses(
+            household_members=household_members,
+            verify_only=options['verify'],
+            chunk_size=options['chunk_size'],
+            reporter=reporter)
+        if options['verify']:
+            style = self.style.WARNING if mismatched else self.style.SUCCESS
+            reporter.finish(
+                f'Checked {checked} members. {mismatched} do not match '
+                'the computed participation status.', style=style)
+        else:
+            reporter.finish(
+                f'Checked {checked} members. Updated {mismatched}.',
+                style=self.style.SUCCESS)
@@ -1,10 +1,14 @@
 from django.conf import settings
-from django.core.management.base import BaseCommand
 
+from edc_base.utils import get_utcnow
 from edc_map.models import InnerContainer
 from edc_registration.models import RegisteredSubject
 
+from ..partitioned import PartitionedCommand
+from ..progress import ProgressReporter
+from ...bulk_audit import emit_audit_records
 from ...models import HouseholdMember
+from ...utils import chunked
 
 
 def to_string(value):
@@ -19,15 +23,64 @@ def to_string(value):
     return value
 
 
-class Command(BaseCommand):
+def update_registration_identifiers(household_members=None, chunk_size=None):
+    """Sets registration_identifier on RegisteredSubjects where
+    it is null using the internal_identifier of the household member.
+
+    Streams members and updates RegisteredSubjects in chunks. As
+    bulk_update skips save(), the historical records and outgoing
+    transactions are created in bulk.
+    Returns the number of RegisteredSubjects updated.
+    """
+    chunk_size = chunk_size or 1000
+    count = 0
+    rows = household_members.order_by().values_list(
+        'subject_identifier', 'internal_identifier').iterator()
+    for chunk in chunked(rows, chunk_size):
+        internal_identifiers = dict(chunk)
+        registered_subjects = []
+        for registered_subject in RegisteredSubject.objects.filter(
+                subject_identifier__in=list(internal_identifiers),
+                registration_identifier__isnull=True):
+            registered_subject.registration_identifier = to_string(
+                internal_identifiers[registered_subject.subject_identifier])
+            registered_subject.modified = get_utcnow()
+            registered_subjects.append(registered_subject)
+        RegisteredSubject.objects.bulk_update(
+            registered_subjects, ['registration_identifier', 'modified'],
+            batch_size=chunk_size)
+        emit_audit_records(
+            registered_subjects, created=False, batch_size=chunk_size)
+        count += len(registered_subjects)
+    return count
+
+
+def update_plot_registration_identifiers(
+        map_area=None, plot_identifiers=None, chunk_size=None):
+    """Updates the registration identifiers of the members of the
+    plots and returns a dictionary of counts.
+    """
+    household_members = HouseholdMember.objects.filter(
+        household_structure__household__plot__map_area=map_area,
+        household_structure__household__plot__plot_identifier__in=plot_identifiers)
+    return dict(updated=update_registration_identifiers(
+        household_members=household_members, chunk_size=chunk_size))
+
+
+class Command(PartitionedCommand):
 
     help = 'Update registration identifiers.'
 
+    default_partition_size = 200
+
     def add_arguments(self, parser):
+        super().add_arguments(parser)
         parser.add_argument('map_area', type=str, help='map_area')
+        parser.add_argument(
+            '--chunk_size', type=int, default=1000,
+            help='number of members read per chunk')
 
     def handle(self, *args, **options):
-        count = 0
         map_area = options['map_area']
         try:
             inner_container = InnerContainer.objects.get(
@@ -35,27 +88,17 @@ class Command(BaseCommand):
         except InnerContainer.DoesNotExist:
             pass
         else:
-            plot_identifiers = inner_container.identifier_labels
-            household_members = HouseholdMember.objects.filter(
-                household_structure__household__plot__map_area=map_area,
-                household_structure__household__plot__plot_identifier__in=plot_identifiers)
-            subject_identifier_internal_identifier = {}
-            for household_member in household_members:
-                subject_identifier_internal_identifier[
-                    household_member.subject_identifier] = household_member.internal_identifier
-            for subject_identifier, internal_identifier in subject_identifier_internal_identifier.items():
-                try:
-                    registered_subject = RegisteredSubject.objects.get(
-                        subject_identifier=subject_identifier, registration_identifier__isnull=True)
-                except RegisteredSubject.DoesNotExist:
-                    pass
-                else:
-                    registration_value = to_string(internal_identifier)
-                    registered_subject.registration_identifier = registration_value
-                    registered_subject.save()
-                    count += 1
-                    self.stdout.write(
-                        self.style.SUCCESS(
-                            f'{count} {registered_subject.first_name} registration identifier Updated machine {settings.DEVICE_ID}'))
-            self.stdout.write(
-                self.style.SUCCESS('Successfully update registration identifiers members.'))
+            reporter = ProgressReporter.from_options(self, options, label='plots')
+            counts = self.run_partitions(
+                update_plot_registration_identifiers,
+                inner_container.identifier_labels,
+                lambda plot_identifiers: dict(
+                    map_area=map_area, plot_identifiers=plot_identifiers,
+                    chunk_size=options['chunk_size']),
+                options, signature=dict(
+                    command='update_registration_identifier', map_area=map_area),
+                reporter=reporter)
+            reporter.finish(
+                f'Successfully updated {counts.get("updated", 0)} registration '
+                f'identifiers on machine {settings.DEVICE_ID}.',
+                style=self.style.SUCCESS)
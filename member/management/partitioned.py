@@ -0,0 +1,150 @@
+import json
+import multiprocessing
+import os
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+
+from .progress import add_progress_arguments
+
+
+class Checkpoint:
+
+    """A JSON file of the partition keys completed by a command so
+    an interrupted run resumes with the remaining keys.
+
+    `signature` is a dictionary of the options the keys depend on,
+    a checkpoint written with other options is not reused.
+    """
+
+    def __init__(self, path=None, signature=None):
+        self.path = path
+        self.signature = signature or {}
+        self.done = set()
+        if path and os.path.exists(path):
+            with open(path) as f:
+                data = json.load(f)
+            if data.get('signature') != self.signature:
+                raise CommandError(
+                    f'Checkpoint {path} was written with other options. '
+                    f'Expected {self.signature}. Got {data.get("signature")}.')
+            self.done = set(data.get('done', []))
+
+    def add(self, keys):
+        """Adds the keys of a committed partition and rewrites the
+        file atomically.
+        """
+        self.done.update(keys)
+        if self.path:
+            tmp_path = f'{self.path}.tmp'
+            with open(tmp_path, 'w') as f:
+                json.dump(dict(signature=self.signature, done=sorted(self.done)), f)
+            os.replace(tmp_path, self.path)
+
+
+def make_partitions(keys, partition_size):
+    """Returns a list of lists of up to partition_size sorted keys.
+    """
+    keys = sorted(keys)
+    return [keys[i:i + partition_size] for i in range(0, len(keys), partition_size)]
+
+
+def run_partition(function, kwargs):
+    """Runs one partition in a transaction and returns its counts.
+    """
+    with transaction.atomic():
+        return function(**kwargs)
+
+
+def merge_counts(counts, values):
+    for key, value in (values or {}).items():
+        counts[key] = counts.get(key, 0) + value
+    return counts
+
+
+def run_partitions(function, partitions, workers=None, checkpoint=None, reporter=None):
+    """Runs `function` once per partition and returns the sum of the
+    dictionaries of counts it returns.
+
+    `partitions` is a list of (keys, kwargs). Each partition runs in
+    its own transaction and its keys are added to the checkpoint
+    once committed. With more than one worker, partitions run on a
+    pool of forked processes; the parent's connections are closed
+    first so each worker opens its own. `function` must be a module
+    level function.
+
+    If `reporter`, each completed partition adds its keys and counts
+    to the ProgressReporter.
+    """
+    counts = {}
+
+    def completed(keys, values):
+        merge_counts(counts, values)
+        if checkpoint:
+            checkpoint.add(keys)
+        if reporter:
+            reporter.add(len(keys), **(values or {}))
+
+    if not workers or workers <= 1:
+        for keys, kwargs in partitions:
+            completed(keys, run_partition(function, kwargs))
+        return counts
+    connections.close_all()
+    with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context('fork')) as executor:
+        futures = {
+            executor.submit(run_partition, function, kwargs): keys
+            for keys, kwargs in partitions}
+        for future in as_completed(futures):
+            completed(futures[future], future.result())
+    return counts
+
+
+class PartitionedCommand(BaseCommand):
+
+    """A management command that runs its work in partitions, e.g.
+    groups of plots, on a process pool with a resumable checkpoint.
+
+    Subclasses call `super().add_arguments(parser)` and
+    `self.run_partitions` with a ProgressReporter counting keys.
+    """
+
+    default_partition_size = 50
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=1,
+            help='number of worker processes')
+        parser.add_argument(
+            '--partition_size', type=int, default=self.default_partition_size,
+            help='number of keys, e.g. plots, per partition and transaction')
+        parser.add_argument(
+            '--checkpoint', type=str, default=None,
+            help='path of a checkpoint file to resume from and update')
+        add_progress_arguments(parser)
+
+    def run_partitions(self, function, keys, get_kwargs, options,
+                       signature=None, checkpoint=True, reporter=None):
+        """Partitions keys, skipping those completed in the checkpoint
+        file, and runs function(**get_kwargs(partition keys)) per
+        partition. Returns the summed counts.
+        """
+        checkpoint = Checkpoint(
+            path=options['checkpoint'] if checkpoint else None,
+            signature=signature)
+        keys = [key for key in keys if key not in checkpoint.done]
+        if reporter:
+            reporter.total = len(keys)
+        if checkpoint.done:
+            self.stdout.write(
+                f'Resuming from {options["checkpoint"]}. '
+                f'{len(checkpoint.done)} keys already done, {len(keys)} remaining.')
+        partitions = [
+            (partition, get_kwargs(partition))
+            for partition in make_partitions(keys, options['partition_size'])]
+        return run_partitions(
+            function, partitions, workers=options['workers'],
+            checkpoint=checkpoint, reporter=reporter)
@@ -0,0 +1,117 @@
+import json
+import sys
+import time
+
+from django.core.management.base import OutputWrapper
+from django.core.management.color import color_style
+
+
+def add_progress_arguments(parser):
+    parser.add_argument(
+        '--progress_interval', type=float, default=5.0,
+        help='seconds between progress lines, 0 for none')
+    parser.add_argument(
+        '--summary', type=str, default=None,
+        help='path of a JSON file to write the summary to')
+
+
+class ProgressReporter:
+
+    """Counts the rows processed by a command and writes a progress
+    line at most once every `interval` seconds.
+
+    Per-row messages are written only at verbosity 2 or more. The
+    summary of counts, elapsed time and rows per second is written
+    to `summary_path`, if given, by `finish`.
+    """
+
+    def __init__(self, stdout=None, style=None, verbosity=None, total=None,
+                 label=None, interval=None, summary_path=None):
+        if not isinstance(stdout, OutputWrapper):
+            stdout = OutputWrapper(stdout or sys.stdout)
+        self.stdout = stdout
+        self.style = style or color_style()
+        self.verbosity = 1 if verbosity is None else verbosity
+        self.total = total
+        self.label = label or 'rows'
+        self.interval = interval
+        self.summary_path = summary_path
+        self.processed = 0
+        self.counts = {}
+        self.started = time.monotonic()
+        self.last_reported = self.started
+
+    @classmethod
+    def from_options(cls, command, options, **kwargs):
+        """Returns a reporter for a management command with the
+        options of `add_progress_arguments`.
+        """
+        return cls(
+            stdout=command.stdout, style=command.style,
+            verbosity=options['verbosity'],
+            interval=options.get('progress_interval'),
+            summary_path=options.get('summary'), **kwargs)
+
+    @property
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+    @property
+    def rate(self):
+        elapsed = self.elapsed
+        return self.processed / elapsed if elapsed else 0.0
+
+    def add(self, processed=1, **counts):
+        """Adds to the processed rows and the counters and writes a
+        progress line if the interval has passed.
+        """
+        self.processed += processed
+        for key, value in counts.items():
+            self.counts[key] = self.counts.get(key, 0) + value
+        if self.interval and self.verbosity > 0:
+            now = time.monotonic()
+            if now - self.last_reported >= self.interval:
+                self.last_reported = now
+                self.stdout.write(self.progress_message())
+
+    def row(self, message, style=None):
+        """Writes a per-row message if verbosity is 2 or more.
+        """
+        if self.verbosity >= 2:
+            self.stdout.write(style(message) if style else message)
+
+    def progress_message(self):
+        total = f' of {self.total}' if self.total is not None else ''
+        counts = ''.join(f', {key}={value}' for key, value in sorted(self.counts.items()))
+        return (f'{self.processed}{total} {self.label} in {self.elapsed:.0f}s, '
+                f'{self.rate:.0f} {self.label}/s{counts}.')
+
+    def summary(self):
+        return dict(
+            processed=self.processed, total=self.total, label=self.label,
+            elapsed=round(self.elapsed, 3), rate=round(self.rate, 1),
+            counts=self.counts)
+
+    def finish(self, message=None, style=None, totals=None):
+        """Writes the final progress line and message and, if
+        `summary_path`, the JSON summary. Returns the summary.
+
+        `totals`, a dictionary, e.g. of counts by model, is written
+        one per line after the message, whatever the interval, and
+        added to the summary.
+        """
+        summary = self.summary()
+        if self.verbosity > 0:
+            self.stdout.write(self.progress_message())
+            if message:
+                self.stdout.write(style(message) if style else message)
+            for key, value in sorted((totals or {}).items()):
+                self.stdout.write(f'  {key}: {value}')
+        if totals is not None:
+            summary.update(totals=totals)
+        if self.summary_path:
+            if message:
+                summary.update(message=message)
+            with open(self.summary_path, 'w') as f:
+                json.dump(summary, f, indent=2, default=str)
+        return summary
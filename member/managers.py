@@ -1,13 +1,227 @@
-from django.db import models
+from uuid import uuid4
+
+from django.apps import apps as django_apps
+from django.db import models, transaction
+
+from edc_constants.constants import CONSENTED, DEAD, YES
+from edc_search.search_slug import SearchSlug
+from household.utils import todays_log_entry_or_raise
+
+from .constants import HEAD_OF_HOUSEHOLD
+from .exceptions import EnumerationRepresentativeError, MemberValidationError
+from .participation_status import annotate_participation_status
+
+
+class HouseholdMemberQuerySet(models.QuerySet):
+
+    def with_participation_status(self, name=None):
+        """Returns the queryset annotated with the participation status.
+
+        See `annotate_participation_status`.
+        """
+        return annotate_participation_status(self, name=name)
+
+    def search(self, term, exact=False):
+        """Returns the queryset filtered for members with a search token
+        starting with, or if `exact` equal to, each word of `term`.
+
+        Tokens are identifiers, map area and initials normalized to
+        lower case without separators, see `member.search_index`.
+        """
+        from .search_index import normalize
+        SearchToken = django_apps.get_model('member', 'householdmembersearchtoken')
+        queryset = self
+        for word in term.split():
+            token = normalize(word)
+            if not token:
+                continue
+            lookup = 'token' if exact else 'token__startswith'
+            queryset = queryset.filter(pk__in=SearchToken.objects.filter(
+                **{lookup: token}).values('household_member'))
+        return queryset
 
 
 class HouseholdMemberManager(models.Manager):
 
+    def get_queryset(self):
+        return HouseholdMemberQuerySet(self.model, using=self._db)
+
+    def with_participation_status(self, name=None):
+        return self.get_queryset().with_participation_status(name=name)
+
+    def search(self, term, exact=False):
+        return self.get_queryset().search(term, exact=exact)
+
+    def validate_enumeration(self, household_structure, household_members):
+        """Raises an exception if the new household members may not be
+        enumerated in the household structure.
+
+        Validates once for all members what `common_clean` validates
+        for each member, applying the head of household rules as if
+        the members were saved in order.
+        """
+        from .utils import get_anonymous_plot_pk
+        for household_member in household_members:
+            if (household_member.survival_status == DEAD
+                    and household_member.present_today == YES):
+                raise MemberValidationError(
+                    'Invalid combination. Got member status == {} but '
+                    'present today == {}'.format(
+                        household_member.survival_status,
+                        household_member.present_today))
+        report_datetimes = {
+            obj.report_datetime.date(): obj.report_datetime for obj in household_members}
+        for report_datetime in report_datetimes.values():
+            todays_log_entry_or_raise(
+                household_structure=household_structure,
+                report_datetime=report_datetime)
+        if household_structure.household.plot_id == get_anonymous_plot_pk():
+            return
+        RepresentativeEligibility = django_apps.get_model(
+            'member', 'representativeeligibility')
+        HouseholdHeadEligibility = django_apps.get_model(
+            'member', 'householdheadeligibility')
+        if (not RepresentativeEligibility.objects.filter(
+                household_structure=household_structure).exists()
+                and not all(obj.cloned for obj in household_members)):
+            raise EnumerationRepresentativeError(
+                'Enumeration blocked. Please complete \'{}\' form first.'.format(
+                    RepresentativeEligibility._meta.verbose_name))
+        head_of_household = self.filter(
+            household_structure=household_structure,
+            relation=HEAD_OF_HOUSEHOLD).first()
+        head_of_household_eligibility = head_of_household and (
+            HouseholdHeadEligibility.objects.filter(
+                household_member=head_of_household).exists())
+        for household_member in household_members:
+            if head_of_household:
+                if household_member.relation == HEAD_OF_HOUSEHOLD:
+                    raise EnumerationRepresentativeError(
+                        '{} is already head of household.'.format(
+                            head_of_household.first_name), 'relation')
+                if not head_of_household_eligibility:
+                    raise EnumerationRepresentativeError(
+                        'Further enumeration blocked. Please complete '
+                        '\'{}\' form first.'.format(
+                            HouseholdHeadEligibility._meta.verbose_name))
+            elif household_member.relation == HEAD_OF_HOUSEHOLD:
+                # a new head of household has no HouseholdHeadEligibility
+                # so may only be the last member enumerated.
+                head_of_household = household_member
+                head_of_household_eligibility = False
+
+    def bulk_enumerate(self, household_structure, members, batch_size=None):
+        """Creates new household members and their RegisteredSubjects
+        in bulk and returns the household members.
+
+        `members` is a list of dictionaries of household member field
+        values. Validation is done once for the household structure,
+        see `validate_enumeration`. The household structure is
+        updated as enumerated once and the member status, historical
+        records and outgoing transactions are created in bulk.
+        """
+        from .bulk_audit import emit_audit_records
+        household_members = [self.model(
+            household_structure=household_structure, **values) for values in members]
+        if not household_members:
+            return []
+        self.validate_enumeration(household_structure, household_members)
+        household_identifier = household_structure.household.household_identifier
+        for household_member in household_members:
+            household_member.household_identifier = household_identifier
+            household_member.survey_schedule = household_structure.survey_schedule
+            household_member.internal_identifier = (
+                household_member.internal_identifier or uuid4())
+            household_member.update_subject_identifier_on_save()
+        registered_subject_model_cls = household_members[0].registered_subject_model_class
+        registered = set(registered_subject_model_cls.objects.filter(
+            registration_identifier__in=[
+                obj.internal_identifier.hex for obj in household_members]).values_list(
+                    'registration_identifier', flat=True))
+        registered_subjects = [
+            registered_subject_model_cls(**obj.registration_options)
+            for obj in household_members
+            if obj.internal_identifier.hex not in registered]
+        with transaction.atomic():
+            registered_subject_model_cls.objects.bulk_create(
+                registered_subjects, batch_size=batch_size)
+            household_members = self.bulk_insert(
+                household_members, batch_size=batch_size)
+            emit_audit_records(
+                registered_subjects, created=True, batch_size=batch_size)
+        return household_members
+
+    def bulk_insert(self, household_members, batch_size=None):
+        """Inserts new, validated household members without save()
+        and returns them.
+
+        Does in bulk what save() and the post_save receiver do for
+        a new member: sets the household identifier, survey schedule,
+        eligibility, member status and search slug, marks each
+        household structure enumerated, updates the search tokens,
+        historical records and outgoing transactions.
+
+        Registration is left to the caller. Call within a transaction.
+        """
+        from .bulk_audit import emit_audit_records
+        from .constants import AVAILABLE
+        from .eligibile_member_helper import EligibileMemberHelper
+        from .models.household_member.consent_model_mixin import prefetch_consents
+        from .search_index import update_search_tokens
+        household_structures = {}
+        for household_member in household_members:
+            household_structure = household_member.household_structure
+            household_structures.setdefault(household_structure.pk, household_structure)
+            household_member.household_identifier = (
+                household_structure.household.household_identifier)
+            household_member.survey_schedule = household_structure.survey_schedule
+        for household_member, eligible_member in zip(
+                household_members,
+                EligibileMemberHelper.eligible_members(household_members)):
+            household_member.eligible_member = eligible_member
+            household_member.slug = SearchSlug(
+                obj=household_member,
+                fields=household_member.get_search_slug_fields()).slug
+        # a new member has no reports, only a consent decides its status
+        for household_member in prefetch_consents(household_members, using=self.db):
+            if household_member.is_consented:
+                household_member.member_status = CONSENTED
+                household_member.member_status_final = True
+            else:
+                household_member.member_status = AVAILABLE
+                household_member.member_status_final = False
+        self.bulk_create(household_members, batch_size=batch_size)
+        for household_structure in household_structures.values():
+            if not household_structure.enumerated:
+                household_structure.enumerated = True
+                household_structure.enumerated_datetime = min(
+                    obj.report_datetime for obj in household_members
+                    if obj.household_structure_id == household_structure.pk)
+                household_structure.save()
+        emit_audit_records(
+            household_members, created=True, using=self.db, batch_size=batch_size)
+        update_search_tokens(
+            [obj.pk for obj in household_members], chunk_size=batch_size)
+        return household_members
+
     def get_by_natural_key(self,
                            internal_identifier,
                            survey_schedule,
                            household_identifier,
                            plot_identifier):
+        from .natural_keys import natural_key_cache
+        if natural_key_cache.active:
+            household_member = natural_key_cache.member(
+                internal_identifier, survey_schedule,
+                household_identifier, plot_identifier)
+            if household_member and household_member._state.db == self.db:
+                return household_member
+            household_structure_id = natural_key_cache.structure_pk(
+                survey_schedule, household_identifier, plot_identifier)
+            if household_structure_id:
+                return self.get(
+                    internal_identifier=internal_identifier,
+                    household_structure=household_structure_id)
         return self.get(
             internal_identifier=internal_identifier,
             household_structure__survey_schedule=survey_schedule,
@@ -23,7 +237,20 @@ class MemberEntryManager(models.Manager):
                            survey_schedule,
                            household_identifier,
                            plot_identifier):
-
+        from .natural_keys import natural_key_cache
+        if natural_key_cache.active:
+            pk = natural_key_cache.member_pk(
+                internal_identifier, survey_schedule,
+                household_identifier, plot_identifier)
+            if pk:
+                return self.get(report_datetime=report_datetime, household_member=pk)
+            household_structure_id = natural_key_cache.structure_pk(
+                survey_schedule, household_identifier, plot_identifier)
+            if household_structure_id:
+                return self.get(
+                    report_datetime=report_datetime,
+                    household_member__internal_identifier=internal_identifier,
+                    household_member__household_structure=household_structure_id)
         options = {
             'report_datetime': report_datetime,
             'household_member__internal_identifier':
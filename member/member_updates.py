@@ -0,0 +1,305 @@
+import threading
+import weakref
+
+from contextlib import contextmanager
+
+from django.apps import apps as django_apps
+from django.db import transaction, DEFAULT_DB_ALIAS
+from django.db.models import BooleanField, Case, Count, F, Value, When
+from django.db.models.functions import Greatest
+
+from edc_base.utils import get_utcnow
+
+from .bulk_audit import emit_audit_records
+from .participation_status import get_member_status
+from .utils import chunked
+
+# maintained report counts and the flag derived from each
+report_count_fields = {
+    'absent_count': 'absent',
+    'undecided_count': 'undecided'}
+
+# counters maintained by the member signals, never written by a
+# full save, see HouseholdMember.refresh_maintained_fields
+counter_fields = ['visit_attempts'] + list(report_count_fields)
+
+
+_suspended = threading.local()
+
+
+@contextmanager
+def suspend_member_updates():
+    """Skips the member field updates of the report signals in this
+    thread, e.g. while deleting the reports of household members
+    that are deleted next.
+    """
+    depth = getattr(_suspended, 'depth', 0)
+    _suspended.depth = depth + 1
+    try:
+        yield
+    finally:
+        _suspended.depth = depth
+
+
+def member_updates_suspended():
+    return bool(getattr(_suspended, 'depth', 0))
+
+
+def defer_member_updates():
+    """Returns True if member updates from the signals are queued
+    until the transaction commits.
+
+    See `defer_member_updates` on the member AppConfig.
+    """
+    return django_apps.get_app_config('member').defer_member_updates
+
+
+def apply_member_fields(household_member, increments=None, using=None,
+                        update_status=None, **values):
+    """Updates the counters and the given flags of a household member
+    with a single UPDATE instead of a full save.
+
+    `increments` is a dictionary of {field: signed increment}, e.g.
+    visit_attempts, applied in the database and never below zero.
+    The `absent` and `undecided` flags are derived from their report
+    counts in the same UPDATE. The counters are refreshed on the
+    instance and one historical record and outgoing transaction is
+    created.
+
+    The persisted member status only depends on the member reports.
+    If `update_status` or, by default, if a counter changed, it is
+    computed in one query and set in the same UPDATE.
+
+    Eligibility, registration and the search slug are not
+    recomputed as none of these depend on the updated fields.
+    """
+    increments = {
+        field: increment for field, increment in (increments or {}).items()
+        if increment}
+    if update_status is None:
+        update_status = bool(increments)
+    # flags first: MySQL evaluates the assignments from left to right
+    updates = {
+        flag: Case(
+            When(**{f'{field}__gt': -increments[field]}, then=Value(True)),
+            default=Value(False), output_field=BooleanField())
+        for field, flag in report_count_fields.items() if field in increments}
+    refresh_fields = list(updates)
+    for field, increment in increments.items():
+        updates.update({field: Greatest(F(field) + increment, 0)})
+        refresh_fields.append(field)
+    with transaction.atomic(using=using):
+        if update_status:
+            member_status = get_member_status(household_member, using=using)
+            if member_status:
+                values.update(zip(
+                    ['member_status', 'member_status_final'], member_status))
+        updates.update(values)
+        updates.update(modified=get_utcnow())
+        household_member.__class__.objects.using(using).filter(
+            pk=household_member.pk).update(**updates)
+        for attr, value in values.items():
+            setattr(household_member, attr, value)
+        household_member.modified = updates['modified']
+        if refresh_fields:
+            household_member.refresh_from_db(using=using, fields=refresh_fields)
+        emit_audit_records([household_member], created=False, using=using)
+
+
+def update_report_counts(household_members=None, chunk_size=None, reporter=None,
+                         apps=None):
+    """Recounts absent_count and undecided_count, and the flags
+    derived from them, from the member reports.
+
+    If `reporter`, each chunk adds its members to the
+    ProgressReporter. `apps` is the app registry to get the report
+    models from, e.g. the historical apps of a data migration.
+
+    Returns the number of household members updated.
+    """
+    chunk_size = chunk_size or 500
+    apps = apps or django_apps
+    using = household_members.db
+    report_models = {
+        'absent_count': apps.get_model('member', 'absentmember'),
+        'undecided_count': apps.get_model('member', 'undecidedmember')}
+    updated = 0
+    rows = household_members.order_by().values_list(
+        'pk', *report_count_fields).iterator()
+    for chunk in chunked(rows, chunk_size):
+        pks = [row[0] for row in chunk]
+        counts = {
+            field: dict(model.objects.using(using).filter(
+                household_member__in=pks).values(
+                    'household_member').annotate(count=Count('pk')).values_list(
+                        'household_member', 'count'))
+            for field, model in report_models.items()}
+        changes = {}
+        for pk, *current in chunk:
+            value = tuple(
+                counts[field].get(pk, 0) for field in report_count_fields)
+            if tuple(current) != value:
+                changes.setdefault(value, []).append(pk)
+        for value, pks in changes.items():
+            values = dict(zip(report_count_fields, value))
+            household_members.model.objects.using(using).filter(pk__in=pks).update(
+                **values, **{flag: values[field] > 0
+                             for field, flag in report_count_fields.items()})
+            updated += len(pks)
+        if reporter:
+            reporter.add(len(chunk), recounted=sum(
+                len(pks) for pks in changes.values()))
+    return updated
+
+
+def save_member_updates(household_member, increments=None, using=None, **values):
+    """Applies the merged counters and flags queued for a household
+    member with a single save().
+
+    The increments are applied in the database and the member is
+    refetched and locked, save() then derives the report flags from
+    the counts. Does nothing if the member was deleted.
+    """
+    increments = {
+        field: increment for field, increment in (increments or {}).items()
+        if increment}
+    with transaction.atomic(using=using):
+        household_members = household_member.__class__.objects.using(using).filter(
+            pk=household_member.pk)
+        if increments:
+            household_members.update(**{
+                field: Greatest(F(field) + increment, 0)
+                for field, increment in increments.items()})
+        obj = household_members.select_for_update().first()
+        if not obj:
+            return
+        for attr, value in values.items():
+            setattr(obj, attr, value)
+        obj.save(using=using)
+    for field in (counter_fields + list(report_count_fields.values())
+                  + list(values) + ['modified']):
+        setattr(household_member, field, getattr(obj, field))
+
+
+class MemberUpdateBatch:
+
+    """The member changes queued in one transaction, or savepoint, on
+    one database.
+    """
+
+    def __init__(self, using=None, key=None):
+        self.using = using
+        self.key = key
+        self.pending = {}
+
+
+class MemberUpdateQueue(threading.local):
+
+    """Collects the member field changes made by the signals and
+    applies them as one save() per member when the transaction
+    commits.
+
+    Changes are collected in a MemberUpdateBatch per database and
+    savepoint, the on_commit callback of a batch is registered in the
+    savepoint it was started in. The queue only keeps a weak
+    reference to each batch, the on_commit callback holds the batch.
+    If a transaction or savepoint rolls back, Django discards its
+    callbacks and with them the batch, so increments queued in a
+    rolled back savepoint are never applied.
+
+    Outside of an atomic block changes are applied immediately.
+    """
+
+    def __init__(self):
+        self.batches = {}
+
+    @staticmethod
+    def batch_key(using):
+        """Returns the key of the current transaction and savepoint
+        on `using`.
+        """
+        return (using, tuple(transaction.get_connection(using).savepoint_ids))
+
+    def current_batch(self, using=None):
+        """Returns the batch waiting on the current transaction or
+        savepoint on `using` or None.
+        """
+        ref = self.batches.get(self.batch_key(using or DEFAULT_DB_ALIAS))
+        return ref() if ref else None
+
+    def add(self, household_member, increments=None, using=None, **values):
+        using = using or DEFAULT_DB_ALIAS
+        batch = self.current_batch(using)
+        registered = batch is not None
+        if not registered:
+            for key, ref in list(self.batches.items()):
+                if ref() is None:
+                    del self.batches[key]
+            batch = MemberUpdateBatch(using=using, key=self.batch_key(using))
+            self.batches[batch.key] = weakref.ref(batch)
+        for attr, value in values.items():
+            setattr(household_member, attr, value)
+        try:
+            update = batch.pending[household_member.pk]
+        except KeyError:
+            update = batch.pending[household_member.pk] = dict(
+                increments={}, values={})
+        update.update(household_member=household_member)
+        for field, increment in (increments or {}).items():
+            update['increments'][field] = (
+                update['increments'].get(field, 0) + increment)
+        update['values'].update(values)
+        if not registered:
+            transaction.on_commit(lambda: self.flush(batch=batch), using=using)
+
+    def flush(self, using=None, batch=None):
+        """Saves each member of the batch, by default the current
+        batch on `using`, once.
+        """
+        batch = batch or self.current_batch(using)
+        if not batch:
+            return
+        ref = self.batches.get(batch.key)
+        if ref and ref() is batch:
+            del self.batches[batch.key]
+        for update in batch.pending.values():
+            save_member_updates(
+                update['household_member'],
+                increments=update['increments'],
+                using=batch.using, **update['values'])
+
+
+member_update_queue = MemberUpdateQueue()
+
+
+def update_member_fields(household_member, increments=None, using=None,
+                         update_status=None, **values):
+    """Updates the counters and flags of a household member, queued
+    until commit if member updates are deferred.
+
+    See `apply_member_fields` for `update_status`. The queued save()
+    always updates the member status.
+    """
+    if member_updates_suspended():
+        return
+    if defer_member_updates():
+        member_update_queue.add(
+            household_member, increments=increments, using=using, **values)
+    else:
+        apply_member_fields(
+            household_member, increments=increments, using=using,
+            update_status=update_status, **values)
+
+
+def save_member_fields(household_member, using=None, **values):
+    """Sets the flags of a household member and saves it, or, if
+    member updates are deferred, queues the flags until commit.
+    """
+    if member_updates_suspended():
+        return
+    if defer_member_updates():
+        member_update_queue.add(household_member, using=using, **values)
+    else:
+        for attr, value in values.items():
+            setattr(household_member, attr, value)
+        household_member.save()
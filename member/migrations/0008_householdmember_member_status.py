@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11 on 2026-10-18 18:10
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+def backfill_member_statuses(apps, schema_editor):
+    from member.participation_status import backfill_member_statuses
+    HouseholdMember = apps.get_model('member', 'householdmember')
+    backfill_member_statuses(
+        household_members=HouseholdMember.objects.using(
+            schema_editor.connection.alias).all(),
+        apps=apps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('member', '0007_auto_20170425_2057'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='historicalhouseholdmember',
+            name='member_status',
+            field=models.CharField(db_index=True, default='available', editable=False, help_text='updated by the member signals. Persisted value of participation_status, see ParticipationStatus', max_length=25),
+        ),
+        migrations.AddField(
+            model_name='historicalhouseholdmember',
+            name='member_status_final',
+            field=models.BooleanField(db_index=True, default=False, editable=False, help_text='updated by the member signals. See ParticipationStatus'),
+        ),
+        migrations.AddField(
+            model_name='householdmember',
+            name='member_status',
+            field=models.CharField(db_index=True, default='available', editable=False, help_text='updated by the member signals. Persisted value of participation_status, see ParticipationStatus', max_length=25),
+        ),
+        migrations.AddField(
+            model_name='householdmember',
+            name='member_status_final',
+            field=models.BooleanField(db_index=True, default=False, editable=False, help_text='updated by the member signals. See ParticipationStatus'),
+        ),
+        migrations.RunPython(backfill_member_statuses, migrations.RunPython.noop),
+    ]
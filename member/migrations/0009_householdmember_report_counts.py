@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11 on 2026-10-18 18:20
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+def update_report_counts(apps, schema_editor):
+    from member.member_updates import update_report_counts
+    HouseholdMember = apps.get_model('member', 'householdmember')
+    update_report_counts(
+        household_members=HouseholdMember.objects.using(
+            schema_editor.connection.alias).all(),
+        apps=apps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('member', '0008_householdmember_member_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='historicalhouseholdmember',
+            name='absent_count',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='updated by the member signals. Number of absent member reports, absent is True if greater than 0'),
+        ),
+        migrations.AddField(
+            model_name='historicalhouseholdmember',
+            name='undecided_count',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='updated by the member signals. Number of undecided member reports, undecided is True if greater than 0'),
+        ),
+        migrations.AddField(
+            model_name='householdmember',
+            name='absent_count',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='updated by the member signals. Number of absent member reports, absent is True if greater than 0'),
+        ),
+        migrations.AddField(
+            model_name='householdmember',
+            name='undecided_count',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='updated by the member signals. Number of undecided member reports, undecided is True if greater than 0'),
+        ),
+        migrations.RunPython(update_report_counts, migrations.RunPython.noop),
+    ]
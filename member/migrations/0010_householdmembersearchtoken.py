@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11 on 2026-10-18 18:30
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+# The index starts empty. After migrating, run
+#
+#     python manage.py rebuild_member_search_index
+#
+# to add the search tokens of existing household members.
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('member', '0009_householdmember_report_counts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HouseholdMemberSearchToken',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('field', models.CharField(max_length=25)),
+                ('token', models.CharField(db_index=True, max_length=64)),
+                ('household_member', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_tokens', to='member.HouseholdMember')),
+            ],
+        ),
+        migrations.AlterUniqueTogether(
+            name='householdmembersearchtoken',
+            unique_together=set([('household_member', 'field', 'token')]),
+        ),
+    ]
@@ -6,6 +6,7 @@ from .enrollment_loss import EnrollmentLoss
 from .household_head_eligibility import HouseholdHeadEligibility
 from .household_info import HouseholdInfo
 from .household_member import HouseholdMember
+from .household_member_search_token import HouseholdMemberSearchToken
 from .htc_member import HtcMember
 from .htc_member_history import HtcMemberHistory
 from .list_models import TransportMode, ElectricalAppliances
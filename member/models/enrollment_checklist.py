@@ -7,13 +7,15 @@ from edc_base.model_managers import HistoricalRecords
 from edc_base.model_mixins import BaseUuidModel
 from edc_base.utils import age
 from edc_constants.choices import GENDER, YES_NO, YES_NO_NA
-from edc_constants.constants import NOT_APPLICABLE, NO, YES
+from edc_constants.constants import NOT_APPLICABLE
 
 from ..age_helper import AgeHelper
 from ..choices import BLOCK_CONTINUE
 from ..constants import BLOCK_PARTICIPATION
 from ..exceptions import MemberEnrollmentError
+from ..loss_reasons import get_loss_reasons, loss_reason_fields
 from ..managers import MemberEntryManager
+from ..natural_keys import household_member_natural_key
 from .model_mixins import HouseholdMemberModelMixin
 
 
@@ -82,31 +84,12 @@ class EnrollmentModelMixin(models.Model):
             self.age_in_years = age(self.dob, self.report_datetime).years
         # is eligible or collect reasons not eligible, but do not raise an
         # exception
-        loss_reason = []
-        if self.has_identity == NO:
-            loss_reason.append('No valid identity.')
-        if self.household_residency == NO and not self.household_member.cloned:
-            loss_reason.append('Failed household residency requirement')
-        if self.part_time_resident == NO and not self.household_member.cloned:
-            loss_reason.append(
-                'Does not spend 3 or more nights per month in the community.')
-        if self.citizen == NO and self.legal_marriage == NO:
-            loss_reason.append('Not a citizen and not married to a citizen.')
+        loss_reason, non_citizen = get_loss_reasons(
+            age_in_years=self.household_member.age_in_years,
+            cloned=self.household_member.cloned,
+            **{field: getattr(self, field) for field in loss_reason_fields})
+        if non_citizen:
             self.non_citizen = True
-        if (self.citizen == NO and self.legal_marriage == YES and
-                self.marriage_certificate == NO):
-            loss_reason.append(
-                'Not a citizen, married to a citizen but does not '
-                'have a marriage certificate.')
-            self.non_citizen = True
-        if self.literacy == NO:
-            loss_reason.append('Illiterate with no literate witness.')
-        age_helper = self.age_helper_cls(
-            age_in_years=self.household_member.age_in_years)
-        if age_helper.is_minor and self.guardian != YES:
-            loss_reason.append('Minor without guardian available.')
-        if self.confirm_participation == BLOCK_PARTICIPATION:
-            loss_reason.append('Already enrolled.')
         self.is_eligible = False if loss_reason else True
         self.loss_reason = '|'.join(loss_reason) if loss_reason else None
         super().save(*args, **kwargs)
@@ -260,7 +243,7 @@ class EnrollmentChecklist(EnrollmentModelMixin, HouseholdMemberModelMixin,
     history = HistoricalRecords()
 
     def natural_key(self):
-        return (self.report_datetime, ) + self.household_member.natural_key()
+        return (self.report_datetime, ) + household_member_natural_key(self)
     natural_key.dependencies = ['member.householdmember', ]
 
     class Meta:
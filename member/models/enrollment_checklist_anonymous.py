@@ -7,6 +7,7 @@ from edc_consent.field_mixins import SampleCollectionFieldsMixin, ReviewFieldsMi
 from edc_constants.choices import GENDER, YES_NO, YES_NO_NA
 from edc_constants.constants import NOT_APPLICABLE
 
+from ..eligibility_rules import anonymous_enrollment_rules
 from ..managers import MemberEntryManager
 from .model_mixins import AnonymousHouseholdMemberModelMixin
 
@@ -64,6 +65,19 @@ class EnrollmentChecklistAnonymous(AnonymousHouseholdMemberModelMixin,
 
     history = HistoricalRecords()
 
+    def save(self, *args, **kwargs):
+        self.is_eligible = anonymous_enrollment_rules.none_apply(self)
+        super().save(*args, **kwargs)
+
+    @property
+    def loss_reason(self):
+        """Returns the reasons not eligible, pipe-joined as on the
+        EnrollmentChecklist, or None. Read by the enrollment loss
+        signal.
+        """
+        reasons = anonymous_enrollment_rules.reasons(self)
+        return '|'.join(reasons) if reasons else None
+
     class Meta:
         app_label = 'member'
         unique_together = (('household_member', 'report_datetime'), )
@@ -4,6 +4,7 @@ from edc_base.model_managers import HistoricalRecords
 from edc_base.model_mixins import BaseUuidModel
 
 from ..managers import MemberEntryManager
+from ..natural_keys import household_member_natural_key
 from .model_mixins import HouseholdMemberModelMixin
 
 
@@ -23,7 +24,7 @@ class EnrollmentLoss(HouseholdMemberModelMixin, BaseUuidModel):
     history = HistoricalRecords()
 
     def natural_key(self):
-        return (self.report_datetime, ) + self.household_member.natural_key()
+        return (self.report_datetime, ) + household_member_natural_key(self)
     natural_key.dependencies = ['member.householdmember', ]
 
     class Meta(HouseholdMemberModelMixin.Meta):
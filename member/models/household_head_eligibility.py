@@ -2,6 +2,7 @@ from edc_base.model_managers import HistoricalRecords
 from edc_base.model_mixins import BaseUuidModel
 
 from ..managers import MemberEntryManager
+from ..natural_keys import household_member_natural_key
 from .model_mixins import RepresentativeEligibilityMixin, HouseholdMemberModelMixin
 
 
@@ -20,7 +21,7 @@ class HouseholdHeadEligibility(RepresentativeEligibilityMixin,
         return str(self.household_member)
 
     def natural_key(self):
-        return (self.report_datetime) + self.household_member.natural_key()
+        return (self.report_datetime, ) + household_member_natural_key(self)
     natural_key.dependencies = ['member.householdmember']
 
     class Meta:
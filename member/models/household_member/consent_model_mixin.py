@@ -5,11 +5,77 @@ from edc_consent.exceptions import ConsentDoesNotExist
 from edc_consent.site_consents import site_consents
 
 
+# bumped by the consent signals, a consent, or the absence of one,
+# cached on a household member with an older version is stale.
+consent_cache = {'version': 0}
+
+
+def clear_consent_cache():
+    """Invalidates the consents cached on household member instances.
+
+    Called by the consent post_save and post_delete receivers.
+    """
+    consent_cache['version'] += 1
+
+
+def get_consent_object(report_datetime=None, anonymous=None):
+    """Returns the consent object valid for the report_datetime
+    or None.
+
+    Anonymous members use the anonymous consent group.
+    """
+    if anonymous:
+        consent_group = django_apps.get_app_config(
+            'bcpp_consent').anonymous_consent_group
+    else:
+        consent_group = django_apps.get_app_config(
+            'edc_consent').default_consent_group
+    try:
+        consent_object = site_consents.get_consent(
+            report_datetime=report_datetime,
+            consent_group=consent_group)
+    except ConsentDoesNotExist:
+        consent_object = None
+    return consent_object
+
+
+def prefetch_consents(household_members, using=None):
+    """Looks up and caches the consent, or the absence of one, on
+    each household member.
+
+    Runs one query per consent model and version on `using`.
+    """
+    version = consent_cache['version']
+    household_members_by_consent = {}
+    for household_member in household_members:
+        consent_object = household_member.consent_object
+        if consent_object and household_member.eligible_subject:
+            household_members_by_consent.setdefault(
+                (consent_object.model, consent_object.version), []).append(
+                    household_member)
+    for (model, version), objs in household_members_by_consent.items():
+        consents = {
+            consent.subject_identifier: consent for consent in model.objects.using(using).filter(
+                version=version,
+                subject_identifier__in={obj.subject_identifier for obj in objs})}
+        for household_member in objs:
+            household_member._consent = consents.get(
+                household_member.subject_identifier)
+            household_member._consent_version = version
+    return household_members
+
+
 class ConsentModelMixin(models.Model):
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self._consent = None
+        self._consent_version = None
+        self._consent_object = None
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self._consent_version = None
         self._consent_object = None
 
     @property
@@ -19,32 +85,23 @@ class ConsentModelMixin(models.Model):
     @property
     def consent_object(self):
         if not self._consent_object:
-            if self.anonymous:
-                anonymous_consent_group = django_apps.get_app_config(
-                    'bcpp_consent').anonymous_consent_group
-                try:
-                    self._consent_object = site_consents.get_consent(
-                        report_datetime=self.report_datetime,
-                        consent_group=anonymous_consent_group)
-                except ConsentDoesNotExist:
-                    self._consent_object = None
-            else:
-                default_consent_group = django_apps.get_app_config(
-                    'edc_consent').default_consent_group
-                try:
-                    self._consent_object = site_consents.get_consent(
-                        report_datetime=self.report_datetime,
-                        consent_group=default_consent_group)
-                except ConsentDoesNotExist:
-                    self._consent_object = None
+            self._consent_object = get_consent_object(
+                report_datetime=self.report_datetime,
+                anonymous=self.anonymous)
         return self._consent_object
 
     @property
     def consent(self):
         """Returns a consent model instance, or None, that is
         valid for the current period (report_datetime).
+
+        The result of the lookup, including a missing consent, is
+        cached on the instance until a consent is saved or deleted
+        or the instance is refreshed. See also `prefetch_consents`.
         """
-        if not self._consent:
+        version = consent_cache['version']
+        if self._consent_version != version:
+            self._consent = None
             if self.consent_object and self.eligible_subject:
                 try:
                     self._consent = self.consent_object.model.objects.get(
@@ -52,6 +109,7 @@ class ConsentModelMixin(models.Model):
                         subject_identifier=self.subject_identifier)
                 except self.consent_object.model.DoesNotExist:
                     self._consent = None
+                self._consent_version = version
         return self._consent
 
     class Meta:
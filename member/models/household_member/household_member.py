@@ -10,18 +10,23 @@ from edc_base.model_mixins import BaseUuidModel
 from edc_base.model_validators import datetime_not_future
 from edc_base.utils import get_utcnow
 from edc_constants.choices import GENDER, ALIVE_DEAD_UNKNOWN, YES_NO_NA, YES_NO_NA_DWTA
-from edc_constants.constants import ALIVE, DEAD, YES, NOT_APPLICABLE
+from edc_constants.constants import ALIVE, CONSENTED, DEAD, YES, NOT_APPLICABLE
 from edc_registration.model_mixins import UpdatesOrCreatesRegistrationModelMixin
 from edc_search.model_mixins import SearchSlugManager
 from household.models import HouseholdStructure
-from plot.utils import get_anonymous_plot
 from survey.model_mixins import SurveyScheduleModelMixin
 
 from member_clone.model_mixins import CloneModelMixin, NextMemberModelMixin
 
 from ...choices import INABILITY_TO_PARTICIPATE_REASON
+from ...constants import AVAILABLE
 from ...exceptions import MemberValidationError
+from ...instrumentation import instrumented
 from ...managers import HouseholdMemberManager
+from ...member_updates import counter_fields, report_count_fields
+from ...participation_status import annotate_participation_status
+from ...natural_keys import natural_key_cache
+from ...utils import get_anonymous_plot_pk
 from .consent_model_mixin import ConsentModelMixin
 from .member_eligibility_model_mixin import MemberEligibilityModelMixin
 from .member_identifier_model_mixin import MemberIdentifierModelMixin
@@ -186,15 +191,53 @@ class HouseholdMember(UpdatesOrCreatesRegistrationModelMixin,
         return (f'{self.first_name} {self.initials} {self.age_in_years}{self.gender} '
                 f'{self.household_structure.survey_schedule}')
 
+    @instrumented
     def save(self, *args, **kwargs):
         self.household_identifier = (
             self.household_structure.household.household_identifier)
         if not self.id and not self.internal_identifier:
             self.internal_identifier = uuid4()
         self.survey_schedule = self.household_structure.survey_schedule
+        if not kwargs.get('update_fields'):
+            self.refresh_maintained_fields(using=kwargs.get('using'))
         super().save(*args, **kwargs)
 
+    def refresh_maintained_fields(self, using=None):
+        """Reloads the counters maintained by the member signals, and
+        the report flags derived from them, so that a full save of a
+        stale instance does not overwrite them, and sets the member
+        status so the historical record and outgoing transaction of
+        this save include it.
+
+        Runs one query for an existing member, and one more for the
+        consent of an eligible subject.
+        """
+        values = {}
+        if not self._state.adding:
+            values = annotate_participation_status(
+                self.__class__.objects.using(using or self._state.db).filter(
+                    pk=self.pk), lookup_consents=False).values(
+                        *counter_fields, 'computed_member_status',
+                        'computed_member_status_final').first() or {}
+        for field in counter_fields:
+            if field in values:
+                setattr(self, field, values[field])
+        for field, flag in report_count_fields.items():
+            if field in values:
+                setattr(self, flag, values[field] > 0)
+        if self.is_consented:
+            self.member_status, self.member_status_final = CONSENTED, True
+        elif values:
+            self.member_status = values['computed_member_status']
+            self.member_status_final = values['computed_member_status_final']
+        else:
+            self.member_status, self.member_status_final = AVAILABLE, False
+
     def natural_key(self):
+        if natural_key_cache.active:
+            return ((self.internal_identifier,)
+                    + natural_key_cache.structure_natural_key(
+                        self.household_structure_id))
         return ((self.internal_identifier,)
                 + self.household_structure.natural_key())
     natural_key.dependencies = ['household.householdstructure']
@@ -207,6 +250,10 @@ class HouseholdMember(UpdatesOrCreatesRegistrationModelMixin,
             self.subject_identifier_aka = self.subject_identifier_as_pk.hex
         return self.subject_identifier
 
+    @instrumented
+    def registration_update_or_create(self):
+        return super().registration_update_or_create()
+
     @property
     def registration_unique_field(self):
         return 'internal_identifier'
@@ -225,11 +272,10 @@ class HouseholdMember(UpdatesOrCreatesRegistrationModelMixin,
     def anonymous(self):
         """Returns True if this member resides on the anonymous plot.
         """
-        plot = get_anonymous_plot()
-        if self.household_structure.household.plot == plot:
-            return True
-        return False
+        return (self.household_structure.household.plot_id
+                == get_anonymous_plot_pk())
 
+    @instrumented
     def common_clean(self):
         if self.survival_status == DEAD and self.present_today == YES:
             raise MemberValidationError(
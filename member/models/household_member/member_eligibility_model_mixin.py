@@ -1,6 +1,7 @@
 from django.db import models
 
 from ...eligibile_member_helper import EligibileMemberHelper
+from ...instrumentation import instrumented
 
 
 class MemberEligibilityModelMixin(models.Model):
@@ -25,6 +26,7 @@ class MemberEligibilityModelMixin(models.Model):
         default=False,
         help_text="updated by enrollment loss save method only.")
 
+    @instrumented
     def save(self, *args, **kwargs):
         eligibility_helper = self.eligibility_helper_cls(**self.__dict__)
         self.eligible_member = eligibility_helper.is_eligible_member
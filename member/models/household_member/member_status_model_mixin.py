@@ -1,5 +1,6 @@
 from django.db import models
 
+from member.constants import AVAILABLE
 from member.participation_status import ParticipationStatus
 
 
@@ -17,6 +18,18 @@ class MemberStatusModelMixin(models.Model):
         default=False,
         help_text="Updated by the subject absentee log")
 
+    absent_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        help_text=('updated by the member signals. Number of absent member '
+                   'reports, absent is True if greater than 0'))
+
+    undecided_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        help_text=('updated by the member signals. Number of undecided member '
+                   'reports, undecided is True if greater than 0'))
+
     non_citizen = models.BooleanField(
         default=False,
         help_text="Updated by the enrollment checklist")
@@ -33,6 +46,20 @@ class MemberStatusModelMixin(models.Model):
         default=False,
         help_text="Updated by the member moved")
 
+    member_status = models.CharField(
+        max_length=25,
+        default=AVAILABLE,
+        editable=False,
+        db_index=True,
+        help_text=('updated by the member signals. Persisted value of '
+                   'participation_status, see ParticipationStatus'))
+
+    member_status_final = models.BooleanField(
+        default=False,
+        editable=False,
+        db_index=True,
+        help_text='updated by the member signals. See ParticipationStatus')
+
     @property
     def reported(self):
         return True if (
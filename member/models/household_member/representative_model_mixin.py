@@ -2,11 +2,11 @@ from django.apps import apps as django_apps
 from django.core.exceptions import MultipleObjectsReturned
 from django.db import models
 
-from plot.utils import get_anonymous_plot
-
 from ...choices import RELATIONS
 from ...constants import HEAD_OF_HOUSEHOLD
 from ...exceptions import EnumerationRepresentativeError
+from ...instrumentation import instrumented
+from ...utils import get_anonymous_plot_pk
 
 
 class RepresentativeModelMixin(models.Model):
@@ -26,10 +26,10 @@ class RepresentativeModelMixin(models.Model):
         editable=False,
         help_text="updated by the head of household.")
 
+    @instrumented
     def common_clean(self):
         # confirm RepresentativeEligibility exists ...
-        plot = get_anonymous_plot()
-        if self.household_structure.household.plot != plot:
+        if self.household_structure.household.plot_id != get_anonymous_plot_pk():
             try:
                 RepresentativeEligibility = django_apps.get_model(
                     *'member.representativeeligibility'.split('.'))
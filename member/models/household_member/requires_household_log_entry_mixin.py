@@ -5,11 +5,14 @@ from edc_base.utils import get_utcnow
 from household.exceptions import HouseholdLogRequired
 from household.utils import todays_log_entry_or_raise
 
+from ...instrumentation import instrumented
+
 
 class RequiresHouseholdLogEntryMixin(models.Model):
 
     prohibit_log_entry_by_report_datetime = False
 
+    @instrumented
     def common_clean(self):
         try:
             household_structure = self.household_member.household_structure
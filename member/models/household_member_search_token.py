@@ -0,0 +1,24 @@
+from django.db import models
+
+from .household_member import HouseholdMember
+
+
+class HouseholdMemberSearchToken(models.Model):
+    """A normalized search token of a household member, maintained
+    by member.search_index. Not synced.
+    """
+
+    household_member = models.ForeignKey(
+        HouseholdMember, on_delete=models.CASCADE,
+        related_name='search_tokens')
+
+    field = models.CharField(max_length=25)
+
+    token = models.CharField(max_length=64, db_index=True)
+
+    def __str__(self):
+        return f'{self.field}: {self.token}'
+
+    class Meta:
+        app_label = 'member'
+        unique_together = (('household_member', 'field', 'token'), )
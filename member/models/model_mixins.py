@@ -14,6 +14,8 @@ from survey.model_mixins import SurveyScheduleModelMixin
 
 from ..choices import REASONS_REFUSED
 from ..constants import REFUSED
+from ..instrumentation import instrumented
+from ..natural_keys import household_member_natural_key
 from .household_member import HouseholdMember, RequiresHouseholdLogEntryMixin
 
 
@@ -35,13 +37,14 @@ class HouseholdMemberModelMixin(RequiresHouseholdLogEntryMixin,
     def __str__(self):
         return str(self.household_member)
 
+    @instrumented
     def save(self, *args, **kwargs):
         self.survey_schedule = (
             self.household_member.survey_schedule_object.field_value)
         super().save(*args, **kwargs)
 
     def natural_key(self):
-        return self.household_member.natural_key()
+        return household_member_natural_key(self)
     natural_key.dependencies = ['member.householdmember', ]
 
     class Meta:
@@ -68,13 +71,14 @@ class AnonymousHouseholdMemberModelMixin(RequiresHouseholdLogEntryMixin,
     def __str__(self):
         return str(self.household_member)
 
+    @instrumented
     def save(self, *args, **kwargs):
         self.survey_schedule = (
             self.household_member.survey_schedule_object.field_value)
         super().save(*args, **kwargs)
 
     def natural_key(self):
-        return self.household_member.natural_key()
+        return household_member_natural_key(self)
     natural_key.dependencies = ['member.householdmember', ]
 
     class Meta:
@@ -124,6 +128,7 @@ class MemberEntryMixin(SurveyScheduleModelMixin,
         help_text=('IMPORTANT: Do not include any names or other personally '
                    'identifying information in this comment'))
 
+    @instrumented
     def save(self, *args, **kwargs):
         self.survey_schedule = (
             self.household_member.survey_schedule_object.field_value)
@@ -5,6 +5,7 @@ from edc_base.model_mixins import BaseUuidModel
 
 from ..choices import REASONS_UNDECIDED
 from ..managers import MemberEntryManager
+from ..natural_keys import household_member_natural_key
 from .model_mixins import MemberEntryMixin
 
 
@@ -24,7 +25,7 @@ class UndecidedMember(MemberEntryMixin, BaseUuidModel):
     history = HistoricalRecords()
 
     def natural_key(self):
-        return (self.report_datetime, ) + self.household_member.natural_key()
+        return (self.report_datetime, ) + household_member_natural_key(self)
     natural_key.dependencies = ['member.householdmember']
 
     class Meta(MemberEntryMixin.Meta):
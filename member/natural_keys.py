@@ -0,0 +1,154 @@
+import threading
+
+from contextlib import contextmanager
+
+from django.apps import apps as django_apps
+
+
+class NaturalKeyCache(threading.local):
+
+    """An in-memory index of household structure and household member
+    natural keys, active only inside `batch()`.
+
+    Used when serializing or deserializing many member model
+    instances, e.g. a sync batch, so natural keys resolve from the
+    index instead of joining household member, household structure,
+    household and plot per instance. The household members of the
+    batched household structures are prefetched, so
+    `HouseholdMember.objects.get_by_natural_key` returns them without
+    a query. Outside of a batch, natural keys are resolved from the
+    database as before.
+
+    For example:
+
+        with natural_key_cache.batch(household_structures=qs):
+            for obj in objects:
+                serialize(obj)
+    """
+
+    def __init__(self):
+        self.depth = 0
+        self.active = False
+        self.structure_keys = {}
+        self.structure_pks = {}
+        self.member_keys = {}
+        self.member_pks = {}
+        self.members = {}
+
+    @contextmanager
+    def batch(self, household_structures):
+        """Activates the cache, prefetching the natural keys of
+        `household_structures`, a queryset, and their household
+        members in two queries. Pass all household structures only
+        if the batch spans most of them, as each and its members are
+        held in memory for the batch.
+
+        Batches may be nested, an inner batch adds its household
+        structures to the index. The index is discarded when the
+        outermost batch exits.
+        """
+        self.depth += 1
+        self.active = True
+        try:
+            self.prefetch_structures(household_structures)
+            model = django_apps.get_model('member', 'householdmember')
+            self.prefetch_members(model.objects.using(household_structures.db).filter(
+                household_structure__in=household_structures.order_by().values('pk')))
+            yield self
+        finally:
+            self.depth -= 1
+            if not self.depth:
+                self.clear()
+
+    def clear(self):
+        self.active = False
+        self.structure_keys = {}
+        self.structure_pks = {}
+        self.member_keys = {}
+        self.member_pks = {}
+        self.members = {}
+
+    def prefetch_structures(self, household_structures):
+        """Adds the natural keys of the household structures, a
+        queryset, to the index in one query.
+        """
+        for pk, *natural_key in household_structures.order_by().values_list(
+                'pk', 'survey_schedule', 'household__household_identifier',
+                'household__plot__plot_identifier').iterator():
+            self.structure_keys[pk] = tuple(natural_key)
+            self.structure_pks[tuple(natural_key)] = pk
+
+    def prefetch_members(self, household_members):
+        """Adds the household members, a queryset, and their internal
+        identifiers to the index in one query.
+        """
+        for household_member in household_members.order_by().iterator():
+            pk = household_member.pk
+            internal_identifier = household_member.internal_identifier
+            household_structure_id = household_member.household_structure_id
+            self.members[pk] = household_member
+            self.member_keys[pk] = (internal_identifier, household_structure_id)
+            self.member_pks[(str(internal_identifier), household_structure_id)] = pk
+
+    def structure_natural_key(self, household_structure_id):
+        """Returns the natural key of a household structure.
+        """
+        try:
+            return self.structure_keys[household_structure_id]
+        except KeyError:
+            model = django_apps.get_model('household', 'householdstructure')
+            self.prefetch_structures(model.objects.filter(pk=household_structure_id))
+            return self.structure_keys[household_structure_id]
+
+    def member_natural_key(self, household_member_id):
+        """Returns the natural key of a household member.
+        """
+        try:
+            internal_identifier, household_structure_id = self.member_keys[
+                household_member_id]
+        except KeyError:
+            model = django_apps.get_model('member', 'householdmember')
+            self.prefetch_members(model.objects.filter(pk=household_member_id))
+            internal_identifier, household_structure_id = self.member_keys[
+                household_member_id]
+        return ((internal_identifier, )
+                + self.structure_natural_key(household_structure_id))
+
+    def structure_pk(self, survey_schedule, household_identifier, plot_identifier):
+        """Returns the pk of the household structure for a natural key
+        or None if not in the index.
+        """
+        return self.structure_pks.get(
+            (survey_schedule, household_identifier, plot_identifier))
+
+    def member_pk(self, internal_identifier, survey_schedule,
+                  household_identifier, plot_identifier):
+        """Returns the pk of the household member for a natural key
+        or None if not in the index.
+
+        Does not query, members added after the batch started are
+        not in the index.
+        """
+        return self.member_pks.get((
+            str(internal_identifier),
+            self.structure_pk(survey_schedule, household_identifier, plot_identifier)))
+
+    def member(self, *natural_key):
+        """Returns the prefetched household member for a natural key
+        or None if not in the index.
+        """
+        return self.members.get(self.member_pk(*natural_key))
+
+
+natural_key_cache = NaturalKeyCache()
+
+
+def household_member_natural_key(obj):
+    """Returns the natural key of the household member of obj, a
+    model instance with a household_member foreign key.
+
+    Does not fetch the household member if the cache is active.
+    """
+    if natural_key_cache.active:
+        return natural_key_cache.member_natural_key(obj.household_member_id)
+    return obj.household_member.natural_key()
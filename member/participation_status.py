@@ -1,15 +1,48 @@
+from functools import reduce
+from operator import or_
+
+from django.apps import apps as django_apps
 from django.core.exceptions import ObjectDoesNotExist
+from django.db import connections
+from django.db.models import (
+    BooleanField, Case, CharField, Exists, F, Max, OuterRef, Q, Subquery,
+    Value, When)
 
 from edc_constants.constants import CONSENTED
 
 from .constants import (
     AVAILABLE, DECEASED, HTC_ELIGIBLE, ABSENT, UNDECIDED, ELIGIBLE,
     INELIGIBLE, REFUSED, REFUSED_HTC, MOVED)
+from .utils import chunked
+
+FINAL_STATUSES = [
+    CONSENTED, REFUSED, DECEASED, REFUSED_HTC, ELIGIBLE, INELIGIBLE]
+
+
+def absent_or_undecided(last_absent_date=None, last_undecided_date=None):
+    """Returns ABSENT, UNDECIDED or None given the report_date of
+    the most recent absent and undecided reports.
+
+    If both reports share the same date, UNDECIDED wins.
+    """
+    if last_undecided_date and (
+            not last_absent_date or last_undecided_date >= last_absent_date):
+        return UNDECIDED
+    elif last_absent_date:
+        return ABSENT
+    return None
 
 
 class ParticipationStatus:
 
-    def __init__(self, household_member):
+    def __init__(self, household_member=None, participation_status=None):
+        if household_member is not None:
+            participation_status = self.get_participation_status(
+                household_member)
+        self.participation_status = participation_status or AVAILABLE
+        self.final = self.participation_status in FINAL_STATUSES
+
+    def get_participation_status(self, household_member):
         participation_status = None
         if household_member.is_consented:
             participation_status = CONSENTED
@@ -19,54 +52,318 @@ class ParticipationStatus:
             else:
                 participation_status = INELIGIBLE
         else:
-            try:
-                household_member.deceasedmember
-            except ObjectDoesNotExist:
-                participation_status = None
-            else:
-                participation_status = DECEASED
-            if not participation_status:
+            for attr, status in [('deceasedmember', DECEASED),
+                                 ('htcmember', HTC_ELIGIBLE),
+                                 ('movedmember', MOVED),
+                                 ('refusedmember', REFUSED)]:
                 try:
-                    household_member.htcmember
+                    getattr(household_member, attr)
                 except ObjectDoesNotExist:
-                    participation_status = None
+                    pass
                 else:
-                    participation_status = HTC_ELIGIBLE
+                    participation_status = status
+                    break
             if not participation_status:
-                try:
-                    household_member.movedmember
-                except ObjectDoesNotExist:
-                    participation_status = None
-                else:
-                    participation_status = MOVED
-            if not participation_status:
-                try:
-                    household_member.refusedmember
-                except ObjectDoesNotExist:
-                    participation_status = None
-                else:
-                    participation_status = REFUSED
-            if not participation_status:
-                absent_members = household_member.absentmember_set.all().order_by(
-                    'report_date')
-                reports = [(ABSENT, absent_member.report_date, absent_member)
-                           for absent_member in absent_members]
-                undecided_members = household_member.undecidedmember_set.all().order_by(
-                    'report_date')
-                reports.extend(
-                    [(UNDECIDED, undecided_member.report_date, undecided_member)
-                     for undecided_member in undecided_members])
-                if reports:
-                    reports.sort(key=lambda x: x[1])
-                    participation_status = reports[-1:][0][0]
-        self.participation_status = participation_status or AVAILABLE
-        if self.participation_status in [ABSENT, UNDECIDED, AVAILABLE, HTC_ELIGIBLE, None]:
-            self.final = False
-        elif self.participation_status in [
-                CONSENTED, REFUSED, DECEASED, REFUSED_HTC, ELIGIBLE, INELIGIBLE]:
-            self.final = True
-        else:
-            self.final = False
+                absent_member = household_member.absentmember_set.all().order_by(
+                    'report_date').last()
+                undecided_member = household_member.undecidedmember_set.all().order_by(
+                    'report_date').last()
+                participation_status = absent_or_undecided(
+                    last_absent_date=getattr(absent_member, 'report_date', None),
+                    last_undecided_date=getattr(undecided_member, 'report_date', None))
+        return participation_status
 
     def get_display(self):
         return ' '.join(self.participation_status.split('_')).lower().capitalize()
+
+
+class ParticipationStatuses:
+    """Resolves the participation status of many household members
+    in a fixed number of queries.
+
+    Pass either a list or queryset of household members or a list
+    of household structures (or their ids). All queries are run on
+    `using`, by default the database of the household members
+    queryset.
+
+    Usage:
+        statuses = ParticipationStatuses(household_structures=[...])
+        statuses.get(household_member.pk).participation_status
+    """
+
+    household_member_model = 'member.householdmember'
+
+    def __init__(self, household_members=None, household_structures=None,
+                 using=None):
+        if household_members is None:
+            household_structure_ids = [
+                getattr(obj, 'pk', obj) for obj in household_structures or []]
+            household_members = django_apps.get_model(
+                *self.household_member_model.split('.')).objects.using(
+                    using).filter(
+                        household_structure__in=household_structure_ids).select_related(
+                            'household_structure__household')
+        elif hasattr(household_members, 'select_related'):
+            using = using or household_members.db
+            household_members = household_members.using(using).select_related(
+                'household_structure__household')
+        self.using = using
+        self.household_members = list(household_members)
+        self._statuses = {}
+        pks = [obj.pk for obj in self.household_members]
+        if pks:
+            consented = self.get_consented(self.household_members, using=using)
+            reports = self.get_reports(pks, using=using)
+            for household_member in self.household_members:
+                self._statuses.update({
+                    household_member.pk: ParticipationStatus(
+                        participation_status=self.resolve(
+                            household_member, consented, reports))})
+
+    def __getitem__(self, pk):
+        return self._statuses[pk]
+
+    def __iter__(self):
+        return iter(self._statuses.items())
+
+    def __len__(self):
+        return len(self._statuses)
+
+    def get(self, pk, default=None):
+        return self._statuses.get(pk, default)
+
+    @staticmethod
+    def resolve(household_member, consented, reports):
+        """Returns the participation status for one member using the
+        prefetched data, same order of precedence as
+        ParticipationStatus.
+        """
+        pk = household_member.pk
+        if pk in consented:
+            return CONSENTED
+        elif pk in reports['enrollmentchecklist']:
+            if reports['enrollmentchecklist'][pk]:
+                return ELIGIBLE
+            return INELIGIBLE
+        for name, status in [('deceasedmember', DECEASED),
+                             ('htcmember', HTC_ELIGIBLE),
+                             ('movedmember', MOVED),
+                             ('refusedmember', REFUSED)]:
+            if pk in reports[name]:
+                return status
+        return absent_or_undecided(
+            last_absent_date=reports['absentmember'].get(pk),
+            last_undecided_date=reports['undecidedmember'].get(pk))
+
+    @staticmethod
+    def get_reports(pks, using=None):
+        """Returns a dictionary of prefetched member reports
+        by model_name.
+        """
+        reports = {}
+        model = django_apps.get_model('member', 'enrollmentchecklist')
+        reports['enrollmentchecklist'] = dict(
+            model.objects.using(using).filter(household_member__in=pks).values_list(
+                'household_member', 'is_eligible'))
+        for model_name in ['deceasedmember', 'htcmember', 'movedmember',
+                           'refusedmember']:
+            model = django_apps.get_model('member', model_name)
+            reports[model_name] = set(
+                model.objects.using(using).filter(household_member__in=pks).values_list(
+                    'household_member', flat=True))
+        for model_name in ['absentmember', 'undecidedmember']:
+            model = django_apps.get_model('member', model_name)
+            reports[model_name] = dict(
+                model.objects.using(using).filter(household_member__in=pks).values(
+                    'household_member').annotate(
+                        last_report_date=Max('report_date')).values_list(
+                            'household_member', 'last_report_date'))
+        return reports
+
+    @staticmethod
+    def get_consented(household_members, using=None):
+        """Returns a set of pks of members that are consented.
+
+        Runs one query per consent model and version.
+        """
+        from .models.household_member.consent_model_mixin import prefetch_consents
+
+        return {
+            household_member.pk for household_member in prefetch_consents(
+                household_members, using=using) if household_member.is_consented}
+
+
+def annotate_participation_status(queryset, name=None, apps=None,
+                                  lookup_consents=True):
+    """Returns a household member queryset annotated with the
+    participation status, as computed by ParticipationStatus, and
+    `<name>_final`.
+
+    The default name is `computed_member_status`. Uses Exists and
+    Subquery expressions so the status can be filtered, ordered and
+    aggregated in the database.
+
+    `apps` is the app registry to get the member report models from,
+    e.g. the historical apps of a data migration. Consent models
+    whose table does not exist yet are then left out. If not
+    `lookup_consents`, CONSENTED is left to the caller.
+    """
+    from edc_consent.site_consents import site_consents
+    from .utils import get_anonymous_plot_pk
+
+    name = name or 'computed_member_status'
+    consents = site_consents.consents if lookup_consents else []
+    if apps:
+        table_names = connections[queryset.db].introspection.table_names()
+        consents = [
+            consent_object for consent_object in consents
+            if consent_object.model._meta.db_table in table_names]
+    apps = apps or django_apps
+    anonymous_consent_group = django_apps.get_app_config(
+        'bcpp_consent').anonymous_consent_group
+    anonymous = Q(household_structure__household__plot_id=get_anonymous_plot_pk())
+
+    def exists(model_name, **options):
+        model = apps.get_model('member', model_name)
+        return Exists(model.objects.filter(household_member=OuterRef('pk'), **options))
+
+    def last_report_date(model_name):
+        model = apps.get_model('member', model_name)
+        return Subquery(model.objects.filter(
+            household_member=OuterRef('pk')).order_by(
+                '-report_date').values('report_date')[:1])
+
+    annotations = dict(
+        ps_enrollment_checklist=exists('enrollmentchecklist'),
+        ps_eligible=exists('enrollmentchecklist', is_eligible=True),
+        ps_deceased=exists('deceasedmember'),
+        ps_htc=exists('htcmember'),
+        ps_moved=exists('movedmember'),
+        ps_refused=exists('refusedmember'),
+        ps_last_absent=last_report_date('absentmember'),
+        ps_last_undecided=last_report_date('undecidedmember'))
+    # consented if eligible_subject and a consent exists for the consent
+    # valid for the member's report_datetime and consent group.
+    consented = []
+    for index, consent_object in enumerate(consents):
+        annotation = f'ps_consent_{index}'
+        annotations.update({annotation: Exists(consent_object.model.objects.filter(
+            version=consent_object.version,
+            subject_identifier=OuterRef('subject_identifier')))})
+        consented.append(
+            Q(**{annotation: True},
+              report_datetime__gte=consent_object.start,
+              report_datetime__lte=consent_object.end)
+            & (anonymous if consent_object.consent_group == anonymous_consent_group
+               else ~anonymous))
+    whens = []
+    if consented:
+        whens.append(When(
+            Q(eligible_subject=True) & reduce(or_, consented), then=Value(CONSENTED)))
+    whens.extend([
+        When(ps_eligible=True, then=Value(ELIGIBLE)),
+        When(ps_enrollment_checklist=True, then=Value(INELIGIBLE)),
+        When(ps_deceased=True, then=Value(DECEASED)),
+        When(ps_htc=True, then=Value(HTC_ELIGIBLE)),
+        When(ps_moved=True, then=Value(MOVED)),
+        When(ps_refused=True, then=Value(REFUSED)),
+        When(Q(ps_last_undecided__isnull=False) & (
+            Q(ps_last_absent__isnull=True)
+            | Q(ps_last_undecided__gte=F('ps_last_absent'))), then=Value(UNDECIDED)),
+        When(ps_last_absent__isnull=False, then=Value(ABSENT))])
+    return queryset.annotate(**annotations).annotate(**{
+        name: Case(*whens, default=Value(AVAILABLE), output_field=CharField())}).annotate(**{
+            f'{name}_final': Case(
+                When(**{f'{name}__in': FINAL_STATUSES}, then=Value(True)),
+                default=Value(False), output_field=BooleanField())})
+
+
+def get_member_status(household_member, using=None):
+    """Returns a tuple of (member_status, member_status_final) for a
+    saved household member computed in the database in one query,
+    or None if the member does not exist.
+
+    See `annotate_participation_status`.
+    """
+    return annotate_participation_status(
+        household_member.__class__.objects.using(using).filter(
+            pk=household_member.pk)).values_list(
+                'computed_member_status', 'computed_member_status_final').first()
+
+
+def update_member_statuses(household_members=None, verify_only=None, chunk_size=None,
+                           reporter=None):
+    """Compares the persisted member_status/member_status_final
+    against the live computation and, unless verify_only, updates
+    rows that differ.
+
+    If `reporter`, each chunk adds its members checked and
+    mismatched to the ProgressReporter.
+
+    Returns a tuple of (checked, mismatched).
+    """
+    chunk_size = chunk_size or 500
+    using = household_members.db
+    household_structure_ids = list(
+        household_members.order_by().values_list(
+            'household_structure', flat=True).distinct())
+    checked = 0
+    mismatched = 0
+    for index in range(0, len(household_structure_ids), chunk_size):
+        statuses = ParticipationStatuses(
+            household_members=household_members.filter(
+                household_structure__in=household_structure_ids[
+                    index:index + chunk_size]),
+            using=using)
+        changes = {}
+        chunk_mismatched = 0
+        for household_member in statuses.household_members:
+            checked += 1
+            participation_status = statuses[household_member.pk]
+            value = (participation_status.participation_status,
+                     participation_status.final)
+            if (household_member.member_status,
+                    household_member.member_status_final) != value:
+                changes.setdefault(value, []).append(household_member.pk)
+                chunk_mismatched += 1
+        mismatched += chunk_mismatched
+        if reporter:
+            reporter.add(len(statuses.household_members), mismatched=chunk_mismatched)
+        if not verify_only:
+            for (member_status, member_status_final), pks in changes.items():
+                household_members.model.objects.using(using).filter(
+                    pk__in=pks).update(
+                        member_status=member_status,
+                        member_status_final=member_status_final)
+    return checked, mismatched
+
+
+def backfill_member_statuses(household_members=None, chunk_size=None, apps=None):
+    """Sets `member_status` and `member_status_final` of the household
+    members to the status computed in the database, with one update
+    per chunk and status.
+
+    `apps` is the app registry of a data migration, see
+    `annotate_participation_status`.
+
+    Returns the number of household members updated.
+    """
+    chunk_size = chunk_size or 500
+    using = household_members.db
+    updated = 0
+    rows = annotate_participation_status(
+        household_members.order_by(), apps=apps).values_list(
+            'pk', 'member_status', 'member_status_final',
+            'computed_member_status', 'computed_member_status_final').iterator()
+    for chunk in chunked(rows, chunk_size):
+        changes = {}
+        for pk, member_status, member_status_final, *value in chunk:
+            if (member_status, member_status_final) != tuple(value):
+                changes.setdefault(tuple(value), []).append(pk)
+        for (member_status, member_status_final), pks in changes.items():
+            household_members.model.objects.using(using).filter(
+                pk__in=pks).update(
+                    member_status=member_status,
+                    member_status_final=member_status_final)
+            updated += len(pks)
+    return updated
@@ -0,0 +1,125 @@
+import re
+
+from django.apps import apps as django_apps
+from django.db import transaction
+from django.db.models import Q
+
+from .utils import chunked
+
+# {token field: household member lookup} of the values indexed,
+# see also SearchSlugModelMixin.get_search_slug_fields.
+search_token_fields = {
+    'household_identifier': 'household_structure__household__household_identifier',
+    'plot_identifier': 'household_structure__household__plot__plot_identifier',
+    'map_area': 'household_structure__household__plot__map_area',
+    'subject_identifier': 'subject_identifier',
+    'internal_identifier': 'internal_identifier',
+    'initials': 'initials'}
+
+min_segment_length = 3
+max_token_length = 64
+
+
+def normalize(value):
+    """Returns value in lower case without separators.
+    """
+    return re.sub(r'[^0-9a-z]', '', str(value).lower())[:max_token_length]
+
+
+def tokenize(value):
+    """Returns the set of tokens for a value: the normalized value
+    and, for values with separators, each segment.
+
+    For example, '066-12345678-9' gives {'066123456789', '066',
+    '12345678'}.
+    """
+    if value is None:
+        return set()
+    value = getattr(value, 'hex', value)
+    tokens = {normalize(value)}
+    segments = re.split(r'[^0-9a-zA-Z]+', str(value))
+    if len(segments) > 1:
+        tokens.update(
+            normalize(segment) for segment in segments
+            if len(segment) >= min_segment_length)
+    tokens.discard('')
+    return tokens
+
+
+def get_search_tokens(pks):
+    """Returns a dictionary of {pk: set of (field, token)} for the
+    household members in one query.
+    """
+    model = django_apps.get_model('member', 'householdmember')
+    search_tokens = {}
+    for row in model.objects.filter(pk__in=pks).values(
+            'pk', *search_token_fields.values()):
+        search_tokens[row['pk']] = {
+            (field, token)
+            for field, lookup in search_token_fields.items()
+            for token in tokenize(row[lookup])}
+    return search_tokens
+
+
+def update_search_tokens(pks=None, chunk_size=None, reporter=None):
+    """Adds and removes search tokens for the household members so
+    they match the indexed values.
+
+    If `reporter`, each chunk adds its members to the
+    ProgressReporter.
+
+    Returns a tuple of (added, removed) counts.
+    """
+    model = django_apps.get_model('member', 'householdmembersearchtoken')
+    chunk_size = chunk_size or 1000
+    added = 0
+    removed = 0
+    for chunk in chunked(pks, chunk_size):
+        expected = get_search_tokens(chunk)
+        existing = {}
+        for pk, household_member_id, field, token in model.objects.filter(
+                household_member__in=chunk).values_list(
+                    'pk', 'household_member', 'field', 'token'):
+            existing.setdefault(household_member_id, {})[(field, token)] = pk
+        to_remove = []
+        to_add = []
+        for pk in chunk:
+            tokens = existing.get(pk, {})
+            to_remove.extend(
+                token_pk for key, token_pk in tokens.items()
+                if key not in expected.get(pk, set()))
+            to_add.extend(
+                model(household_member_id=pk, field=field, token=token)
+                for field, token in expected.get(pk, set()) - set(tokens))
+        with transaction.atomic():
+            model.objects.filter(pk__in=to_remove).delete()
+            model.objects.bulk_create(to_add, batch_size=chunk_size)
+        added += len(to_add)
+        removed += len(to_remove)
+        if reporter:
+            reporter.add(len(chunk), added=len(to_add), removed=len(to_remove))
+    return added, removed
+
+
+def update_stale_search_tokens(household_members=None, **values):
+    """Updates the search tokens of the household members, a
+    queryset, that miss the token of any of `values`, a dictionary
+    of {token field: current value}, e.g. after a plot identifier
+    changed.
+
+    Runs one query if no tokens are stale. Returns a tuple of
+    (added, removed) counts.
+    """
+    model = django_apps.get_model('member', 'householdmembersearchtoken')
+    missing = Q()
+    for field, value in values.items():
+        if value is not None:
+            missing |= ~Q(pk__in=model.objects.filter(
+                field=field, token=normalize(getattr(value, 'hex', value))).values(
+                    'household_member'))
+    if not missing:
+        return 0, 0
+    pks = list(household_members.filter(missing).values_list('pk', flat=True))
+    if not pks:
+        return 0, 0
+    return update_search_tokens(pks)
@@ -4,16 +4,29 @@ from django.dispatch import receiver
 from .constants import HEAD_OF_HOUSEHOLD
 from .models import (
     AbsentMember, EnrollmentChecklist, EnrollmentLoss,
-    HouseholdHeadEligibility, HouseholdMember,
+    HouseholdHeadEligibility, HouseholdMember, HtcMember,
     RefusedMember, UndecidedMember, DeceasedMember, MovedMember)
+from .instrumentation import instrumented
+from .member_updates import save_member_fields, update_member_fields
+from .models.household_member.consent_model_mixin import clear_consent_cache
+from .search_index import update_search_tokens, update_stale_search_tokens
+from .utils import clear_anonymous_plot_pk
 from member.models.enrollment_checklist_anonymous import EnrollmentChecklistAnonymous
+from edc_consent.site_consents import site_consents
 from edc_constants.constants import NOT_APPLICABLE, NO
+from household.models import Household
+from plot.models import Plot
 
 
 @receiver(post_save, weak=False, sender=HouseholdMember,
           dispatch_uid="household_member_on_post_save")
+@instrumented
 def household_member_on_post_save(sender, instance, raw, created, using, **kwargs):
-    """Updates enumerated, eligible_members on household structure.
+    """Updates enumerated, eligible_members on household structure
+    and search tokens.
+
+    The member status is set by save(), see
+    HouseholdMember.refresh_maintained_fields.
     """
     if not raw:
         if created:
@@ -27,10 +40,12 @@ def household_member_on_post_save(sender, instance, raw, created, using, **kwarg
         if instance.has_moved in [NO, NOT_APPLICABLE]:
             MovedMember.objects.filter(
                 household_member=instance).delete()
+        update_search_tokens([instance.pk])
 
 
 @receiver(post_delete, weak=False, sender=HouseholdMember,
           dispatch_uid="household_member_on_post_delete")
+@instrumented
 def household_member_on_post_delete(sender, instance, using, **kwargs):
     if not instance.household_structure.householdmember_set.exclude(
             id=instance.id).exists():
@@ -41,130 +56,156 @@ def household_member_on_post_delete(sender, instance, using, **kwargs):
 
 @receiver(post_save, weak=False, sender=HouseholdHeadEligibility,
           dispatch_uid='household_head_eligibility_on_post_save')
+@instrumented
 def household_head_eligibility_on_post_save(
         sender, instance, raw, created, using, **kwargs):
     if not raw:
         if instance.household_member.relation == HEAD_OF_HOUSEHOLD:
-            instance.household_member.eligible_hoh = True
-            instance.household_member.save()
+            save_member_fields(
+                instance.household_member, eligible_hoh=True, using=using)
+
+
+@receiver(post_save, weak=False, sender=HtcMember,
+          dispatch_uid="htc_member_on_post_save")
+@instrumented
+def htc_member_on_post_save(sender, instance, raw, created, using, **kwargs):
+    if not raw:
+        update_member_fields(
+            instance.household_member, update_status=True, using=using)
+
+
+@receiver(post_delete, weak=False, sender=HtcMember,
+          dispatch_uid="htc_member_on_post_delete")
+@instrumented
+def htc_member_on_post_delete(sender, instance, using, **kwargs):
+    update_member_fields(
+        instance.household_member, update_status=True, using=using)
+
+
+@receiver(post_delete, weak=False, sender=EnrollmentChecklist,
+          dispatch_uid="enrollment_checklist_on_post_delete")
+@instrumented
+def enrollment_checklist_on_post_delete(sender, instance, using, **kwargs):
+    update_member_fields(
+        instance.household_member, update_status=True, using=using)
 
 
 @receiver(post_save, weak=False, sender=EnrollmentLoss,
           dispatch_uid="enrollment_loss_on_post_save")
+@instrumented
 def enrollment_loss_on_post_save(sender, instance, raw, created, using, **kwargs):
     if not raw:
-        instance.household_member.enrollment_loss_completed = True
-        instance.household_member.save()
+        save_member_fields(
+            instance.household_member, enrollment_loss_completed=True, using=using)
 
 
 @receiver(post_delete, weak=False, sender=EnrollmentLoss,
           dispatch_uid="enrollment_loss_on_post_delete")
+@instrumented
 def enrollment_loss_on_post_delete(sender, instance, using, **kwargs):
-    instance.household_member.enrollment_loss_completed = False
-    instance.household_member.save()
+    save_member_fields(
+        instance.household_member, enrollment_loss_completed=False, using=using)
 
 
 @receiver(post_save, weak=False, sender=AbsentMember,
           dispatch_uid="absent_member_on_post_save")
+@instrumented
 def absent_member_on_post_save(sender, instance, raw, created, using, **kwargs):
     if not raw:
-        if created:
-            instance.household_member.visit_attempts += 1
-        instance.household_member.absent = True
-        instance.household_member.save()
+        update_member_fields(
+            instance.household_member,
+            increments=(
+                dict(visit_attempts=1, absent_count=1) if created else None),
+            update_status=True, using=using)
 
 
 @receiver(post_delete, weak=False, sender=AbsentMember,
           dispatch_uid="absent_member_on_post_delete")
+@instrumented
 def absent_member_on_post_delete(sender, instance, using, **kwargs):
-    instance.household_member.visit_attempts -= 1
-    if instance.household_member.visit_attempts < 0:
-        instance.household_member.visit_attempts = 0
-    if instance.household_member.absentmember_set.all().count() == 0:
-        instance.household_member.absent = False
-    instance.household_member.save()
+    update_member_fields(
+        instance.household_member,
+        increments=dict(visit_attempts=-1, absent_count=-1), using=using)
 
 
 @receiver(post_save, weak=False, sender=UndecidedMember,
           dispatch_uid="undecided_member_on_post_save")
+@instrumented
 def undecided_member_on_post_save(sender, instance, raw, created, using, **kwargs):
     if not raw:
-        if created:
-            instance.household_member.visit_attempts += 1
-        instance.household_member.undecided = True
-        instance.household_member.save()
+        update_member_fields(
+            instance.household_member,
+            increments=(
+                dict(visit_attempts=1, undecided_count=1) if created else None),
+            update_status=True, using=using)
 
 
-@receiver(post_delete, weak=False, sender=AbsentMember,
+@receiver(post_delete, weak=False, sender=UndecidedMember,
           dispatch_uid="undecided_member_on_post_delete")
+@instrumented
 def undecided_member_on_post_delete(sender, instance, using, **kwargs):
-    instance.household_member.visit_attempts -= 1
-    if instance.household_member.visit_attempts < 0:
-        instance.household_member.visit_attempts = 0
-    if instance.household_member.undecidedmember_set.all().count() == 0:
-        instance.household_member.undecided = False
-    instance.household_member.save()
+    update_member_fields(
+        instance.household_member,
+        increments=dict(visit_attempts=-1, undecided_count=-1), using=using)
 
 
 @receiver(post_delete, weak=False, sender=RefusedMember,
           dispatch_uid="refused_member_on_post_delete")
+@instrumented
 def refused_member_on_post_delete(sender, instance, using, **kwargs):
-    instance.household_member.visit_attempts -= 1
-    if instance.household_member.visit_attempts < 0:
-        instance.household_member.visit_attempts = 0
-    instance.household_member.refused = False
-    instance.household_member.save()
+    update_member_fields(
+        instance.household_member, increments=dict(visit_attempts=-1),
+        refused=False, using=using)
 
 
 @receiver(post_save, weak=False, sender=RefusedMember,
           dispatch_uid="refused_member_on_post_save")
+@instrumented
 def refused_member_on_post_save(sender, instance, raw, created, using, **kwargs):
     if not raw:
-        if created:
-            instance.household_member.visit_attempts += 1
-        instance.household_member.refused = True
-        instance.household_member.save()
+        update_member_fields(
+            instance.household_member,
+            increments=dict(visit_attempts=1) if created else None, refused=True, using=using)
 
 
 @receiver(post_delete, weak=False, sender=DeceasedMember,
           dispatch_uid="deceased_member_on_post_delete")
+@instrumented
 def deceased_member_on_post_delete(sender, instance, using, **kwargs):
-    instance.household_member.visit_attempts -= 1
-    if instance.household_member.visit_attempts < 0:
-        instance.household_member.visit_attempts = 0
-    instance.household_member.save()
+    update_member_fields(
+        instance.household_member, increments=dict(visit_attempts=-1), using=using)
 
 
 @receiver(post_save, weak=False, sender=DeceasedMember,
           dispatch_uid="deceased_member_on_post_save")
+@instrumented
 def deceased_member_on_post_save(sender, instance, raw, created, using, **kwargs):
-    if not raw:
-        if created:
-            instance.household_member.visit_attempts += 1
-        instance.household_member.save()
+    if not raw and created:
+        update_member_fields(
+            instance.household_member, increments=dict(visit_attempts=1), using=using)
 
 
 @receiver(post_save, weak=False, sender=MovedMember,
           dispatch_uid="moved_member_on_post_save")
+@instrumented
 def moved_member_on_post_save(sender, instance, raw, created, using, **kwargs):
-    if not raw:
-        if created:
-            instance.household_member.visit_attempts += 1
-            instance.household_member.moved = True
-        instance.household_member.save()
+    if not raw and created:
+        update_member_fields(
+            instance.household_member, increments=dict(visit_attempts=1),
+            moved=True, using=using)
 
 
 @receiver(post_delete, weak=False, sender=MovedMember,
           dispatch_uid="moved_member_on_post_delete")
+@instrumented
 def moved_member_on_post_delete(sender, instance, using, **kwargs):
-    instance.household_member.visit_attempts -= 1
-    if instance.household_member.visit_attempts < 0:
-        instance.household_member.visit_attempts = 0
-        instance.household_member.moved = False
-    instance.household_member.save()
+    update_member_fields(
+        instance.household_member, increments=dict(visit_attempts=-1),
+        moved=False, using=using)
 
 
 @receiver(post_save, weak=False, dispatch_uid="enrollment_checklist_on_post_save")
+@instrumented
 def enrollment_checklist_on_post_save(
         sender, instance, raw, created, using, **kwargs):
     """Updates adds or removes the Loss form.
@@ -184,11 +225,76 @@ def enrollment_checklist_on_post_save(
                         report_datetime=instance.report_datetime,
                         reason=instance.loss_reason)
                     enrollment_loss.save()
-                instance.household_member.eligible_subject = False
-
+                eligible_subject = False
             else:
                 enrollment_loss = EnrollmentLoss.objects.filter(
                     household_member=instance.household_member).delete()
-                instance.household_member.eligible_subject = True
-            instance.household_member.enrollment_checklist_completed = True
-            instance.household_member.save()
+                eligible_subject = True
+            save_member_fields(
+                instance.household_member, eligible_subject=eligible_subject,
+                enrollment_checklist_completed=True, using=using)
+
+
+def update_consented_member_statuses(consent, using=None):
+    """Invalidates the cached consents and updates the member status
+    of the household members of the subject of a consent model
+    instance.
+    """
+    clear_consent_cache()
+    for household_member in HouseholdMember.objects.using(using).filter(
+            subject_identifier=consent.subject_identifier):
+        update_member_fields(household_member, update_status=True, using=using)
+
+
+@receiver(post_save, weak=False, dispatch_uid="consent_on_post_save")
+@instrumented
+def consent_on_post_save(sender, instance, raw, created, using, **kwargs):
+    if not raw:
+        if sender in [consent_object.model for consent_object in site_consents.consents]:
+            update_consented_member_statuses(instance, using=using)
+
+
+@receiver(post_delete, weak=False, dispatch_uid="consent_on_post_delete")
+@instrumented
+def consent_on_post_delete(sender, instance, using, **kwargs):
+    if sender in [consent_object.model for consent_object in site_consents.consents]:
+        update_consented_member_statuses(instance, using=using)
+
+
+@receiver(post_save, weak=False, sender=Plot,
+          dispatch_uid="plot_on_post_save")
+@instrumented
+def plot_on_post_save(sender, instance, raw, created, using, **kwargs):
+    """Clears the cached anonymous plot pk, since any saved plot
+    may have become or stopped being the anonymous plot, and
+    updates the search tokens of its members if the plot
+    identifier or map area changed.
+    """
+    clear_anonymous_plot_pk()
+    if not raw and not created:
+        update_stale_search_tokens(
+            household_members=HouseholdMember.objects.using(using).filter(
+                household_structure__household__plot=instance),
+            plot_identifier=instance.plot_identifier,
+            map_area=instance.map_area)
+
+
+@receiver(post_save, weak=False, sender=Household,
+          dispatch_uid="household_on_post_save")
+@instrumented
+def household_on_post_save(sender, instance, raw, created, using, **kwargs):
+    """Updates the search tokens of the household's members if the
+    household identifier changed.
+    """
+    if not raw and not created:
+        update_stale_search_tokens(
+            household_members=HouseholdMember.objects.using(using).filter(
+                household_structure__household=instance),
+            household_identifier=instance.household_identifier)
+
+
+@receiver(post_delete, weak=False, sender=Plot,
+          dispatch_uid="plot_on_post_delete")
+@instrumented
+def plot_on_post_delete(sender, instance, using, **kwargs):
+    clear_anonymous_plot_pk(plot_pk=instance.pk)
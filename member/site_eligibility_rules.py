@@ -0,0 +1,214 @@
+from functools import reduce
+from operator import and_, or_, eq, ne, lt, le, gt, ge
+
+from django.db.models import BooleanField, Case, Q, Value, When
+
+from .exceptions import EligibilityRuleError
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+python_operators = {
+    'exact': eq, 'ne': ne, 'lt': lt, 'lte': le, 'gt': gt, 'gte': ge,
+    'in': lambda a, b: a in b,
+    'not_in': lambda a, b: a not in b}
+
+
+def array_operator(lookup):
+    if lookup == 'in':
+        return np.isin
+    elif lookup == 'not_in':
+        return lambda a, b: np.isin(a, b, invert=True)
+    return python_operators[lookup]
+
+
+def condition_q(field, lookup, value):
+    if lookup == 'ne':
+        return ~Q(**{field: value})
+    elif lookup == 'not_in':
+        return ~Q(**{f'{field}__in': value})
+    return Q(**{f'{field}__{lookup}': value})
+
+
+class Rule:
+
+    """A named rule that applies if all of the (field, lookup, value)
+    conditions of any one of its alternatives are True.
+
+    Lookups are: exact, ne, lt, lte, gt, gte, in and not_in.
+    """
+
+    def __init__(self, name, conditions=None, any_of=None, reason=None, flags=None):
+        self.name = name
+        self.alternatives = any_of or [conditions]
+        self.reason = reason or name
+        self.flags = flags or []
+        self.predicate = None
+        for conditions in self.alternatives:
+            for _, lookup, _ in conditions:
+                if lookup not in python_operators:
+                    raise EligibilityRuleError(
+                        f'Invalid lookup for rule {name}. Got {lookup}.')
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({self.name})'
+
+    def compile(self):
+        """Sets `predicate` to a closure that returns True if the rule
+        applies to an object's attributes.
+        """
+        alternatives = [
+            [(field, python_operators[lookup],
+              frozenset(value) if lookup in ['in', 'not_in'] else value)
+             for field, lookup, value in conditions]
+            for conditions in self.alternatives]
+
+        def predicate(obj):
+            return any(
+                all(op(getattr(obj, field), value) for field, op, value in conditions)
+                for conditions in alternatives)
+        self.predicate = predicate
+
+    def applies(self, obj):
+        if not self.predicate:
+            self.compile()
+        return self.predicate(obj)
+
+    def q(self, field_names=None):
+        """Returns a Q object that is True where the rule applies.
+
+        `field_names` maps condition fields to query field names.
+        """
+        field_names = field_names or {}
+        return reduce(or_, [
+            reduce(and_, [
+                condition_q(field_names.get(field, field), lookup, value)
+                for field, lookup, value in conditions])
+            for conditions in self.alternatives])
+
+    def mask(self, columns):
+        """Returns a boolean NumPy array that is True where the rule
+        applies to a dictionary of NumPy arrays.
+        """
+        return reduce(or_, [
+            reduce(and_, [
+                array_operator(lookup)(columns[field], value)
+                for field, lookup, value in conditions])
+            for conditions in self.alternatives])
+
+
+class RuleSet:
+
+    """An ordered set of rules, for example, each rule a reason for
+    not being eligible.
+
+    `field_names` maps the rule fields to query field names and
+    `annotations` are queryset annotations, by name, the rules refer
+    to. Both are only used to query.
+    """
+
+    def __init__(self, name, rules=None, field_names=None, annotations=None):
+        self.name = name
+        self.rules = rules or []
+        self.field_names = field_names or {}
+        self.annotations = annotations or {}
+        self.registry = {rule.name: rule for rule in self.rules}
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({self.name})'
+
+    def __iter__(self):
+        return iter(self.rules)
+
+    def compile(self):
+        for rule in self.rules:
+            rule.compile()
+
+    def applies(self, name, obj):
+        """Returns True if the named rule applies to obj.
+        """
+        return self.registry[name].applies(obj)
+
+    def applied(self, obj):
+        """Returns the list of rules that apply to obj.
+        """
+        return [rule for rule in self.rules if rule.applies(obj)]
+
+    def reasons(self, obj):
+        return [rule.reason for rule in self.applied(obj)]
+
+    def none_apply(self, obj):
+        """Returns True if no rule applies to obj, evaluating the
+        rules in order and stopping at the first that applies.
+        """
+        return not any(rule.applies(obj) for rule in self.rules)
+
+    def q(self):
+        """Returns a Q object that is True where no rule applies.
+        """
+        q = Q()
+        for rule in self.rules:
+            q &= ~rule.q(field_names=self.field_names)
+        return q
+
+    def annotate(self, queryset):
+        """Returns the queryset annotated with a boolean per rule,
+        named `<rule set>_<rule>`, and `<rule set>_none_apply`.
+
+        For example, "which members are not eligible and why" is a
+        single query.
+        """
+        queryset = queryset.annotate(
+            **{name: expression() for name, expression in self.annotations.items()})
+        return queryset.annotate(**{
+            f'{self.name}_{rule.name}': Case(
+                When(rule.q(field_names=self.field_names), then=Value(True)),
+                default=Value(False), output_field=BooleanField())
+            for rule in self.rules}).annotate(**{
+                f'{self.name}_none_apply': Case(
+                    When(self.q(), then=Value(True)),
+                    default=Value(False), output_field=BooleanField())})
+
+    def filter(self, queryset):
+        """Returns the queryset filtered for rows where no rule applies.
+        """
+        return queryset.annotate(
+            **{name: expression() for name, expression in self.annotations.items()}
+        ).filter(self.q())
+
+
+class SiteEligibilityRules:
+
+    """A registry of rule sets, compiled once by the member
+    AppConfig.ready().
+    """
+
+    def __init__(self):
+        self.registry = {}
+        self.compiled = False
+
+    def register(self, rule_set):
+        if rule_set.name in self.registry:
+            raise EligibilityRuleError(
+                f'Rule set already registered. Got {rule_set.name}.')
+        self.registry.update({rule_set.name: rule_set})
+        self.compiled = False
+
+    def get(self, name):
+        try:
+            return self.registry[name]
+        except KeyError:
+            raise EligibilityRuleError(
+                f'Rule set not registered. Expected one of '
+                f'{list(self.registry)}. Got {name}.')
+
+    def compile(self):
+        for rule_set in self.registry.values():
+            rule_set.compile()
+        self.compiled = True
+
+
+site_eligibility_rules = SiteEligibilityRules()
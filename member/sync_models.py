@@ -4,10 +4,14 @@ from edc_base.model_mixins import ListModelMixin
 from edc_sync.site_sync_models import site_sync_models
 from edc_sync.sync_model import SyncModel
 
+# derived models, maintained on each device
+exclude_models = ['member.householdmembersearchtoken']
+
 sync_models = []
 app = django_apps.get_app_config('member')
 for model in app.get_models():
-    if not issubclass(model, ListModelMixin):
+    if (not issubclass(model, ListModelMixin)
+            and model._meta.label_lower not in exclude_models):
         sync_models.append(model._meta.label_lower)
 
 site_sync_models.register(sync_models, SyncModel)
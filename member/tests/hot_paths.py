@@ -0,0 +1,357 @@
+"""Query count and wall time of the member hot paths and management
+commands on synthetic households built with MemberTestHelper, run in
+a test database by the `benchmark_member` management command, for
+example:
+
+    python manage.py benchmark_member --sizes 10 100 1000 --output baseline.json
+    python manage.py benchmark_member --sizes 10 100 1000 --compare baseline.json
+"""
+import string
+import tempfile
+import time
+
+from contextlib import contextmanager
+from io import StringIO
+
+from django.apps import apps as django_apps
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from model_mommy import mommy
+
+from edc_constants.constants import ALIVE, FEMALE, MALE, YES
+from edc_map.site_mappers import site_mappers
+from edc_registration.models import RegisteredSubject
+from household.models import HouseholdStructure
+from survey.tests import SurveyTestHelper
+
+from ..bulk_clone import bulk_clone_members
+from ..constants import ABLE_TO_PARTICIPATE
+from ..management.commands.load_member_data import import_rows, spool_rows
+from ..management.commands.update_registration_identifier import (
+    update_plot_registration_identifiers)
+from ..models import HouseholdMember
+from ..participation_status import ParticipationStatus, ParticipationStatuses
+from .mappers import TestMapper
+from .member_test_helper import MemberTestHelper
+
+# fail a comparison if a benchmark is this much slower than its
+# baseline and by at least `min_seconds`.
+default_tolerance = 0.25
+default_min_seconds = 0.005
+
+benchmarks = {}
+
+
+def benchmark(name, requires=None):
+    """Registers a benchmark function(household, measure).
+
+    The function calls `with measure():` around the code timed.
+    `requires` is a list of apps the benchmark is skipped without.
+    """
+    def register(function):
+        benchmarks[name] = (function, requires or [])
+        return function
+    return register
+
+
+def alpha(number):
+    """Returns number as capital letters for unique first names.
+    """
+    letters = ''
+    while True:
+        number, remainder = divmod(number, 26)
+        letters = string.ascii_uppercase[remainder] + letters
+        if not number:
+            return letters
+
+
+class SyntheticHousehold:
+
+    """A household structure ready for enumeration with a head of
+    household and `size` members in total.
+
+    Members other than the head of household are bulk enumerated.
+    """
+
+    member_helper = MemberTestHelper()
+
+    def __init__(self, size=None):
+        self.size = size
+        self.household_structure = self.member_helper.make_household_ready_for_enumeration(
+            make_hoh=True)
+        self.report_datetime = (
+            self.household_structure.householdlog.householdlogentry_set.all().order_by(
+                'report_datetime').last().report_datetime)
+        self.added = 0
+        HouseholdMember.objects.bulk_enumerate(
+            self.household_structure,
+            [self.member_values() for _ in range(size - 1)])
+
+    @property
+    def household_members(self):
+        return HouseholdMember.objects.filter(
+            household_structure=self.household_structure)
+
+    def member_values(self):
+        self.added += 1
+        return dict(
+            first_name=f'MEMBER{alpha(self.added)}',
+            initials='MX',
+            gender=FEMALE if self.added % 2 else MALE,
+            age_in_years=27,
+            survival_status=ALIVE,
+            study_resident=YES,
+            present_today=YES,
+            inability_to_participate=ABLE_TO_PARTICIPATE,
+            relation='cousin',
+            report_datetime=self.report_datetime)
+
+    def fresh_member(self):
+        """Returns a new member without reports, not measured.
+        """
+        return HouseholdMember.objects.create(
+            household_structure=self.household_structure, **self.member_values())
+
+
+@benchmark('household_member_create')
+def household_member_create(household, measure):
+    values = household.member_values()
+    with measure():
+        HouseholdMember.objects.create(
+            household_structure=household.household_structure, **values)
+
+
+@benchmark('household_member_save')
+def household_member_save(household, measure):
+    household_member = household.fresh_member()
+    with measure():
+        household_member.save()
+
+
+@benchmark('absent_member_save')
+def absent_member_save(household, measure):
+    household_member = household.fresh_member()
+    with measure():
+        mommy.make_recipe(
+            'member.absentmember', household_member=household_member,
+            report_datetime=household.report_datetime)
+
+
+@benchmark('undecided_member_save')
+def undecided_member_save(household, measure):
+    household_member = household.fresh_member()
+    with measure():
+        mommy.make_recipe(
+            'member.undecidedmember', household_member=household_member,
+            report_datetime=household.report_datetime)
+
+
+@benchmark('refused_member_save')
+def refused_member_save(household, measure):
+    household_member = household.fresh_member()
+    with measure():
+        mommy.make_recipe(
+            'member.refusedmember', household_member=household_member,
+            report_datetime=household.report_datetime)
+
+
+@benchmark('enrollment_checklist_save')
+def enrollment_checklist_save(household, measure):
+    household_member = household.fresh_member()
+    with measure():
+        household.member_helper.add_enrollment_checklist(
+            household_member=household_member,
+            report_datetime=household.report_datetime)
+
+
+@benchmark('participation_status')
+def participation_status(household, measure):
+    household_member = household.household_members.first()
+    with measure():
+        ParticipationStatus(household_member).participation_status
+
+
+@benchmark('participation_statuses')
+def participation_statuses(household, measure):
+    with measure():
+        statuses = ParticipationStatuses(household_members=household.household_members)
+        [statuses[obj.pk].participation_status for obj in statuses.household_members]
+
+
+@benchmark('admin_changelist')
+def admin_changelist(household, measure):
+    user = User.objects.filter(username='benchmark').first()
+    if not user:
+        user = User.objects.create_superuser(
+            'benchmark', 'benchmark@example.com', 'benchmark')
+    client = Client()
+    client.force_login(user)
+    url = reverse('member_admin:member_householdmember_changelist')
+    with measure():
+        response = client.get(url)
+    assert response.status_code == 200, response.status_code
+
+
+@benchmark('update_household_work_list', requires=['bcpp_subject'])
+def update_household_work_list(household, measure):
+    from ..update_household_work_list import update_household_work_lists
+    with measure():
+        update_household_work_lists(household_structures=[household.household_structure])
+
+
+def command_benchmark(name, label=None, requires=None, **options):
+    @benchmark(f'command_{label or name}', requires=requires)
+    def run_command(household, measure):
+        map_area = household.household_structure.household.plot.map_area
+        with measure():
+            call_command(
+                name, map_area=map_area, progress_interval=0,
+                stdout=StringIO(), **options)
+    return run_command
+
+
+command_benchmark('update_member_status')
+command_benchmark(
+    'update_member_status', label='update_member_status_recount', recount=True)
+command_benchmark('update_eligible_members')
+command_benchmark('rebuild_member_search_index')
+
+
+@benchmark('command_load_member_data')
+def load_member_data(household, measure):
+    rows = [
+        (household_member.survey_schedule,
+         dict(subject_identifier=household_member.subject_identifier))
+        for household_member in household.household_members]
+    with tempfile.TemporaryDirectory() as spool_dir:
+        with measure():
+            paths = spool_rows(rows=rows, spool_dir=spool_dir)
+            import_rows(
+                model_label_lower='member.movedmember', paths=list(paths.values()),
+                verbosity=0)
+
+
+@benchmark('command_update_registration_identifier')
+def update_registration_identifier(household, measure):
+    plot = household.household_structure.household.plot
+    RegisteredSubject.objects.filter(subject_identifier__in=household.household_members.values(
+        'subject_identifier')).update(registration_identifier=None)
+    with measure():
+        update_plot_registration_identifiers(
+            map_area=plot.map_area, plot_identifiers=[plot.plot_identifier])
+
+
+@benchmark('command_clone_members')
+def clone_members(household, measure):
+    next_household_structure = household.member_helper.get_next_household_structure_ready(
+        household.household_structure, make_hoh=None)
+    with measure():
+        bulk_clone_members(
+            household_structures=HouseholdStructure.objects.filter(
+                pk=next_household_structure.pk),
+            previous_survey_schedule=household.household_structure.survey_schedule)
+
+
+@benchmark('command_delete_wrong_members', requires=['bcpp_subject'])
+def delete_wrong_members(household, measure):
+    from ..management.commands.delete_wrong_members import delete_household_members
+    plot = household.household_structure.household.plot
+    household.household_members.update(cloned=True)
+    with measure():
+        delete_household_members(
+            map_area=plot.map_area,
+            survey_schedule=household.household_structure.survey_schedule,
+            consent_version='1', plot_identifiers=[plot.plot_identifier],
+            verbosity=0)
+
+
+class Measure:
+
+    """Collects the query count and wall time of each `with measure()`
+    block of one benchmark run.
+    """
+
+    def __init__(self):
+        self.queries = 0
+        self.seconds = 0.0
+
+    @contextmanager
+    def __call__(self):
+        with CaptureQueriesContext(connection) as context:
+            start = time.perf_counter()
+            yield
+            self.seconds += time.perf_counter() - start
+        self.queries += len(context.captured_queries)
+
+
+def load_test_environment():
+    """Loads the test surveys and mapper as the member tests do.
+    """
+    SurveyTestHelper().load_test_surveys()
+    django_apps.app_configs['edc_device'].device_id = '99'
+    site_mappers.registry = {}
+    site_mappers.loaded = False
+    site_mappers.register(TestMapper)
+
+
+def run_benchmarks(sizes=None, repeat=None, names=None):
+    """Returns a dictionary of results by "<name>[<size>]" with the
+    query count of the last run and the fastest wall time of
+    `repeat` runs, or the reason a benchmark was skipped.
+
+    Each run is rolled back so every run of every benchmark starts
+    from the same synthetic household.
+    """
+    repeat = repeat or 3
+    results = {}
+    load_test_environment()
+    for size in sizes or [10]:
+        household = SyntheticHousehold(size=size)
+        for name, (function, requires) in benchmarks.items():
+            if names and name not in names:
+                continue
+            key = f'{name}[{size}]'
+            missing = [app for app in requires if not django_apps.is_installed(app)]
+            if missing:
+                results[key] = dict(skipped=f'requires {", ".join(missing)}')
+                continue
+            runs = []
+            for _ in range(repeat):
+                measure = Measure()
+                with transaction.atomic():
+                    function(household, measure)
+                    transaction.set_rollback(True)
+                runs.append(measure)
+            results[key] = dict(
+                size=size, queries=runs[-1].queries,
+                seconds=round(min(run.seconds for run in runs), 6))
+    return results
+
+
+def compare_results(results, baseline, tolerance=None, min_seconds=None):
+    """Returns a list of regressions of results against a baseline.
+
+    A benchmark regresses if it issues more queries than its
+    baseline or is slower by more than `tolerance` and `min_seconds`.
+    """
+    tolerance = default_tolerance if tolerance is None else tolerance
+    min_seconds = default_min_seconds if min_seconds is None else min_seconds
+    regressions = []
+    for key, result in sorted(results.items()):
+        expected = baseline.get(key)
+        if not expected or 'skipped' in result or 'skipped' in expected:
+            continue
+        if result['queries'] > expected['queries']:
+            regressions.append(
+                f'{key}: {result["queries"]} queries. '
+                f'Baseline {expected["queries"]}.')
+        if (result['seconds'] > expected['seconds'] * (1 + tolerance)
+                and result['seconds'] - expected['seconds'] > min_seconds):
+            regressions.append(
+                f'{key}: {result["seconds"]:.4f}s. '
+                f'Baseline {expected["seconds"]:.4f}s.')
+    return regressions
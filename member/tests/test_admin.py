@@ -0,0 +1,69 @@
+from django.apps import apps as django_apps
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from edc_map.site_mappers import site_mappers
+from survey.tests import SurveyTestHelper
+
+from ..admin_site import member_admin
+from ..models import AbsentMember, HouseholdMember
+from .mappers import TestMapper
+from .member_test_helper import MemberTestHelper
+
+
+class TestAdmin(TestCase):
+
+    member_helper = MemberTestHelper()
+    survey_helper = SurveyTestHelper()
+
+    def setUp(self):
+        self.survey_helper.load_test_surveys()
+        django_apps.app_configs['edc_device'].device_id = '99'
+        site_mappers.registry = {}
+        site_mappers.loaded = False
+        site_mappers.register(TestMapper)
+        self.household_structure = self.member_helper.make_household_ready_for_enumeration(
+            make_hoh=False)
+        self.report_datetime = (
+            self.household_structure.householdlog.householdlogentry_set.all().order_by(
+                'report_datetime').last().report_datetime)
+        User.objects.create_superuser('erik', 'erik@example.com', 'pass')
+        self.client.login(username='erik', password='pass')
+
+    def add_members(self, count):
+        for _ in range(count):
+            household_member = self.member_helper.add_household_member(
+                household_structure=self.household_structure,
+                report_datetime=self.report_datetime,
+                relation='cousin')
+            self.member_helper.make_absent_member(
+                household_member=household_member,
+                report_datetime=self.report_datetime)
+
+    def get_query_count(self, url):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries)
+
+    def assert_query_count_does_not_depend_on_page_size(self, model):
+        """Asserts a changelist with a few rows runs as many queries
+        as a full page followed by more pages.
+        """
+        url = reverse(
+            f'member_admin:{model._meta.app_label}_{model._meta.model_name}_changelist')
+        self.add_members(2)
+        query_count = self.get_query_count(url)
+        self.add_members(member_admin._registry[model].list_per_page)
+        self.assertGreater(
+            model.objects.count(), member_admin._registry[model].list_per_page)
+        self.assertEqual(query_count, self.get_query_count(url))
+
+    def test_household_member_changelist_query_count(self):
+        self.assert_query_count_does_not_depend_on_page_size(HouseholdMember)
+
+    def test_absent_member_changelist_query_count(self):
+        self.assert_query_count_does_not_depend_on_page_size(AbsentMember)
@@ -0,0 +1,31 @@
+from django.test import TestCase, tag
+
+from .hot_paths import compare_results, run_benchmarks
+
+
+@tag('benchmark')
+class TestBenchmarks(TestCase):
+
+    def test_run_benchmarks(self):
+        results = run_benchmarks(
+            sizes=[3], repeat=1,
+            names=['household_member_save', 'participation_status'])
+        self.assertEqual(
+            sorted(results),
+            ['household_member_save[3]', 'participation_status[3]'])
+        self.assertGreater(results['household_member_save[3]']['queries'], 0)
+
+    def test_compare_results(self):
+        baseline = {
+            'a[10]': dict(size=10, queries=5, seconds=0.1),
+            'b[10]': dict(size=10, queries=5, seconds=0.1),
+            'c[10]': dict(skipped='requires bcpp_subject')}
+        results = {
+            'a[10]': dict(size=10, queries=6, seconds=0.1),
+            'b[10]': dict(size=10, queries=4, seconds=0.2),
+            'c[10]': dict(skipped='requires bcpp_subject')}
+        regressions = compare_results(results, baseline)
+        self.assertEqual(len(regressions), 2)
+        self.assertTrue(regressions[0].startswith('a[10]: 6 queries'))
+        self.assertTrue(regressions[1].startswith('b[10]: 0.2000s'))
+        self.assertEqual(compare_results(baseline, baseline), [])
@@ -8,6 +8,7 @@ from member_clone.clone import Clone
 from survey.site_surveys import site_surveys
 from survey.tests import SurveyTestHelper
 
+from ..bulk_clone import bulk_clone_members
 from ..models import HouseholdMember
 from .member_test_helper import MemberTestHelper
 from .mappers import TestMapper
@@ -75,3 +76,42 @@ class TestCloneMembers(TestCase):
             household_structure=next_household_structure,
             report_datetime=household_structure.report_datetime)
         self.assertEqual(clone.members.all().count(), 0)
+
+    def test_bulk_clone_members(self):
+        survey_schedule = site_surveys.get_survey_schedules()[0]
+        household_structure = self.member_helper.make_household_ready_for_enumeration(
+            make_hoh=False, survey_schedule=survey_schedule)
+        for _ in range(3):
+            self.member_helper.add_household_member(
+                household_structure=household_structure)
+        next_household_structure = HouseholdStructure.objects.create(
+            household=household_structure.household,
+            survey_schedule=site_surveys.get_survey_schedules()[1].field_value)
+        household_structures = HouseholdStructure.objects.filter(
+            pk=next_household_structure.pk)
+        # not ready for enumeration, skipped
+        self.assertEqual(bulk_clone_members(
+            household_structures=household_structures,
+            previous_survey_schedule=household_structure.survey_schedule),
+            (0, [next_household_structure]))
+        next_household_structure = self.member_helper.get_next_household_structure_ready(
+            household_structure, make_hoh=None)
+        cloned, skipped = bulk_clone_members(
+            household_structures=household_structures,
+            previous_survey_schedule=household_structure.survey_schedule,
+            user_created='erikvw', chunk_size=2)
+        self.assertEqual(cloned, 3)
+        self.assertEqual(skipped, [])
+        for obj in HouseholdMember.objects.filter(
+                household_structure=household_structure):
+            new_obj = HouseholdMember.objects.get(
+                household_structure=next_household_structure,
+                internal_identifier=obj.internal_identifier)
+            self.assertEqual(obj.subject_identifier, new_obj.subject_identifier)
+            self.assertTrue(new_obj.cloned)
+        self.assertTrue(HouseholdStructure.objects.get(
+            pk=next_household_structure.pk).enumerated)
+        # resumes, nothing left to clone
+        self.assertEqual(bulk_clone_members(
+            household_structures=household_structures,
+            previous_survey_schedule=household_structure.survey_schedule), (0, []))
@@ -10,7 +10,9 @@ from survey.tests import SurveyTestHelper
 
 from ..constants import BLOCK_PARTICIPATION
 from ..exceptions import MemberEnrollmentError
-from ..models import HouseholdMember, EnrollmentLoss, EnrollmentChecklist
+from ..models import (
+    HouseholdMember, EnrollmentLoss, EnrollmentChecklist,
+    EnrollmentChecklistAnonymous)
 from .member_test_helper import MemberTestHelper
 from .mappers import TestMapper
 
@@ -304,6 +306,25 @@ class TestMembers(TestCase):
         except EnrollmentLoss.DoesNotExist:
             self.fail('EnrollmentLoss.DoesNotExist unexpectedly raised.')
 
+    def test_enrollment_checklist_anonymous_creates_loss_on_ineligible(self):
+        household_structure = self.member_helper.make_household_ready_for_enumeration()
+        household_member = self.member_helper.add_household_member(
+            household_structure=household_structure)
+        enrollment_checklist = EnrollmentChecklistAnonymous.objects.create(
+            household_member=household_member,
+            report_datetime=household_structure.report_datetime,
+            gender=household_member.gender,
+            age_in_years=household_member.age_in_years,
+            part_time_resident=YES,
+            literacy=NO)
+        self.assertFalse(enrollment_checklist.is_eligible)
+        self.assertEqual(
+            enrollment_checklist.loss_reason,
+            'Illiterate with no literate witness.')
+        enrollment_loss = EnrollmentLoss.objects.get(
+            household_member=household_member)
+        self.assertEqual(enrollment_loss.reason, enrollment_checklist.loss_reason)
+
     def test_enrollment_checklist_does_not_create_loss_on_eligible(self):
         household_structure = self.member_helper.make_household_ready_for_enumeration()
         household_member = self.member_helper.add_household_member(
@@ -0,0 +1,89 @@
+from datetime import datetime
+from types import SimpleNamespace
+from unittest import skipUnless
+
+from django.apps import apps as django_apps
+from django.test import TestCase, tag
+
+from edc_map.site_mappers import site_mappers
+from household.models import HouseholdLogEntry, HouseholdWorkList
+from survey.tests import SurveyTestHelper
+
+from ..update_household_work_list import (
+    get_enrolled_type, group_log_entries, update_household_work_list,
+    update_household_work_lists)
+from .member_test_helper import MemberTestHelper
+from .mappers import TestMapper
+
+
+@tag('work_list')
+@skipUnless(django_apps.is_installed('bcpp_subject'), 'requires bcpp_subject')
+class TestHouseholdWorkList(TestCase):
+
+    member_helper = MemberTestHelper()
+    survey_helper = SurveyTestHelper()
+
+    def setUp(self):
+        self.survey_helper.load_test_surveys()
+        django_apps.app_configs['edc_device'].device_id = '99'
+        site_mappers.registry = {}
+        site_mappers.loaded = False
+        site_mappers.register(TestMapper)
+
+    def test_update_household_work_lists_creates_then_updates(self):
+        household_structures = []
+        for _ in range(3):
+            household_structure = self.member_helper.make_household_ready_for_enumeration(
+                make_hoh=False)
+            self.member_helper.add_household_member(
+                household_structure=household_structure)
+            household_structures.append(household_structure)
+        self.assertEqual(update_household_work_lists(
+            label='test', household_structures=household_structures,
+            batch_size=2), (3, 0))
+        for household_structure in household_structures:
+            household_work_list = HouseholdWorkList.objects.get(
+                household_structure=household_structure, label='test')
+            self.assertEqual(household_work_list.members, 1)
+            self.assertEqual(household_work_list.status, 'unscheduled')
+            self.assertEqual(
+                household_work_list.log_attempts,
+                HouseholdLogEntry.objects.filter(
+                    household_log__household_structure=household_structure).count())
+        self.member_helper.add_household_member(
+            household_structure=household_structures[0])
+        self.assertEqual(update_household_work_lists(
+            label='test', household_structures=household_structures,
+            batch_size=2), (0, 3))
+        self.assertEqual(HouseholdWorkList.objects.get(
+            household_structure=household_structures[0], label='test').members, 2)
+
+    def test_update_household_work_list_without_household_structure(self):
+        self.member_helper.make_household_ready_for_enumeration(make_hoh=False)
+        self.assertEqual(update_household_work_list(label='test'), (0, 0))
+
+
+@tag('work_list')
+class TestHouseholdWorkListHelpers(TestCase):
+
+    def test_group_log_entries(self):
+        rows = [
+            (1, datetime(2017, 5, 3), 'eligible_representative_present'),
+            (1, datetime(2017, 5, 1), 'no_household_informant'),
+            (2, datetime(2017, 5, 2), 'refused_enumeration')]
+        log_attempts, last_log_entries = group_log_entries(rows)
+        self.assertEqual(log_attempts, {1: 2, 2: 1})
+        self.assertEqual(last_log_entries, {
+            1: (datetime(2017, 5, 3), 'eligible_representative_present'),
+            2: (datetime(2017, 5, 2), 'refused_enumeration')})
+
+    def test_enrolled_type_by_survey_of_each_household_structure(self):
+        first_hic_enrollment_start = datetime(2016, 1, 1)
+        self.assertEqual(get_enrolled_type(
+            first_hic_enrollment_start,
+            SimpleNamespace(datetime_start=datetime(2017, 1, 1))), 'hic')
+        self.assertEqual(get_enrolled_type(
+            first_hic_enrollment_start,
+            SimpleNamespace(datetime_start=datetime(2016, 1, 1))), 'bhs')
+        self.assertEqual(get_enrolled_type(
+            None, SimpleNamespace(datetime_start=datetime(2017, 1, 1))), 'bhs')
@@ -0,0 +1,46 @@
+from django.apps import apps as django_apps
+from django.test import TestCase
+
+from edc_map.site_mappers import site_mappers
+from survey.tests import SurveyTestHelper
+
+from ..instrumentation import site_instrumentation
+from .mappers import TestMapper
+from .member_test_helper import MemberTestHelper
+
+
+class TestInstrumentation(TestCase):
+
+    member_helper = MemberTestHelper()
+    survey_helper = SurveyTestHelper()
+
+    def setUp(self):
+        self.survey_helper.load_test_surveys()
+        django_apps.app_configs['edc_device'].device_id = '99'
+        site_mappers.registry = {}
+        site_mappers.loaded = False
+        site_mappers.register(TestMapper)
+        self.household_structure = self.member_helper.make_household_ready_for_enumeration(
+            make_hoh=False)
+        site_instrumentation.reset()
+
+    def tearDown(self):
+        site_instrumentation.disable()
+        site_instrumentation.reset()
+
+    def test_disabled_by_default(self):
+        self.member_helper.add_household_member(self.household_structure)
+        self.assertEqual(site_instrumentation.summary(), {})
+
+    def test_save_and_receivers_timed(self):
+        site_instrumentation.enable()
+        self.member_helper.add_household_member(self.household_structure)
+        summary = site_instrumentation.summary()
+        for name in [
+                'member.models.household_member.household_member.HouseholdMember.save',
+                ('member.models.household_member.representative_model_mixin.'
+                 'RepresentativeModelMixin.common_clean'),
+                'member.signals.household_member_on_post_save']:
+            self.assertEqual(summary[name]['calls'], 1, msg=name)
+        self.assertGreater(
+            summary['member.signals.household_member_on_post_save']['mean_queries'], 0)
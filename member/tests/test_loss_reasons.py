@@ -0,0 +1,47 @@
+from unittest import skipIf
+
+from django.test import TestCase
+
+from edc_constants.constants import NO, NOT_APPLICABLE, YES
+
+from ..constants import BLOCK_PARTICIPATION
+from ..loss_reasons import evaluate_rows, evaluate_arrays, get_loss_reasons, np
+
+
+class TestLossReasons(TestCase):
+
+    def setUp(self):
+        self.row = dict(
+            has_identity=YES, household_residency=YES, part_time_resident=YES,
+            citizen=YES, legal_marriage=NOT_APPLICABLE,
+            marriage_certificate=NOT_APPLICABLE, literacy=YES,
+            guardian=NOT_APPLICABLE, confirm_participation=NOT_APPLICABLE,
+            age_in_years=25)
+
+    def test_eligible(self):
+        self.assertEqual(get_loss_reasons(**self.row), ([], False))
+
+    def test_reasons(self):
+        self.row.update(
+            citizen=NO, legal_marriage=NO, age_in_years=17,
+            confirm_participation=BLOCK_PARTICIPATION)
+        reasons, non_citizen = get_loss_reasons(**self.row)
+        self.assertEqual(reasons, [
+            'Not a citizen and not married to a citizen.',
+            'Minor without guardian available.',
+            'Already enrolled.'])
+        self.assertTrue(non_citizen)
+
+    def test_cloned_ignores_residency(self):
+        self.row.update(household_residency=NO, part_time_resident=NO)
+        self.assertEqual(len(get_loss_reasons(**self.row)[0]), 2)
+        self.assertEqual(get_loss_reasons(cloned=True, **self.row)[0], [])
+
+    @skipIf(np is None, 'numpy is not installed')
+    def test_arrays_match_rows(self):
+        rows = [dict(self.row), dict(self.row, literacy=NO, age_in_years=16)]
+        is_eligible, loss_reason, non_citizen = evaluate_arrays(
+            {column: [row[column] for row in rows] for column in self.row})
+        self.assertEqual(
+            list(zip(is_eligible.tolist(), loss_reason.tolist())),
+            evaluate_rows(rows))
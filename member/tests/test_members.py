@@ -1,24 +1,36 @@
+from types import SimpleNamespace
+from unittest import mock
+from uuid import uuid4
+
 from dateutil.relativedelta import relativedelta
 from model_mommy import mommy
 
 from django.apps import apps as django_apps
+from django.db import transaction
 from django.db.utils import IntegrityError
 from django.test import TestCase
 
 from edc_constants.constants import NO, DEAD, YES, UUID_PATTERN, ALIVE, FEMALE,\
-    NOT_APPLICABLE
+    NOT_APPLICABLE, CONSENTED
 from edc_map.site_mappers import site_mappers
 
 from household.constants import ELIGIBLE_REPRESENTATIVE_PRESENT
 from household.exceptions import HouseholdLogRequired
 from household.tests import HouseholdTestHelper
 from household.models import HouseholdStructure
+from plot.models import Plot
 from survey.tests import SurveyTestHelper
 from survey.site_surveys import site_surveys
 
 from ..constants import MENTAL_INCAPACITY, HEAD_OF_HOUSEHOLD, ABLE_TO_PARTICIPATE
+from ..eligibile_member_helper import EligibileMemberHelper
+from ..eligibility_rules import member_rules
 from ..exceptions import EnumerationRepresentativeError
-from ..models import HouseholdMember, MovedMember
+from ..management.commands.update_eligible_members import update_eligible_members
+from ..member_updates import member_update_queue, suspend_member_updates
+from ..models import HouseholdMember, MovedMember, RefusedMember
+from ..search_index import update_stale_search_tokens
+from ..utils import clear_anonymous_plot_pk, get_anonymous_plot_pk
 from .member_test_helper import MemberTestHelper
 from .mappers import TestMapper
 
@@ -206,6 +218,171 @@ class TestMembers(TestCase):
             report_datetime=report_datetime)
         self.assertEqual(household_member.visit_attempts, 4)
 
+    def test_member_visit_attempts_with_stale_instance(self):
+        household_structure = self.member_helper.make_household_ready_for_enumeration(
+            make_hoh=False)
+        report_datetime = household_structure.survey_schedule_object.start
+        report_datetime = report_datetime + relativedelta(weeks=1)
+        self.household_helper.add_enumeration_attempt(
+            household_structure=household_structure,
+            household_status=ELIGIBLE_REPRESENTATIVE_PRESENT,
+            report_datetime=report_datetime)
+        household_member = self.member_helper.add_household_member(
+            household_structure=household_structure,
+            report_datetime=report_datetime)
+        stale_household_member = HouseholdMember.objects.get(
+            pk=household_member.pk)
+        self.member_helper.make_absent_member(
+            household_member=household_member,
+            report_datetime=report_datetime)
+        household_member = self.member_helper.make_undecided_member(
+            household_member=stale_household_member,
+            report_datetime=report_datetime)
+        self.assertEqual(household_member.visit_attempts, 2)
+        self.assertTrue(household_member.absent)
+        self.assertTrue(household_member.undecided)
+        RefusedMember.objects.filter(household_member=household_member).delete()
+        household_member.undecidedmember_set.all().delete()
+        household_member.absentmember_set.all().delete()
+        household_member = HouseholdMember.objects.get(pk=household_member.pk)
+        self.assertEqual(household_member.visit_attempts, 0)
+        self.assertFalse(household_member.absent)
+        self.assertFalse(household_member.undecided)
+        self.assertEqual(household_member.absent_count, 0)
+        self.assertEqual(household_member.undecided_count, 0)
+
+    def test_save_stale_instance_keeps_counters(self):
+        household_structure = self.member_helper.make_household_ready_for_enumeration(
+            make_hoh=False)
+        report_datetime = household_structure.survey_schedule_object.start
+        report_datetime = report_datetime + relativedelta(weeks=1)
+        self.household_helper.add_enumeration_attempt(
+            household_structure=household_structure,
+            household_status=ELIGIBLE_REPRESENTATIVE_PRESENT,
+            report_datetime=report_datetime)
+        household_member = self.member_helper.add_household_member(
+            household_structure=household_structure,
+            report_datetime=report_datetime)
+        stale_household_member = HouseholdMember.objects.get(
+            pk=household_member.pk)
+        self.member_helper.make_absent_member(
+            household_member=household_member,
+            report_datetime=report_datetime)
+        stale_household_member.save()
+        self.assertEqual(stale_household_member.visit_attempts, 1)
+        household_member = HouseholdMember.objects.get(pk=household_member.pk)
+        self.assertEqual(household_member.visit_attempts, 1)
+        self.assertEqual(household_member.absent_count, 1)
+        self.assertTrue(household_member.absent)
+
+    def test_undecided_delete_keeps_absent(self):
+        household_structure = self.member_helper.make_household_ready_for_enumeration(
+            make_hoh=False)
+        report_datetime = household_structure.survey_schedule_object.start
+        report_datetime = report_datetime + relativedelta(weeks=1)
+        self.household_helper.add_enumeration_attempt(
+            household_structure=household_structure,
+            household_status=ELIGIBLE_REPRESENTATIVE_PRESENT,
+            report_datetime=report_datetime)
+        household_member = self.member_helper.add_household_member(
+            household_structure=household_structure,
+            report_datetime=report_datetime)
+        self.member_helper.make_absent_member(
+            household_member=household_member,
+            report_datetime=report_datetime)
+        household_member = self.member_helper.make_undecided_member(
+            household_member=household_member,
+            report_datetime=report_datetime)
+        self.assertEqual(household_member.undecided_count, 1)
+        household_member.undecidedmember_set.all().delete()
+        household_member = HouseholdMember.objects.get(pk=household_member.pk)
+        self.assertFalse(household_member.undecided)
+        self.assertTrue(household_member.absent)
+        self.assertEqual(household_member.absent_count, 1)
+        self.assertEqual(household_member.visit_attempts, 1)
+
+    def test_deferred_member_updates_applied_once_on_commit(self):
+        household_structure = self.member_helper.make_household_ready_for_enumeration(
+            make_hoh=False)
+        report_datetime = household_structure.survey_schedule_object.start
+        report_datetime = report_datetime + relativedelta(weeks=1)
+        self.household_helper.add_enumeration_attempt(
+            household_structure=household_structure,
+            household_status=ELIGIBLE_REPRESENTATIVE_PRESENT,
+            report_datetime=report_datetime)
+        household_member = self.member_helper.add_household_member(
+            household_structure=household_structure,
+            report_datetime=report_datetime)
+        app_config = django_apps.get_app_config('member')
+        app_config.defer_member_updates = True
+        try:
+            self.member_helper.make_absent_member(
+                household_member=household_member,
+                report_datetime=report_datetime)
+            household_member = self.member_helper.make_undecided_member(
+                household_member=household_member,
+                report_datetime=report_datetime)
+        finally:
+            app_config.defer_member_updates = False
+        self.assertEqual(household_member.visit_attempts, 0)
+        self.assertEqual(
+            len(member_update_queue.current_batch('default').pending), 1)
+        member_update_queue.flush(using='default')
+        household_member = HouseholdMember.objects.get(pk=household_member.pk)
+        self.assertEqual(household_member.visit_attempts, 2)
+        self.assertTrue(household_member.absent)
+        self.assertTrue(household_member.undecided)
+        self.assertIsNone(member_update_queue.current_batch('default'))
+
+    def test_deferred_member_updates_discarded_on_rollback(self):
+        household_structure = self.member_helper.make_household_ready_for_enumeration(
+            make_hoh=False)
+        household_member = self.member_helper.add_household_member(
+            household_structure=household_structure)
+        try:
+            with transaction.atomic():
+                member_update_queue.add(
+                    household_member, increments=dict(visit_attempts=1))
+                self.assertIsNotNone(member_update_queue.current_batch('default'))
+                raise IntegrityError
+        except IntegrityError:
+            pass
+        self.assertIsNone(member_update_queue.current_batch('default'))
+
+    def test_deferred_member_updates_discarded_on_inner_rollback(self):
+        household_structure = self.member_helper.make_household_ready_for_enumeration(
+            make_hoh=False)
+        household_member = self.member_helper.add_household_member(
+            household_structure=household_structure)
+        member_update_queue.add(
+            household_member, increments=dict(visit_attempts=1))
+        try:
+            with transaction.atomic():
+                member_update_queue.add(
+                    household_member, increments=dict(visit_attempts=1))
+                raise IntegrityError
+        except IntegrityError:
+            pass
+        self.assertEqual(
+            member_update_queue.current_batch('default').pending[
+                household_member.pk]['increments'], dict(visit_attempts=1))
+        member_update_queue.flush(using='default')
+        household_member = HouseholdMember.objects.get(pk=household_member.pk)
+        self.assertEqual(household_member.visit_attempts, 1)
+
+    def test_suspended_member_updates_skip_report_signals(self):
+        household_structure = self.member_helper.make_household_ready_for_enumeration(
+            make_hoh=False)
+        household_member = self.member_helper.add_household_member(
+            household_structure=household_structure)
+        household_member = self.member_helper.make_absent_member(
+            household_member=household_member)
+        with suspend_member_updates():
+            household_member.absentmember_set.all().delete()
+        household_member = HouseholdMember.objects.get(pk=household_member.pk)
+        self.assertEqual(household_member.visit_attempts, 1)
+        self.assertEqual(household_member.absent_count, 1)
+
     def test_plot_eligible_members_increments(self):
         household_structure = self.member_helper.make_household_ready_for_enumeration(
             make_hoh=False)
@@ -225,6 +402,42 @@ class TestMembers(TestCase):
         self.assertTrue(household_structure.enumerated)
         self.assertIsNotNone(household_structure.enumerated_datetime)
 
+    def test_bulk_enumerate(self):
+        household_structure = self.member_helper.make_household_ready_for_enumeration(
+            make_hoh=False)
+        members = [
+            dict(first_name=first_name, initials=f'{first_name[0]}XX',
+                 gender=FEMALE, age_in_years=27, survival_status=ALIVE,
+                 study_resident=YES, relation='cousin',
+                 inability_to_participate=ABLE_TO_PARTICIPATE,
+                 report_datetime=household_structure.report_datetime)
+            for first_name in ['ONE', 'TWO', 'THREE']]
+        household_members = HouseholdMember.objects.bulk_enumerate(
+            household_structure, members)
+        self.assertEqual(len(household_members), 3)
+        for household_member in household_members:
+            self.assertTrue(household_member.eligible_member)
+            self.assertIsNotNone(household_member.registered_subject)
+        household_structure = HouseholdStructure.objects.get(
+            pk=household_structure.pk)
+        self.assertTrue(household_structure.enumerated)
+
+    def test_bulk_enumerate_one_head_of_household(self):
+        household_structure = self.member_helper.make_household_ready_for_enumeration(
+            make_hoh=False)
+        members = [
+            dict(first_name=first_name, initials=f'{first_name[0]}XX',
+                 gender=FEMALE, age_in_years=27, survival_status=ALIVE,
+                 study_resident=YES, relation=HEAD_OF_HOUSEHOLD,
+                 inability_to_participate=ABLE_TO_PARTICIPATE,
+                 report_datetime=household_structure.report_datetime)
+            for first_name in ['ONE', 'TWO']]
+        self.assertRaises(
+            EnumerationRepresentativeError,
+            HouseholdMember.objects.bulk_enumerate, household_structure, members)
+        self.assertEqual(HouseholdMember.objects.filter(
+            household_structure=household_structure).count(), 0)
+
     def test_delete_members_updates_household_structure(self):
         household_structure = self.member_helper.make_household_ready_for_enumeration(
             make_hoh=False)
@@ -341,3 +554,120 @@ class TestMembers3(TestCase):
         household_member = HouseholdMember.objects.get(pk=household_member.pk)
         self.assertEqual(internal_identifier,
                          household_member.internal_identifier)
+
+    def test_anonymous_uses_cached_anonymous_plot_pk(self):
+        clear_anonymous_plot_pk()
+        self.addCleanup(clear_anonymous_plot_pk)
+        household_member = HouseholdMember.objects.create(**self.defaults)
+        household_member = HouseholdMember.objects.select_related(
+            'household_structure__household').get(pk=household_member.pk)
+        with mock.patch('member.utils.get_anonymous_plot',
+                        return_value=SimpleNamespace(pk=uuid4())):
+            self.assertFalse(household_member.anonymous)
+        with self.assertNumQueries(0):
+            self.assertFalse(household_member.anonymous)
+
+    def test_missing_anonymous_plot_pk_is_not_cached(self):
+        clear_anonymous_plot_pk()
+        self.addCleanup(clear_anonymous_plot_pk)
+        anonymous_plot = SimpleNamespace(pk=uuid4())
+        with mock.patch('member.utils.get_anonymous_plot',
+                        side_effect=[None, anonymous_plot]) as get_anonymous_plot:
+            self.assertIsNone(get_anonymous_plot_pk())
+            self.assertEqual(get_anonymous_plot_pk(), anonymous_plot.pk)
+            self.assertEqual(get_anonymous_plot_pk(), anonymous_plot.pk)
+        self.assertEqual(get_anonymous_plot.call_count, 2)
+
+    def test_eligible_member_does_not_query_registration_if_not_needed(self):
+        household_member = HouseholdMember(**self.defaults)
+        with self.assertNumQueries(0):
+            self.assertTrue(EligibileMemberHelper(
+                **household_member.__dict__).is_eligible_member)
+        household_member.age_in_years = 12
+        with self.assertNumQueries(0):
+            self.assertFalse(EligibileMemberHelper(
+                **household_member.__dict__).is_eligible_member)
+
+    def test_eligible_members_over_64_uses_registration_statuses(self):
+        household_member = HouseholdMember(**self.defaults)
+        household_member.age_in_years = 70
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                EligibileMemberHelper.eligible_members(
+                    [household_member], registration_statuses={}),
+                [False])
+            self.assertEqual(
+                EligibileMemberHelper.eligible_members(
+                    [household_member], registration_statuses={
+                        household_member.subject_identifier: CONSENTED}),
+                [True])
+
+    def test_update_eligible_members_saves_changed_only(self):
+        household_member = HouseholdMember.objects.create(**self.defaults)
+        self.assertTrue(household_member.eligible_member)
+        HouseholdMember.objects.filter(pk=household_member.pk).update(
+            eligible_member=False)
+        household_members = HouseholdMember.objects.filter(
+            pk=household_member.pk)
+        summary = update_eligible_members(
+            household_members=household_members, dry_run=True)
+        self.assertEqual(summary['now_eligible'], 1)
+        self.assertFalse(household_members.get().eligible_member)
+        update_eligible_members(household_members=household_members)
+        self.assertTrue(household_members.get().eligible_member)
+        summary = update_eligible_members(household_members=household_members)
+        self.assertEqual(summary['now_eligible'], 0)
+
+    def test_member_rules_query_matches_eligible_member(self):
+        for age_in_years in [12, 27, 70]:
+            self.member_helper.add_household_member(
+                self.household_structure, relation='cousin',
+                age_in_years=age_in_years)
+        household_members = member_rules.annotate(
+            HouseholdMember.objects.filter(
+                household_structure=self.household_structure))
+        for household_member in household_members:
+            self.assertEqual(
+                household_member.eligible_member,
+                household_member.member_none_apply)
+            self.assertEqual(
+                household_member.member_under_age,
+                household_member.age_in_years < 16)
+        self.assertEqual(
+            member_rules.filter(HouseholdMember.objects.filter(
+                household_structure=self.household_structure)).count(), 1)
+
+    def test_search_by_identifier_prefix(self):
+        household_member = HouseholdMember.objects.create(**self.defaults)
+        household_identifier = (
+            self.household_structure.household.household_identifier)
+        self.assertIn(
+            household_member,
+            HouseholdMember.objects.search(household_identifier))
+        self.assertIn(
+            household_member,
+            HouseholdMember.objects.search(household_identifier[:5].lower()))
+        self.assertIn(
+            household_member,
+            HouseholdMember.objects.search(
+                household_member.internal_identifier.hex, exact=True))
+        self.assertFalse(HouseholdMember.objects.search(
+            household_identifier[:5], exact=True).exists())
+        household_member.initials = 'NXC'
+        household_member.save()
+        self.assertIn(household_member, HouseholdMember.objects.search('nxc'))
+        self.assertNotIn(
+            household_member,
+            HouseholdMember.objects.search(self.defaults['initials']))
+
+    def test_update_stale_search_tokens(self):
+        household_member = HouseholdMember.objects.create(**self.defaults)
+        Plot.objects.filter(pk=self.household_structure.household.plot_id).update(
+            plot_identifier='123456-78')
+        household_members = HouseholdMember.objects.filter(pk=household_member.pk)
+        self.assertNotIn(household_member, HouseholdMember.objects.search('123456-78'))
+        update_stale_search_tokens(household_members, plot_identifier='123456-78')
+        self.assertIn(household_member, HouseholdMember.objects.search('123456-78'))
+        self.assertEqual(
+            update_stale_search_tokens(household_members, plot_identifier='123456-78'),
+            (0, 0))
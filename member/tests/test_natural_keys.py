@@ -3,14 +3,19 @@ from django.test import TestCase
 
 from edc_sync.tests import SyncTestHelper
 from edc_map.site_mappers import site_mappers
+from household.models import HouseholdStructure
 from survey.tests import SurveyTestHelper
 
+from ..models import AbsentMember, HouseholdMember
+from ..natural_keys import natural_key_cache
 from .mappers import TestMapper
+from .member_test_helper import MemberTestHelper
 
 
 class TestNaturalKey(TestCase):
 
     survey_helper = SurveyTestHelper()
+    member_helper = MemberTestHelper()
     sync_helper = SyncTestHelper()
 
     def setUp(self):
@@ -25,3 +30,31 @@ class TestNaturalKey(TestCase):
 
     def test_get_by_natural_key_attr(self):
         self.sync_helper.sync_test_get_by_natural_key_attr('member')
+
+    def test_natural_keys_from_batch_cache(self):
+        household_structure = self.member_helper.make_household_ready_for_enumeration()
+        household_member = self.member_helper.add_household_member(
+            household_structure=household_structure)
+        self.member_helper.make_absent_member(household_member=household_member)
+        absent_member = AbsentMember.objects.get(household_member=household_member)
+        member_natural_key = household_member.natural_key()
+        absent_natural_key = absent_member.natural_key()
+        household_structures = HouseholdStructure.objects.filter(
+            pk=household_structure.pk)
+        with natural_key_cache.batch(household_structures):
+            absent_member = AbsentMember.objects.get(pk=absent_member.pk)
+            with self.assertNumQueries(0):
+                self.assertEqual(absent_member.natural_key(), absent_natural_key)
+            with self.assertNumQueries(0):
+                self.assertEqual(
+                    HouseholdMember.objects.get_by_natural_key(*member_natural_key),
+                    household_member)
+            self.assertEqual(
+                AbsentMember.objects.get_by_natural_key(*absent_natural_key),
+                absent_member)
+            with natural_key_cache.batch(household_structures.none()):
+                pass
+            self.assertTrue(natural_key_cache.active)
+            with self.assertNumQueries(0):
+                self.assertEqual(absent_member.natural_key(), absent_natural_key)
+        self.assertFalse(natural_key_cache.active)
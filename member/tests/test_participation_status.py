@@ -1,14 +1,24 @@
+from types import SimpleNamespace
+from unittest import mock
+from uuid import uuid4
+
 from django.apps import apps as django_apps
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 
 from edc_constants.constants import REFUSED, NO
 from edc_map.site_mappers import site_mappers
 from survey.tests import SurveyTestHelper
 
 from ..constants import (
-    ABSENT, UNDECIDED, DECEASED, HTC_ELIGIBLE, ELIGIBLE, INELIGIBLE, MOVED)
-from ..participation_status import ParticipationStatus
+    ABSENT, UNDECIDED, DECEASED, HTC_ELIGIBLE, ELIGIBLE, INELIGIBLE, MOVED,
+    AVAILABLE)
+from ..participation_status import (
+    ParticipationStatus, ParticipationStatuses, backfill_member_statuses,
+    get_member_status, update_member_statuses)
 from ..models import HouseholdMember
+from ..utils import clear_anonymous_plot_pk, get_anonymous_plot_pk
 from .mappers import TestMapper
 from .member_test_helper import MemberTestHelper
 
@@ -161,3 +171,206 @@ class TestMembers(TestCase):
             legal_marriage=NO)
         participation_status = ParticipationStatus(household_member)
         self.assertEqual(participation_status.participation_status, INELIGIBLE)
+
+    def test_bulk_statuses_match_participation_status(self):
+        household_structure = self.member_helper.make_household_ready_for_enumeration(
+            make_hoh=False)
+        report_datetime = household_structure.householdlog.householdlogentry_set.all().order_by(
+            'report_datetime').last().report_datetime
+        household_members = [
+            self.member_helper.add_household_member(
+                household_structure=household_structure,
+                report_datetime=report_datetime,
+                relation='cousin') for _ in range(6)]
+        self.member_helper.add_enrollment_checklist(
+            household_member=household_members[0],
+            report_datetime=report_datetime)
+        self.member_helper.add_enrollment_checklist(
+            household_member=household_members[1],
+            report_datetime=report_datetime,
+            citizen=NO,
+            legal_marriage=NO)
+        self.member_helper.make_absent_member(
+            household_member=household_members[2],
+            report_datetime=report_datetime)
+        self.member_helper.make_undecided_member(
+            household_member=household_members[3],
+            report_datetime=report_datetime)
+        self.member_helper.make_refused_member(
+            household_member=household_members[4],
+            report_datetime=report_datetime)
+        statuses = ParticipationStatuses(
+            household_structures=[household_structure.id])
+        self.assertEqual(len(statuses), 6)
+        for household_member in HouseholdMember.objects.filter(
+                household_structure=household_structure):
+            participation_status = ParticipationStatus(household_member)
+            self.assertEqual(
+                statuses[household_member.pk].participation_status,
+                participation_status.participation_status)
+            self.assertEqual(
+                statuses[household_member.pk].final, participation_status.final)
+
+    def test_with_participation_status_matches_participation_status(self):
+        household_structure = self.member_helper.make_household_ready_for_enumeration(
+            make_hoh=False)
+        report_datetime = household_structure.householdlog.householdlogentry_set.all().order_by(
+            'report_datetime').last().report_datetime
+        household_members = [
+            self.member_helper.add_household_member(
+                household_structure=household_structure,
+                report_datetime=report_datetime,
+                relation='cousin') for _ in range(6)]
+        self.member_helper.add_enrollment_checklist(
+            household_member=household_members[0],
+            report_datetime=report_datetime)
+        self.member_helper.add_enrollment_checklist(
+            household_member=household_members[1],
+            report_datetime=report_datetime,
+            citizen=NO,
+            legal_marriage=NO)
+        self.member_helper.make_absent_member(
+            household_member=household_members[2],
+            report_datetime=report_datetime)
+        self.member_helper.make_undecided_member(
+            household_member=household_members[3],
+            report_datetime=report_datetime)
+        self.member_helper.make_refused_member(
+            household_member=household_members[4],
+            report_datetime=report_datetime)
+        household_members = HouseholdMember.objects.filter(
+            household_structure=household_structure).with_participation_status()
+        with self.assertNumQueries(1):
+            household_members = list(household_members)
+        for household_member in household_members:
+            participation_status = ParticipationStatus(household_member)
+            self.assertEqual(
+                household_member.computed_member_status,
+                participation_status.participation_status)
+            self.assertEqual(
+                household_member.computed_member_status_final,
+                participation_status.final)
+        self.assertEqual(
+            HouseholdMember.objects.with_participation_status().filter(
+                household_structure=household_structure,
+                computed_member_status=AVAILABLE).count(), 1)
+
+    def test_bulk_statuses_query_count_is_constant(self):
+        household_structure = self.member_helper.make_household_ready_for_enumeration(
+            make_hoh=False)
+        report_datetime = household_structure.householdlog.householdlogentry_set.all().order_by(
+            'report_datetime').last().report_datetime
+        household_member = self.member_helper.add_household_member(
+            household_structure=household_structure,
+            report_datetime=report_datetime,
+            relation='cousin')
+        self.member_helper.make_absent_member(
+            household_member=household_member,
+            report_datetime=report_datetime)
+        with CaptureQueriesContext(connection) as one_member:
+            ParticipationStatuses(household_structures=[household_structure])
+        for _ in range(5):
+            household_member = self.member_helper.add_household_member(
+                household_structure=household_structure,
+                report_datetime=report_datetime,
+                relation='cousin')
+            self.member_helper.make_absent_member(
+                household_member=household_member,
+                report_datetime=report_datetime)
+        with CaptureQueriesContext(connection) as many_members:
+            ParticipationStatuses(household_structures=[household_structure])
+        self.assertEqual(
+            len(one_member.captured_queries), len(many_members.captured_queries))
+
+    def test_member_status_persisted_on_absent(self):
+        household_structure = self.member_helper.make_household_ready_for_enumeration()
+        report_datetime = household_structure.householdlog.householdlogentry_set.all().order_by(
+            'report_datetime').last().report_datetime
+        household_member = self.member_helper.add_household_member(
+            household_structure=household_structure,
+            report_datetime=report_datetime)
+        self.assertEqual(household_member.member_status, AVAILABLE)
+        household_member = self.member_helper.make_absent_member(
+            household_member=household_member,
+            report_datetime=report_datetime)
+        self.assertEqual(household_member.member_status, ABSENT)
+        self.assertFalse(household_member.member_status_final)
+
+    def test_member_status_persisted_on_refused(self):
+        household_structure = self.member_helper.make_household_ready_for_enumeration()
+        household_member = self.member_helper.add_household_member(
+            household_structure=household_structure)
+        household_member = self.member_helper.make_refused_member(
+            household_member=household_member)
+        self.assertEqual(household_member.member_status, REFUSED)
+        self.assertTrue(household_member.member_status_final)
+        household_member.refusedmember.delete()
+        household_member = HouseholdMember.objects.get(pk=household_member.pk)
+        self.assertEqual(household_member.member_status, AVAILABLE)
+
+    def test_update_member_status_backfills(self):
+        household_structure = self.member_helper.make_household_ready_for_enumeration()
+        household_member = self.member_helper.add_household_member(
+            household_structure=household_structure)
+        household_member = self.member_helper.make_deceased_member(
+            household_member=household_member)
+        HouseholdMember.objects.filter(pk=household_member.pk).update(
+            member_status=AVAILABLE, member_status_final=False)
+        household_members = HouseholdMember.objects.filter(
+            household_structure=household_structure)
+        checked, mismatched = update_member_statuses(
+            household_members=household_members, verify_only=True)
+        self.assertEqual(mismatched, 1)
+        update_member_statuses(household_members=household_members)
+        household_member = HouseholdMember.objects.get(pk=household_member.pk)
+        self.assertEqual(household_member.member_status, DECEASED)
+        self.assertTrue(household_member.member_status_final)
+        checked, mismatched = update_member_statuses(
+            household_members=household_members, verify_only=True)
+        self.assertEqual(mismatched, 0)
+
+    def test_backfill_member_statuses(self):
+        household_structure = self.member_helper.make_household_ready_for_enumeration()
+        household_member = self.member_helper.add_household_member(
+            household_structure=household_structure)
+        household_member = self.member_helper.make_deceased_member(
+            household_member=household_member)
+        HouseholdMember.objects.filter(pk=household_member.pk).update(
+            member_status=AVAILABLE, member_status_final=False)
+        household_members = HouseholdMember.objects.filter(
+            household_structure=household_structure)
+        self.assertEqual(backfill_member_statuses(household_members=household_members), 1)
+        household_member = HouseholdMember.objects.get(pk=household_member.pk)
+        self.assertEqual(household_member.member_status, DECEASED)
+        self.assertTrue(household_member.member_status_final)
+        self.assertEqual(backfill_member_statuses(household_members=household_members), 0)
+
+    def test_get_member_status_runs_one_query(self):
+        household_structure = self.member_helper.make_household_ready_for_enumeration()
+        household_member = self.member_helper.add_household_member(
+            household_structure=household_structure)
+        household_member = self.member_helper.make_deceased_member(
+            household_member=household_member)
+        clear_anonymous_plot_pk()
+        self.addCleanup(clear_anonymous_plot_pk)
+        with mock.patch('member.utils.get_anonymous_plot',
+                        return_value=SimpleNamespace(pk=uuid4())):
+            get_anonymous_plot_pk()
+        with self.assertNumQueries(1):
+            self.assertEqual(
+                get_member_status(household_member), (DECEASED, True))
+
+    def test_member_status_in_historical_record(self):
+        household_structure = self.member_helper.make_household_ready_for_enumeration()
+        household_member = self.member_helper.add_household_member(
+            household_structure=household_structure)
+        household_member = self.member_helper.make_refused_member(
+            household_member=household_member)
+        historical_record = household_member.history.all().order_by(
+            'history_date').last()
+        self.assertEqual(historical_record.member_status, REFUSED)
+        self.assertTrue(historical_record.member_status_final)
+        household_member.save()
+        historical_record = household_member.history.all().order_by(
+            'history_date').last()
+        self.assertEqual(historical_record.member_status, REFUSED)
@@ -0,0 +1,75 @@
+import json
+import os
+import tempfile
+
+from io import StringIO
+
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from ..management.partitioned import Checkpoint, make_partitions, run_partitions
+from ..management.progress import ProgressReporter
+
+
+def count_keys(keys=None):
+    return dict(keys=len(keys))
+
+
+class TestPartitioned(TestCase):
+
+    def setUp(self):
+        self.path = os.path.join(tempfile.mkdtemp(), 'checkpoint.json')
+
+    def test_run_partitions_updates_checkpoint(self):
+        keys = [f'P{i:03d}' for i in range(7)]
+        partitions = [
+            (partition, dict(keys=partition))
+            for partition in make_partitions(keys, 3)]
+        self.assertEqual(len(partitions), 3)
+        checkpoint = Checkpoint(path=self.path, signature=dict(map_area='test'))
+        counts = run_partitions(count_keys, partitions[:2], checkpoint=checkpoint)
+        self.assertEqual(counts, dict(keys=6))
+        checkpoint = Checkpoint(path=self.path, signature=dict(map_area='test'))
+        self.assertEqual(
+            [key for key in keys if key not in checkpoint.done], ['P006'])
+
+    def test_checkpoint_signature_mismatch(self):
+        Checkpoint(path=self.path, signature=dict(map_area='test')).add(['P001'])
+        self.assertRaises(
+            CommandError, Checkpoint, path=self.path,
+            signature=dict(map_area='other'))
+
+
+class TestProgressReporter(TestCase):
+
+    def test_rows_written_at_verbosity_two_only(self):
+        for verbosity, expected in [(1, ''), (2, 'row 1\n')]:
+            stdout = StringIO()
+            reporter = ProgressReporter(stdout=stdout, verbosity=verbosity)
+            reporter.row('row 1')
+            self.assertEqual(stdout.getvalue(), expected)
+
+    def test_progress_is_rate_limited_and_summarized(self):
+        stdout = StringIO()
+        summary_path = os.path.join(tempfile.mkdtemp(), 'summary.json')
+        reporter = ProgressReporter(
+            stdout=stdout, total=1000, interval=3600, summary_path=summary_path)
+        for _ in range(1000):
+            reporter.add(1, created=1)
+        self.assertEqual(stdout.getvalue(), '')
+        reporter.finish('Done.')
+        self.assertIn('1000 of 1000 rows', stdout.getvalue())
+        with open(summary_path) as f:
+            summary = json.load(f)
+        self.assertEqual(summary['processed'], 1000)
+        self.assertEqual(summary['counts'], dict(created=1000))
+
+    def test_finish_writes_totals(self):
+        stdout = StringIO()
+        summary_path = os.path.join(tempfile.mkdtemp(), 'summary.json')
+        reporter = ProgressReporter(stdout=stdout, summary_path=summary_path)
+        reporter.finish('Would delete:', totals={'member.absentmember': 2})
+        self.assertIn('member.absentmember: 2', stdout.getvalue())
+        with open(summary_path) as f:
+            summary = json.load(f)
+        self.assertEqual(summary['totals'], {'member.absentmember': 2})
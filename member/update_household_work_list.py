@@ -1,107 +1,189 @@
 from datetime import date
 
 from django.apps import apps as django_apps
+from django.db import transaction
+from django.db.models import Count, Min
 
+from edc_base.utils import get_utcnow
 from edc_constants.constants import DONE
 
 from household.models import HouseholdStructure, HouseholdWorkList, HouseholdLogEntry
+from survey.site_surveys import site_surveys
 
 from .models import MemberAppointment, HouseholdMember, IN_PROGRESS_APPT
 
+work_list_fields = [
+    'visit_date', 'status', 'appt_count', 'enrolled_type', 'log_date',
+    'log_status', 'log_attempts', 'members', 'hic', 'bhs', 'modified']
 
-def update_household_work_list(label=None, household_structure=None):
+
+def update_household_work_list(label=None, household_structure=None,
+                               survey_schedule=None):
     """See actions.
+
+    If household_structure is None, updates the enrolled household
+    structures not yet started, of `survey_schedule`, a field value,
+    if given.
     """
 
     # TODO: Not yet implemented
     # and because of "survey", does not work
-    HicEnrollment = django_apps.get_model('bcpp_subject', 'HicEnrollment')
-    SubjectConsent = django_apps.get_model('bcpp_subject', 'SubjectConsent')
-    current_survey = household_structure.survey_schedule_object
-    survey_datetime_start = current_survey.datetime_start
-    created = 0
-    updated = 0
     if household_structure:
         household_structures = [household_structure]
+        current_survey = household_structure.survey_schedule_object
     else:
         household_structures = HouseholdStructure.objects.filter(
-            survey=current_survey, enrolled=True, progress='Not Started')
-    for household_structure in household_structures:
-        try:
-            appt_count = MemberAppointment.objects.filter(
-                household_member__household_structure=household_structure,
-                label=label).count()
-            member_appointment = MemberAppointment.objects.filter(
-                household_member__household_structure=household_structure,
-                label=label).exclude(
-                    appt_status__in=[DONE, IN_PROGRESS_APPT]).order_by(
-                        'appt_date')[0]
-            appt_date = member_appointment.appt_date
-            status = 'scheduled'
-        except IndexError:
-            appt_date = date.today()
-            status = 'unscheduled'
-        options = {
-            'subject_visit__household_member__household_structure__household':
-            household_structure.household,
-            'subject_visit__household_member__household_structure'
-            '__survey__datetime_start__lt':
-            survey_datetime_start
-        }
-        hic_enrollment = HicEnrollment.objects.filter(**options).count()
-        if hic_enrollment > 0:
-            enrolled_type = 'hic'
-        else:
-            enrolled_type = 'bhs'
-        try:
-            log_attempts = HouseholdLogEntry.objects.filter(
-                household_log__household_structure=household_structure).count()
-            household_log_entry = HouseholdLogEntry.objects.filter(
-                household_log__household_structure=household_structure).order_by(
-                    '-report_datetime')[0]
-            # TODO: report_datetime is a date, not datetime!
-            log_date = household_log_entry.report_datetime
-            log_status = household_log_entry.household_status
-        except IndexError:
-            log_date = None
-            log_status = None
-        member_count = HouseholdMember.objects.filter(
-            household_structure=household_structure).count()
-        hic_count = HicEnrollment.objects.filter(
-            **{'subject_visit__household_member__household_structure__household':
-               household_structure.household}).count()
-        bhs_count = SubjectConsent.objects.filter(
-            **{'household_member__household_structure__household':
-               household_structure.household}).count()
-        try:
-            household_work_list = HouseholdWorkList.objects.get(
-                household_structure=household_structure, label=label)
-            household_work_list.visit_date = appt_date
-            household_work_list.status = status
-            household_work_list.appt_count = appt_count
-            household_work_list.enrolled_type = enrolled_type
-            household_work_list.log_date = log_date
-            household_work_list.log_status = log_status
-            household_work_list.log_attempts = log_attempts
-            household_work_list.members = member_count
-            household_work_list.hic = hic_count
-            household_work_list.bhs = bhs_count
-            household_work_list.save()
-            updated += 1
-        except HouseholdWorkList.DoesNotExist:
-            HouseholdWorkList.objects.create(
-                household_structure=household_structure,
-                survey=household_structure.survey,
-                label=label,  # TODO:
-                visit_date=appt_date,
-                status=status,
-                appt_count=appt_count,
-                enrolled_type=enrolled_type,
+            enrolled=True, progress='Not Started')
+        current_survey = None
+        if survey_schedule:
+            household_structures = household_structures.filter(
+                survey_schedule=survey_schedule)
+            current_survey = site_surveys.get_survey_schedule_from_field_value(
+                survey_schedule)
+    return update_household_work_lists(
+        label=label, household_structures=household_structures,
+        current_survey=current_survey)
+
+
+def count_by(queryset, field):
+    """Returns a dictionary of {field value: count}.
+    """
+    return dict(queryset.order_by().values(field).annotate(
+        count=Count('id')).values_list(field, 'count'))
+
+
+def group_log_entries(rows):
+    """Returns a tuple of ({household_structure_id: log attempts},
+    {household_structure_id: (report_datetime, household_status)}).
+
+    `rows` are tuples of (household_structure_id, report_datetime,
+    household_status) ordered by household structure and most recent
+    first, the first row of each household structure is its last
+    log entry.
+    """
+    log_attempts = {}
+    last_log_entries = {}
+    for household_structure_id, report_datetime, household_status in rows:
+        log_attempts[household_structure_id] = (
+            log_attempts.get(household_structure_id, 0) + 1)
+        # TODO: report_datetime is a date, not datetime!
+        last_log_entries.setdefault(
+            household_structure_id, (report_datetime, household_status))
+    return log_attempts, last_log_entries
+
+
+def get_enrolled_type(first_hic_enrollment_start=None, current_survey=None):
+    """Returns 'hic' if the household had a HIC enrollment in a
+    survey before `current_survey`, otherwise 'bhs'.
+
+    `first_hic_enrollment_start` is the start of the earliest survey
+    with a HIC enrollment in the household or None.
+    """
+    if (first_hic_enrollment_start
+            and first_hic_enrollment_start < current_survey.datetime_start):
+        return 'hic'
+    return 'bhs'
+
+
+def update_household_work_lists(label=None, household_structures=None,
+                                current_survey=None, batch_size=None):
+    """Updates or creates the HouseholdWorkList for each household
+    structure using a few grouped queries per batch of household
+    structures.
+
+    The current survey is `current_survey`, if given, otherwise the
+    survey schedule of each household structure.
+
+    Returns a tuple of (created, updated).
+    """
+    HicEnrollment = django_apps.get_model('bcpp_subject', 'HicEnrollment')
+    SubjectConsent = django_apps.get_model('bcpp_subject', 'SubjectConsent')
+    batch_size = batch_size or 500
+    household_structures = list(household_structures)
+    created = 0
+    updated = 0
+    for index in range(0, len(household_structures), batch_size):
+        batch = household_structures[index:index + batch_size]
+        ids = [obj.id for obj in batch]
+        household_ids = [obj.household_id for obj in batch]
+
+        appointments = MemberAppointment.objects.filter(
+            household_member__household_structure__in=ids, label=label)
+        appt_counts = count_by(
+            appointments, 'household_member__household_structure')
+        appt_dates = dict(
+            appointments.exclude(
+                appt_status__in=[DONE, IN_PROGRESS_APPT]).order_by().values(
+                    'household_member__household_structure').annotate(
+                        appt_date=Min('appt_date')).values_list(
+                            'household_member__household_structure', 'appt_date'))
+
+        log_attempts, last_log_entries = group_log_entries(
+            HouseholdLogEntry.objects.filter(
+                household_log__household_structure__in=ids).order_by(
+                    'household_log__household_structure', '-report_datetime').values_list(
+                        'household_log__household_structure', 'report_datetime',
+                        'household_status'))
+
+        member_counts = count_by(
+            HouseholdMember.objects.filter(household_structure__in=ids),
+            'household_structure')
+        household_field = 'subject_visit__household_member__household_structure__household'
+        hic_counts = {}
+        first_hic_enrollment_starts = {}
+        for household_id, count, first_start in HicEnrollment.objects.filter(**{
+                f'{household_field}__in': household_ids}).order_by().values(
+                    household_field).annotate(
+                        count=Count('id'),
+                        first_start=Min(
+                            'subject_visit__household_member__household_structure'
+                            '__survey__datetime_start')).values_list(
+                                household_field, 'count', 'first_start'):
+            hic_counts[household_id] = count
+            first_hic_enrollment_starts[household_id] = first_start
+        bhs_counts = count_by(
+            SubjectConsent.objects.filter(
+                household_member__household_structure__household__in=household_ids),
+            'household_member__household_structure__household')
+
+        household_work_lists = {
+            obj.household_structure_id: obj for obj in HouseholdWorkList.objects.filter(
+                household_structure__in=ids, label=label)}
+        to_create = []
+        to_update = []
+        for household_structure in batch:
+            pk = household_structure.id
+            household_id = household_structure.household_id
+            log_date, log_status = last_log_entries.get(pk, (None, None))
+            values = dict(
+                visit_date=appt_dates.get(pk, date.today()),
+                status='scheduled' if pk in appt_dates else 'unscheduled',
+                appt_count=appt_counts.get(pk, 0),
+                enrolled_type=get_enrolled_type(
+                    first_hic_enrollment_starts.get(household_id),
+                    current_survey or household_structure.survey_schedule_object),
                 log_date=log_date,
                 log_status=log_status,
-                log_attempts=log_attempts,
-                members=member_count,
-                hic=hic_count,
-                bhs=bhs_count)
-            created += 1
+                log_attempts=log_attempts.get(pk, 0),
+                members=member_counts.get(pk, 0),
+                hic=hic_counts.get(household_id, 0),
+                bhs=bhs_counts.get(household_id, 0))
+            try:
+                household_work_list = household_work_lists[pk]
+            except KeyError:
+                to_create.append(HouseholdWorkList(
+                    household_structure=household_structure,
+                    survey=household_structure.survey,
+                    label=label,  # TODO:
+                    **values))
+            else:
+                values.update(modified=get_utcnow())
+                for field, value in values.items():
+                    setattr(household_work_list, field, value)
+                to_update.append(household_work_list)
+        with transaction.atomic():
+            HouseholdWorkList.objects.bulk_create(to_create)
+            HouseholdWorkList.objects.bulk_update(to_update, work_list_fields)
+        created += len(to_create)
+        updated += len(to_update)
     return created, updated
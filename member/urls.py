@@ -3,9 +3,11 @@
 from django.conf.urls import url
 
 from .admin_site import member_admin
+from .views import instrumentation_view
 
 app_name = 'member'
 
 urlpatterns = [
     url(r'^admin/', member_admin.urls),
+    url(r'^instrumentation/$', instrumentation_view, name='instrumentation'),
 ]
@@ -0,0 +1,43 @@
+from itertools import islice
+
+from plot.utils import get_anonymous_plot
+
+
+def chunked(iterable, chunk_size):
+    """Yields lists of up to chunk_size items from iterable.
+    """
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, chunk_size))
+        if not chunk:
+            break
+        yield chunk
+
+
+_anonymous_plot = {}
+
+
+def get_anonymous_plot_pk():
+    """Returns the primary key of the anonymous plot or None.
+
+    The pk is cached for the process and cleared by the plot
+    signals in member.signals. None is not cached so an anonymous
+    plot added later is found.
+    """
+    try:
+        return _anonymous_plot['pk']
+    except KeyError:
+        pk = getattr(get_anonymous_plot(), 'pk', None)
+    if pk is not None:
+        _anonymous_plot['pk'] = pk
+    return pk
+
+
+def clear_anonymous_plot_pk(plot_pk=None):
+    """Clears the cached anonymous plot pk.
+
+    If plot_pk is given, only clears the cache if plot_pk is the
+    cached pk.
+    """
+    if plot_pk is None or _anonymous_plot.get('pk') == plot_pk:
+        _anonymous_plot.clear()
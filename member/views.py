@@ -0,0 +1,13 @@
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import JsonResponse
+
+from .instrumentation import site_instrumentation
+
+
+@staff_member_required
+def instrumentation_view(request):
+    """Returns the instrumentation timings of this process as JSON.
+    """
+    return JsonResponse(dict(
+        enabled=site_instrumentation.enabled,
+        timings=site_instrumentation.summary()))